@@ -21,11 +21,23 @@ from .core import add_files
 
 
 ### updates for jupyter notebook orchestration
-from .nbks import init_file_db, parse_file_names, import_file_data, process_file_data
+from .nbks import init_file_db, parse_file_names, import_file_data, process_file_data, process_mlt_batch
+from .nbks import process_slt_batch, process_iv_fit_batch, bench_iv_fit
 from .nbks import select_node, plot_mlt_fit, save_mlt_fit, compile_data, save_all_data
 from .nbks import norm_pl_exposure, save_norm_pl, fix_pl, plot_ocpl, pl_hist_stats, save_pl_hist
 
 
+### watch folder streaming
+from .watch import init_watch, poll_watch, run_watch
+
+
+### parsed data cache
+from .general.cache import set_cache, get_cache_stats, clear_cache
+
+### lazy image handles
+from .general.image import set_image_cache, clear_images
+
+
 
 
 ''' development only - direct access to module functions '''
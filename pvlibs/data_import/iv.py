@@ -21,19 +21,58 @@ import numpy as np
 # data table handling
 import pandas as pd
 
+# text buffer
+import io
+
 
 from operator import itemgetter
 from itertools import groupby
 
 
+# parsed data cache
+from ..general.cache import cache_parse
+
+
 
 ''' Current-Voltage File Format Parse Functions '''
 
+def read_numeric_block(lines, cols):
+
+    ''' Read Numeric Block
+
+        Parse selected columns of tab delimited rows to array by C-level parser; non-numeric and non-finite values
+        parsed as zero
+
+    # inputs
+        lines (list): tab delimited data rows (str)
+        cols (tuple): column indicies to parse
+
+    Returns:
+        np.array: parsed values, shape (rows, columns)
+    '''
+
+    # parse all rows at once, no comment character (e.g. #INF)
+    try:
+        data = np.loadtxt(lines, delimiter = '\t', usecols = cols, comments = None, ndmin = 2)
+
+    # non-numeric values in selected columns, parse as text and coerce
+    except ValueError:
+        data = pd.read_csv(io.StringIO('\n'.join(lines)), sep = '\t', header = None, usecols = cols, dtype = str,
+            keep_default_na = False, engine = 'c')
+        data = data.apply(pd.to_numeric, errors = 'coerce').to_numpy(np.float64)
+
+
+    # return parsed values, non-finite as zero
+    return np.where(np.isfinite(data), data, 0.)
+
+
+
 def type_halm(file_path):
 
     ''' Parse HALM Current-Voltage Format
 
-        Import current-voltage measurement settings and data from a HALM format file
+        Import current-voltage measurement settings and data from a HALM format file; file read once, voltage, current
+        and intensity columns of all data segments parsed together
 
     # inputs
         _file_path (str): full filepath
@@ -42,46 +81,33 @@ def type_halm(file_path):
         dict: extracted data and parameters
     '''
 
-    # file extract storage
-    _headers = []; _data = []
-
-    # import data segments and headers from txt file, store in lists
+    # import all lines from txt file
     with open(file_path, 'r', encoding = 'iso-8859-1') as file:
+        lines = file.read().splitlines()
 
-        lines = file.readlines()
-        # row numbers [header, data start, n rows] for data segments, iterate
-        segs = [
-            [12, 13, 199], # 1.0 suns IV
-            [12, 217, 199], # 0.5 suns IV
-            [434, 435, 100], # dark reverse bias IV
-            [548, 549, 200], # shunt res
-            [762, 763, 200], # series res
-        ]
-        for s in segs:
-            head, start, rows = s
-            _headers.append(lines[head])
-            _data.append([ lines[i] for i in range(len(lines))[start:start+rows] ])
-
-    # parse header string, discard Nr, split for (name, units) by column, store array
-    for i in range(len(_headers)):
-        _headers[i] = np.array([ [head[str.index(head, ']')+1:],
-                                 head[str.index(head, '[')+1:str.index(head, ']')]]
-                                for head in str.split(str.strip(_headers[i]), '\t')[1:] ])
-
-    # parse data rows, discard Nr, split each column, parse to float else zero, store array
-    chk = lambda s: str.isdigit(str.join('',[ c for c in s if c not in ['.', '-', '+'] ]))
-    for i in range(len(_data)):
-        _data[i] = np.stack([ [ float(v) if chk(v) else 0.
-                               for v in str.split(str.strip(row), '\t')[1:] ]
-                             for row in _data[i] ])
+    # row numbers [data start, n rows] for data segments
+    segs = [
+        [13, 199], # 1.0 suns IV
+        [217, 199], # 0.5 suns IV
+        [435, 100], # dark reverse bias IV
+        [549, 200], # shunt res
+        [763, 200], # series res
+    ]
+
+    # data rows of all segments, stripped
+    rows = [ [ line.strip() for line in lines[start:start+n] ] for start, n in segs ]
+
+
+    # parse voltage, current, intensity columns (after Nr) of all segments together, split by segment
+    data = read_numeric_block([ row for seg in rows for row in seg ], cols = (7, 8, 9))
+    data = np.split(data, np.cumsum([ len(seg) for seg in rows ])[:-1])
 
     names = ['full', 'half', 'dark', 'shunt', 'series']
 
-    # store each data array in dict with header as key
-    #data_entry = { _headers[i][0][0]:_data[i][:,:] for i in list(range(len(_headers))) }
-    data_entry = { names[i]: { 'voltage': _data[i][:,6][::-1],
-                               'current': -_data[i][:,7][::-1],
-                               'intensity': _data[i][:,8][::-1], }
+    # store each data array in dict by segment name
+    data_entry = { names[i]: { 'voltage': data[i][:,0][::-1],
+                               'current': -data[i][:,1][::-1],
+                               'intensity': data[i][:,2][::-1], }
         for i in range(len(names)) }
 
     # return data dict
@@ -140,6 +166,7 @@ def type_halm_500(file_path):
 
 
 
+@cache_parse
 def type_wavelabs(file_path):
 
     ''' Parse WaveLabs Current-Voltage Format
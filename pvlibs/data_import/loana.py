@@ -26,108 +26,133 @@ from operator import itemgetter
 from itertools import groupby
 
 
+# text buffer
+import io
+
+# filesystem navigation
+import os
+
+# concurrent file reading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
 
 ''' Current-Voltage File Format Parse Functions '''
 
 
 
-def type_loana(file_path):
+def read_loana_segments(lines):
 
-    ''' Parse HALM Current-Voltage Format
+    ''' Read Loana Segments
 
-        Import current-voltage measurement settings and data from a HALM format file
+        Read each bracketed header segment of loana file in single scan; segment ends at first following blank line,
+        each segment line split to key (trailing colon removed) and list of values
 
-    # inputs
-        _file_path (str): full filepath
+    Args:
+        lines (list): file lines (str) before data block, newline removed
 
     Returns:
-        dict: extracted data and parameters
+        dict: segment values (dict) by segment header
     '''
 
-    #res = {}
+    segments = {}
+    segment = None
 
-    # open data file and extract lines
-    with open(file_path, 'r', encoding = 'iso-8859-1') as file:
+    for line in lines:
 
-        lines = file.readlines()
+        # open new segment on header
+        if line.startswith('['):
+            segment = {}
+            segments[line.strip('[]')] = segment
 
-    results = {}
+        # close segment on blank line
+        elif line == '':
+            segment = None
 
-    head_ids = [ i for i in range(len(lines)) if lines[i].startswith('[') ]
-    tail_ids = [ i for i in range(len(lines)) if lines[i].startswith('\n') ]
-    seg_ids = list(zip(head_ids, tail_ids))
+        # store segment line values by key
+        elif segment is not None:
+            val = line.split('\t')
+            segment[val[0][:-1]] = val[1:]
 
-    for seg in seg_ids[:]:
-        header = lines[seg[0]].strip('\n[]')
-        results[header] = {}
-        for j in range(seg[0]+1, seg[1]):
-            val = lines[j].strip('\n').split('\t')
-            results[header][val[0][:-1]] = val[1:]
 
+    # return segments
+    return segments
 
-    idx = [ i for i in range(len(lines)) if lines[i].startswith('**Data**') ][0] + 1
-    data = np.array([ [ float(l) for l in lines[i].strip('\n').split('\t') ] for i in range(idx, len(lines)) ])
 
-    #print(results.keys())
-    results['Data'] = data
 
+def read_loana_file(file_path, data = False):
 
+    ''' Read Loana File
 
+        Read single loana file; header segments parsed in single scan up to data block, data block optionally parsed
+        with C-level numeric parser
 
-    # open data file and extract lines
-    with open(file_path[:-3]+'drk', 'r', encoding = 'iso-8859-1') as file:
+    Args:
+        file_path (str): full filepath
+        data (bool): parse data block, stored as 'Data'
 
-        lines = file.readlines()
+    Returns:
+        dict: segment values (dict) by segment header, with data block (np.array) where parsed
+    '''
 
-    dark_results = {}
+    # read file as single string
+    with open(file_path, 'r', encoding = 'iso-8859-1') as file:
+        text = file.read()
 
-    head_ids = [ i for i in range(len(lines)) if lines[i].startswith('[') ]
-    tail_ids = [ i for i in range(len(lines)) if lines[i].startswith('\n') ]
-    seg_ids = list(zip(head_ids, tail_ids))
+    # locate data block marker at line start, None where no data block
+    i = 0 if text.startswith('**Data**') else text.find('\n**Data**') + 1 or None
 
-    for seg in seg_ids[:]:
-        header = lines[seg[0]].strip('\n[]')
-        dark_results[header] = {}
-        for j in range(seg[0]+1, seg[1]):
-            val = lines[j].strip('\n').split('\t')
-            dark_results[header][val[0][:-1]] = val[1:]
+    # parse header segments before data block
+    results = read_loana_segments(text[:i].split('\n'))
 
-    results['Dark'] = dark_results
 
+    # parse data block after marker line, tab separated rows
+    if data:
+        if i is None:
+            raise ValueError('no data block in loana file: {}'.format(file_path))
 
+        block = text[i:].partition('\n')[2]
 
-        # open data file and extract lines
-    with open(file_path[:-3]+'jv', 'r', encoding = 'iso-8859-1') as file:
+        if block.strip() == '':
+            results['Data'] = np.array([])
+        else:
+            results['Data'] = np.loadtxt(io.StringIO(block), delimiter = '\t', comments = None, ndmin = 2)
 
-        lines = file.readlines()
 
-    jv_results = {}
+    # return file segments and data
+    return results
 
-    head_ids = [ i for i in range(len(lines)) if lines[i].startswith('[') ]
-    tail_ids = [ i for i in range(len(lines)) if lines[i].startswith('\n') ]
-    seg_ids = list(zip(head_ids, tail_ids))
 
-    for seg in seg_ids[:]:
-        header = lines[seg[0]].strip('\n[]')
-        jv_results[header] = {}
-        for j in range(seg[0]+1, seg[1]):
-            val = lines[j].strip('\n').split('\t')
-            jv_results[header][val[0][:-1]] = val[1:]
 
-    results['JV'] = jv_results
+def type_loana(file_path):
 
+    ''' Parse Loana Current-Voltage Format
 
+        Import current-voltage measurement results and data from loana light (lgt) file, with dark (drk) and jv
+        analysis (jv) sibling files; the three files are read concurrently
 
-    keep = ['Results', 'Data', 'Sample', 'Dark', 'JV']
-    #keep = ['Results']
+    # inputs
+        file_path (str): full filepath of light (lgt) file
 
-    # only keep desired data
-    results = { k:v for k,v in results.items() if k in keep }
+    Returns:
+        dict: extracted data and parameters
+    '''
 
-    #print(results)
+    # read light, dark and jv analysis files concurrently, file read bound
+    with ThreadPoolExecutor(max_workers = 3) as pool:
+        lgt = pool.submit(read_loana_file, file_path, True)
+        drk = pool.submit(read_loana_file, file_path[:-3]+'drk')
+        jv = pool.submit(read_loana_file, file_path[:-3]+'jv')
 
+        results = lgt.result()
+        results['Dark'] = drk.result()
+        results['JV'] = jv.result()
 
-    #res = { **res, **{ '{}-{}'.format(ff,k):float(v[0]) for k,v in results['Results'].items() if k != 'Model' } }
+
+    keep = ['Results', 'Data', 'Sample', 'Dark', 'JV']
+
+    # only keep desired data
+    results = { k:v for k,v in results.items() if k in keep }
 
 
     # return data dict
@@ -228,3 +253,118 @@ def loana(file_type, file_path, file_name):
 
     # return imported data
     return data
+
+
+
+''' Batch Import Functions '''
+
+def type_loana_chunk(file_paths):
+
+    ''' Parse Chunk of Loana Files
+
+        Parse each loana measurement in chunk within a single process; failures are caught and returned for each file
+
+    Args:
+        file_paths (list): full filepaths of light (lgt) files
+
+    Returns:
+        list: (extracted data (dict), error message (str)) for each file, data None on failure
+    '''
+
+    results = []
+
+    for file_path in file_paths:
+        try:
+            results.append( (type_loana(file_path = file_path), None) )
+
+        # on parse error, store error message
+        except Exception as e:
+            results.append( (None, '{}: {}'.format(type(e).__name__, e)) )
+
+
+    # return extracted data and errors
+    return results
+
+
+
+def type_loana_batch(file_paths, workers = None):
+
+    ''' Parse Batch of Loana Files
+
+        Split loana measurements into chunks and parse each chunk in parallel over a process pool; parse failures are
+        reported per file without aborting the batch
+
+    Args:
+        file_paths (list): full filepaths of light (lgt) files
+        workers (int): number of worker processes, default cpu count; parse serially in current process if 1
+
+    Returns:
+        results (list): extracted data (dict) for each file in order, None on failure
+        failures (dict): error message (str) by file index for each failed parse
+    '''
+
+    # set number of worker processes
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+
+    # split files into chunks, spread across available workers
+    size = max(-(-len(file_paths) // workers), 1)
+    chunks = [ file_paths[j:j+size] for j in range(0, len(file_paths), size) ]
+
+
+    # parse each chunk serially in current process
+    if workers == 1:
+        parsed = [ type_loana_chunk(chunk) for chunk in chunks ]
+
+    # parse chunks in parallel over process pool
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            parsed = list(pool.map(type_loana_chunk, chunks))
+
+
+    # unpack extracted data in original file order, collect failures
+    results = []
+    failures = {}
+
+    for rec, err in [ p for chunk in parsed for p in chunk ]:
+        if err is not None:
+            failures[len(results)] = err
+        results.append(rec)
+
+
+    # return extracted data and failures
+    return results, failures
+
+
+
+def type_loana_dir(dir_path, workers = None):
+
+    ''' Parse Loana Export Directory
+
+        Parse every loana measurement (light file with dark and jv analysis siblings) in export directory in parallel
+
+    Args:
+        dir_path (str): full directory path of loana export
+        workers (int): number of worker processes, default cpu count
+
+    Returns:
+        results (dict): extracted data (dict) by light (lgt) file name
+        failures (dict): error message (str) by light (lgt) file name for each failed parse
+    '''
+
+    # list light files in name order
+    file_names = sorted( f for f in os.listdir(dir_path) if f.endswith('.lgt') )
+
+    # parse all light files in parallel
+    parsed, errors = type_loana_batch(file_paths = [ os.path.join(dir_path, f) for f in file_names ],
+        workers = workers)
+
+
+    # key extracted data and failures by file name
+    results = { file_names[i]: parsed[i] for i in range(len(file_names)) if i not in errors.keys() }
+    failures = { file_names[i]: err for i, err in errors.items() }
+
+
+    # return extracted data and failures
+    return results, failures
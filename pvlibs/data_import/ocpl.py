@@ -16,11 +16,118 @@ Todo:
 ''' Imports '''
 
 # data array handling
-import numpy as np
 import pandas as pd
 
-# python image library
-from PIL import Image
+# settings file modified time
+import os
+
+
+# lazy image handles
+from ..general.image import lazy_image
+
+
+
+''' Settings Index Functions '''
+
+# settings files; file name, file name id length, intensity column position
+OCPL_SETTINGS = [
+    ('meas_wafer_upl.txt', 5, 31),
+    ('meas_cell_ploc.txt', 5, 31),
+    ('meas_cell_ploc.txt', 6, 36),
+]
+
+# settings index by settings file path; (size, modified time), index
+SETTINGS_INDEX = {}
+
+
+
+def load_ocpl_settings(file_path):
+
+    ''' Load OCPL Settings Index
+
+        Load measurement settings file once into index of row by image id (first occurrence) and column values; index
+        cached by file path and reloaded only where file size or modified time changed
+
+    Args:
+        file_path (str): full settings file path
+
+    Returns:
+        dict: settings index, None where no settings file
+    '''
+
+    # no settings file, drop any cached index
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        SETTINGS_INDEX.pop(file_path, None)
+        return None
+
+    # return cached index where file unchanged
+    stat = (st.st_size, st.st_mtime_ns)
+    if file_path in SETTINGS_INDEX.keys() and SETTINGS_INDEX[file_path][0] == stat:
+        return SETTINGS_INDEX[file_path][1]
+
+
+    # read measurement settings file
+    sett = pd.read_csv(file_path, encoding = 'iso-8859-1', delimiter = '\t')
+
+    # map image id to first matching row
+    rows = {}
+    if 'id' in sett.columns:
+        for i, image_id in enumerate(sett['id'].values):
+            rows.setdefault(image_id, i)
+
+    # store column values by position, column position by name
+    index = {'rows': rows, 'names': { name: c for c, name in enumerate(sett.columns) },
+        'columns': [ sett.iloc[:, c].values for c in range(sett.shape[1]) ]}
+
+    SETTINGS_INDEX[file_path] = (stat, index)
+
+
+    # return settings index
+    return index
+
+
+
+def get_ocpl_setting(file_path, image_id, column):
+
+    ''' Get OCPL Setting
+
+        Get single measurement setting matched by image id from settings index
+
+    Args:
+        file_path (str): full settings file path
+        image_id (int): image id parsed from file name
+        column (str/int): settings column name or position
+
+    Returns:
+        value of setting; raises FileNotFoundError, KeyError or IndexError where not found
+    '''
+
+    index = load_ocpl_settings(file_path)
+
+    if index is None:
+        raise FileNotFoundError('no settings file: {}'.format(file_path))
+
+    # get column position by name
+    if isinstance(column, str):
+        column = index['names'][column]
+
+
+    # return setting value from matched row
+    return index['columns'][column][ index['rows'][image_id] ]
+
+
+
+def clear_ocpl_settings():
+
+    ''' Clear OCPL Settings Index
+
+    Returns:
+        (none): all cached settings indexes removed
+    '''
+
+    SETTINGS_INDEX.clear()
 
 
 
@@ -39,8 +146,8 @@ def type_tif(file_path):
         dict: extracted data and parameters
     '''
 
-    # import image data from tif file into np array, return data dict
-    return {'raw_img': np.array( Image.open(file_path) )}
+    # lazy handle of tif image data, decoded on first access, return data dict
+    return {'raw_img': lazy_image(file_path = file_path)}
 
 
 def type_tif(file_path):
@@ -56,8 +163,8 @@ def type_tif(file_path):
         dict: extracted data and parameters
     '''
 
-    # import image data from tif file into np array, return data dict
-    return {'raw_img': np.array( Image.open(file_path) )}
+    # lazy handle of tif image data, decoded on first access, return data dict
+    return {'raw_img': lazy_image(file_path = file_path)}
 
 
 
@@ -82,49 +189,19 @@ def ocpl(file_type, file_path, file_name):
         data = type_tif(file_path = '{}/{}'.format(file_path, file_name))
 
 
-    try:
-        # read measurement settings file
-        sett = pd.read_csv('{}/meas_wafer_upl.txt'.format(file_path),
-            encoding = 'iso-8859-1', delimiter = '\t')
-
-        # extract exposure value matched by file id
-        data['exposure'] = sett[sett['id'] == int(file_name[:5])]['Exposure Time (s)'].values[0]
-        data['intensity'] = sett[sett['id'] == int(file_name[:5])].iloc[:,31].values[0]/2.5e17
-
-
-    except:
-        # no measurement properties file
-        pass
-
-
-    try:
-        # read measurement settings file
-        sett = pd.read_csv('{}/meas_cell_ploc.txt'.format(file_path),
-            encoding = 'iso-8859-1', delimiter = '\t')
-
-        # extract exposure value matched by file id
-        data['exposure'] = sett[sett['id'] == int(file_name[:5])]['Exposure Time (s)'].values[0]
-        data['intensity'] = sett[sett['id'] == int(file_name[:5])].iloc[:,31].values[0]/2.5e17
-
-
-    except:
-        # no measurement properties file
-        pass
-
-
-    try:
-        # read measurement settings file
-        sett = pd.read_csv('{}/meas_cell_ploc.txt'.format(file_path),
-            encoding = 'iso-8859-1', delimiter = '\t')
+    # extract exposure and intensity matched by file id from each settings file, later settings files take priority
+    for settings_name, id_length, column in OCPL_SETTINGS:
 
-        # extract exposure value matched by file id
-        data['exposure'] = sett[sett['id'] == int(file_name[:6])]['Exposure Time (s)'].values[0]
-        data['intensity'] = sett[sett['id'] == int(file_name[:6])].iloc[:,36].values[0]/2.5e17
+        try:
+            image_id = int(file_name[:id_length])
+            settings_path = '{}/{}'.format(file_path, settings_name)
 
+            data['exposure'] = get_ocpl_setting(settings_path, image_id, 'Exposure Time (s)')
+            data['intensity'] = get_ocpl_setting(settings_path, image_id, column)/2.5e17
 
-    except:
-        # no measurement properties file
-        pass
+        except:
+            # no measurement properties file, or file id not found
+            pass
 
 
 
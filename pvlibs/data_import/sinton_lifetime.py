@@ -22,6 +22,10 @@ import numpy as np
 import openpyxl
 
 
+# single pass ltr reader
+from .slt import read_ltr_fields, LTR_FIELDS
+
+
 
 ''' Sinton Lifetime File Format Parse Functions '''
 
@@ -87,51 +91,9 @@ def parse_format_ltr(_file_path):
         dict: extracted data and parameters
     '''
 
-    # open data file and extract lines
-    lines = open(_file_path, 'r', encoding = 'iso-8859-1').readlines()
-
-    # initialise data storage dict
-    data_entry = {}
+    # read measurement data and instrument calibration fields, single pass ltr reader
+    data_entry = read_ltr_fields(file_path = _file_path, fields = LTR_FIELDS)
 
-    # iterate lines
-    for l in range(len(lines)):
-
-        # extract time data
-        if str.startswith( lines[l], 'Time = "<' ):
-            data_entry['time'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
-
-        # extract reference cell voltage data
-        if str.startswith( lines[l], 'Ref = "<' ):
-            data_entry['ref_volt'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
-
-        # extract photovoltage data
-        if str.startswith( lines[l], 'PC = "<' ):
-            data_entry['photo_volt'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
-
-        # dark voltage value
-        if str.startswith( lines[l], 'Vdark'):
-            data_entry['dark_volt'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[2:][0] )
-
-        # reference cell calibration value in V/sun
-        if str.startswith( lines[l], 'Ref Cell  (V/sun)'):
-            data_entry['ref_cell_cal'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[5:][0] )
-
-        # average air voltage calibration value
-        if str.startswith( lines[l], 'Avg. Air Voltage'):
-            data_entry['instr_air_volt'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[4:][0] )
-
-        # instrument calibration values
-        if str.startswith( lines[l], 'A = "'):
-            data_entry['instr_cal_a'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[2:][0] )
-        if str.startswith( lines[l], 'B = "'):
-            data_entry['instr_cal_b'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[2:][0] )
-        if str.startswith( lines[l], 'Offset'):
-
-            #data_entry['instr_offset'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[5:][0] )
-            data_entry['instr_offset'] = float(str.split(lines[l], '"')[-2])
 
     # return data dict
     return data_entry
@@ -15,13 +15,14 @@ Todo:
 
 ''' Imports '''
 
-# data array handling
-import numpy as np
-
 # parse xlsm files
 import openpyxl
 
 
+# single pass ltr reader
+from .slt import read_ltr_fields, LTR_FIELDS
+
+
 
 ''' Sinton Suns-Voc File Format Parse Functions '''
 
@@ -38,33 +39,9 @@ def parse_format_svr(_file_path):
         dict: extracted data and parameters
     '''
 
-    # open data file and extract lines
-    lines = open(_file_path, 'r', encoding = 'iso-8859-1').readlines()
-
-    # initialise data storage dict
-    data_entry = {}
-
-    # iterate lines
-    for l in range(len(lines)):
-
-        # extract time data
-        if str.startswith( lines[l], 'Time = "<' ):
-            data_entry['time'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
-
-        # extract reference cell voltage data
-        if str.startswith( lines[l], 'Ref = "<' ):
-            data_entry['ref_volt'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
-
-        # extract photovoltage data
-        if str.startswith( lines[l], 'PC = "<' ):
-            data_entry['photo_volt'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
-
-        # reference cell calibration value in V/sun
-        if str.startswith( lines[l], 'Ref Cell  (V/sun)'):
-            data_entry['ref_cell_cal'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[5:][0] )
+    # read measurement data and reference cell calibration fields, single pass ltr reader
+    fields = [ field for field in LTR_FIELDS if field[1] in ['time', 'ref_volt', 'photo_volt', 'ref_cell_cal'] ]
+    data_entry = read_ltr_fields(file_path = _file_path, fields = fields)
 
 
     # return data dict
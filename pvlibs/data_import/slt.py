@@ -21,13 +21,31 @@ import numpy as np
 # parse xlsm files
 import openpyxl
 
-# smoothing filter for derivative
-from scipy.signal import savgol_filter
+# raise on malformed array data
+import warnings
+
+# parsed data cache
+from ..general.cache import cache_parse
 
 
 
 ''' Sinton Lifetime File Format Parse Functions '''
 
+# ltr fields; line prefix, data key, array or value token index (None for last quoted value)
+LTR_FIELDS = [
+    ('Time = "<', 'time', 'array'),
+    ('Ref = "<', 'ref_volt', 'array'),
+    ('PC = "<', 'photo_volt', 'array'),
+    ('Vdark', 'dark_volt', 2),
+    ('Ref Cell  (V/sun)', 'ref_cell_cal', 5),
+    ('Avg. Air Voltage', 'instr_air_volt', 4),
+    ('A = "', 'instr_cal_a', 2),
+    ('B = "', 'instr_cal_b', 2),
+    ('Offset', 'instr_offset', None),
+]
+
+
+@cache_parse
 def type_xlsm(file_path):
 
     ''' Parse XLSM Workbook Format
@@ -78,64 +96,107 @@ def type_xlsm(file_path):
 
 
 
-def type_ltr(file_path):
+def read_ltr_array(payload):
 
-    ''' Parse LTR LabView File Format
+    ''' Read LTR Array Payload
 
-        Import photoconductance measurement settings and data from a sinton lifetime ltr file
+        Parse space separated array payload of ltr line at C level, parsed as double then cast for identical rounding to
+        per value conversion; malformed payload raises rather than truncating
 
-    # inputs
+    Args:
+        payload (str): line after array prefix, values with closing quote
+
+    Returns:
+        np.array: parsed values
+    '''
+
+    # raise on unmatched data, otherwise warned and truncated
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(payload.replace('"', ' '), dtype = np.float64, sep = ' ')
+        except DeprecationWarning as e:
+            raise ValueError('invalid ltr array data: {}'.format(e))
+
+
+    # return parsed values
+    return values.astype(np.float32)
+
+
+
+def read_ltr_fields(file_path, fields):
+
+    ''' Read LTR Fields
+
+        Stream ltr file lines in single pass, dispatch each line by leading characters to candidate field prefixes,
+        parse matched fields and stop once all fields read
+
+    Args:
         file_path (str): full filepath
+        fields (list): (line prefix, data key, value token index or 'array'), token index None for last quoted value
 
     Returns:
         dict: extracted data and parameters
     '''
 
-    # open data file and extract lines
-    lines = open(file_path, 'r', encoding = 'iso-8859-1').readlines()
+    # build dispatch table of candidate fields by first two line characters
+    dispatch = {}
+    for field in fields:
+        dispatch.setdefault(field[0][:2], []).append(field)
 
     # initialise data storage dict
     data_entry = {}
 
-    # iterate lines
-    for l in range(len(lines)):
 
-        # extract time data
-        if str.startswith( lines[l], 'Time = "<' ):
-            data_entry['time'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
+    # stream lines until all fields read
+    with open(file_path, 'r', encoding = 'iso-8859-1') as f:
+        for line in f:
+
+            # skip lines with no candidate field
+            candidates = dispatch.get(line[:2])
+            if candidates is None:
+                continue
+
+            for prefix, key, index in candidates:
+                if line.startswith(prefix):
+
+                    # extract array data after prefix
+                    if index == 'array':
+                        data_entry[key] = read_ltr_array(line[len(prefix):])
+
+                    # extract last quoted value
+                    elif index is None:
+                        data_entry[key] = float(line.split('"')[-2])
+
+                    # extract value by space separated token index, quotes removed
+                    else:
+                        data_entry[key] = float(line.strip().replace('"', '').split(' ')[index])
 
-        # extract reference cell voltage data
-        if str.startswith( lines[l], 'Ref = "<' ):
-            data_entry['ref_volt'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
+            if len(data_entry) == len(fields):
+                break
 
-        # extract photovoltage data
-        if str.startswith( lines[l], 'PC = "<' ):
-            data_entry['photo_volt'] = np.array( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[3:],
-            dtype = np.float32)
 
-        # dark voltage value
-        if str.startswith( lines[l], 'Vdark'):
-            data_entry['dark_volt'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[2:][0] )
+    # return data dict
+    return data_entry
+
+
+
+def type_ltr(file_path):
 
-        # reference cell calibration value in V/sun
-        if str.startswith( lines[l], 'Ref Cell  (V/sun)'):
-            data_entry['ref_cell_cal'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[5:][0] )
+    ''' Parse LTR LabView File Format
+
+        Import photoconductance measurement settings and data from a sinton lifetime ltr file
+
+    # inputs
+        file_path (str): full filepath
 
-        # average air voltage calibration value
-        if str.startswith( lines[l], 'Avg. Air Voltage'):
-            data_entry['instr_air_volt'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[4:][0] )
+    Returns:
+        dict: extracted data and parameters
+    '''
 
-        # instrument calibration values
-        if str.startswith( lines[l], 'A = "'):
-            data_entry['instr_cal_a'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[2:][0] )
-        if str.startswith( lines[l], 'B = "'):
-            data_entry['instr_cal_b'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[2:][0] )
-        if str.startswith( lines[l], 'Offset'):
+    # read measurement data and instrument calibration fields
+    data_entry = read_ltr_fields(file_path = file_path, fields = LTR_FIELDS)
 
-            #data_entry['instr_offset'] = float( str.split( str.replace( str.strip(lines[l]) , '"', '') , ' ')[5:][0] )
-            data_entry['instr_offset'] = float(str.split(lines[l], '"')[-2])
 
     # return data dict
     return data_entry
@@ -192,45 +253,6 @@ def slt(file_type, file_path, file_name):
     _raw_data['dark_res'] = ( dark_cond )**-1
 
 
-    # use voltage transient derivatives to trim start and end, remove error values and noise
-    if False:
-
-        # select data range
-        x = _raw_data['time'].copy()
-        y = _raw_data['conductance'].copy()
-        z = _raw_data['illumination'].copy()
-
-        # strip error values at head and tail (time and noise floor)
-        j = np.where( (x > 0.) & (y > 5e-4) )
-        x = x[j]; y = y[j]; z = z[j]
-
-        # calculate first derivative
-        dy = savgol_filter(y, 15, 2, deriv = 1, mode = 'nearest')
-        ddy = savgol_filter(y, 15, 2, deriv = 2, mode = 'nearest')
-
-        # strip error values
-        j = np.where( (y > 1e-3) & (dy > 0.) )[0]
-        if len(j) > 0:
-            x = x[(j[-1]+1):]
-            y = y[(j[-1]+1):]
-            z = z[(j[-1]+1):]
-            dy = dy[(j[-1]+1):]
-            ddy = ddy[(j[-1]+1):]
-
-        k = np.where( (ddy == ddy.max()) )[0][0]
-        j = np.where( (ddy < 0.) & (x < x[k]) )[0]
-        if len(j) > 0:
-            x = x[(j[-1]+1):]
-            y = y[(j[-1]+1):]
-            z = z[(j[-1]+1):]
-
-        # update raw data
-        _raw_data['time'] = x
-        _raw_data['conductance'] = y
-        _raw_data['illumination'] = z
-
-
-
     ## filter for only required data and parameters to return
 
     # define list of required
@@ -19,6 +19,10 @@ Todo:
 import numpy as np
 
 
+# HALM format parser
+from .iv import type_halm
+
+
 
 ''' Current-Voltage File Format Parse Functions '''
 
@@ -35,50 +39,8 @@ def parse_format_csv(_file_path):
         dict: extracted data and parameters
     '''
 
-    # file extract storage
-    _headers = []; _data = []
-
-    # import data segments and headers from txt file, store in lists
-    with open(_file_path, 'r', encoding = 'iso-8859-1') as file:
-
-        lines = file.readlines()
-        # row numbers [header, data start, n rows] for data segments, iterate
-        segs = [
-            [12, 13, 199], # 1.0 suns IV
-            [12, 217, 199], # 0.5 suns IV
-            [434, 435, 100], # dark reverse bias IV
-            [548, 549, 200], # shunt res
-            [762, 763, 200], # series res
-        ]
-        for s in segs:
-            head, start, rows = s
-            _headers.append(lines[head])
-            _data.append([ lines[i] for i in range(len(lines))[start:start+rows] ])
-
-    # parse header string, discard Nr, split for (name, units) by column, store array
-    for i in range(len(_headers)):
-        _headers[i] = np.array([ [head[str.index(head, ']')+1:],
-                                 head[str.index(head, '[')+1:str.index(head, ']')]]
-                                for head in str.split(str.strip(_headers[i]), '\t')[1:] ])
-
-    # parse data rows, discard Nr, split each column, parse to float else zero, store array
-    chk = lambda s: str.isdigit(str.join('',[ c for c in s if c not in ['.', '-', '+'] ]))
-    for i in range(len(_data)):
-        _data[i] = np.stack([ [ float(v) if chk(v) else 0.
-                               for v in str.split(str.strip(row), '\t')[1:] ]
-                             for row in _data[i] ])
-
-    names = ['full', 'half', 'dark', 'shunt', 'series']
-
-    # store each data array in dict with header as key
-    #data_entry = { _headers[i][0][0]:_data[i][:,:] for i in list(range(len(_headers))) }
-    data_entry = { names[i]: { 'voltage': _data[i][:,6][::-1],
-                               'current': -_data[i][:,7][::-1],
-                               'intensity': _data[i][:,8][::-1], }
-        for i in range(len(names)) }
-
-    # return data dict
-    return data_entry
+    # parse HALM format file
+    return type_halm(file_path = _file_path)
 
 
 
@@ -222,7 +184,7 @@ def parse_current_voltage(_file_path, _format):
     if _format['equipment'] == 'halm':
 
         # process raw data, format independent, return result
-        return process_raw_data( parse_format_halm(_file_path) )
+        return process_raw_data( parse_format_csv(_file_path) )
 
 
     # WaveLabs Solar Simulator, 140 TETB
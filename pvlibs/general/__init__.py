@@ -3,3 +3,9 @@
 
 # general helper functions
 from .core import str_parse_params
+
+# parsed data cache
+from .cache import cache_parse, load_cached, set_cache, get_cache_stats, clear_cache
+
+# lazy image handles
+from .image import lazy_image, store_image, get_image, is_image_handle, set_image_cache, clear_images
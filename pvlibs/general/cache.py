@@ -0,0 +1,469 @@
+
+''' Parse Cache Functions
+
+Summary:
+    This file contains functions for a persistent cache of parsed data files; each parsed data dict is stored as a
+    binary sidecar file in the cache directory, keyed by source file path and parser, and validated against source
+    file size, modified time and content hash on load
+
+Example:
+    Usage of
+
+        @cache_parse
+        def type_xlsm(file_path):
+            ...
+
+        set_cache(cache_dir = './.pvlibs-cache', max_size = 256e6)
+        get_cache_stats()
+
+Todo:
+    *
+'''
+
+
+
+''' Imports '''
+
+# filesystem navigation, environment
+import os
+
+# sidecar storage (binary pickle format), content hashing
+import pickle, hashlib
+
+# preserve wrapped parser name and docstring
+import functools
+
+# parser code objects
+import types
+
+
+
+''' Cache State '''
+
+# sidecar file format version, increment to invalidate all existing sidecar files; parser code is hashed, but changes
+# to helper functions called by a parser are not detected, increment on such changes
+CACHE_VERSION = 1
+
+# cache settings and hit / miss statistics
+CACHE = {
+    'enabled': os.environ.get('PVLIBS_CACHE', '1') != '0',
+    'cache_dir': os.environ.get('PVLIBS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'pvlibs')),
+    'max_size': 512e6,
+    'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0, 'errors': 0,
+}
+
+
+
+''' Cache Settings Functions '''
+
+def set_cache(cache_dir = None, max_size = None, enabled = None):
+
+    ''' Set Cache Settings
+
+        Set parse cache directory, maximum total sidecar size, and enable or disable cache
+
+    Args:
+        cache_dir (str): full directory path of sidecar files
+        max_size (float): maximum total size of sidecar files [bytes], least recently used evicted
+        enabled (bool): load and store parsed data in cache
+
+    Returns:
+        dict: cache settings and statistics
+    '''
+
+    # update only given settings
+    if cache_dir is not None:
+        CACHE['cache_dir'] = cache_dir
+    if max_size is not None:
+        CACHE['max_size'] = max_size
+    if enabled is not None:
+        CACHE['enabled'] = enabled
+
+
+    # return cache settings and statistics
+    return dict(CACHE)
+
+
+
+def get_cache_stats():
+
+    ''' Get Cache Statistics
+
+        Get cache hit, miss, stale rebuild, eviction and error counts, with current sidecar file count and total size
+
+    Returns:
+        dict: cache statistics
+    '''
+
+    # current sidecar files in cache
+    files = list_sidecars()
+
+    stats = { k: CACHE[k] for k in ['hits', 'misses', 'stale', 'evictions', 'errors'] }
+    stats['files'] = len(files)
+    stats['size'] = sum( size for _, size, _ in files )
+
+    # fraction of loads served from cache
+    loads = stats['hits'] + stats['misses'] + stats['stale']
+    stats['hit_rate'] = stats['hits'] / loads if loads > 0 else 0.
+
+
+    # return cache statistics
+    return stats
+
+
+
+def clear_cache(stats = True):
+
+    ''' Clear Cache
+
+        Remove all sidecar files from cache directory, optionally reset statistics
+
+    Args:
+        stats (bool): reset hit / miss statistics
+
+    Returns:
+        int: number of sidecar files removed
+    '''
+
+    # remove each sidecar file
+    files = list_sidecars()
+    for path, _, _ in files:
+        remove_sidecar(path)
+
+    # reset statistics
+    if stats:
+        CACHE.update({ k: 0 for k in ['hits', 'misses', 'stale', 'evictions', 'errors'] })
+
+
+    # return number of files removed
+    return len(files)
+
+
+
+''' Sidecar File Functions '''
+
+def list_sidecars():
+
+    ''' List Sidecar Files
+
+        List sidecar files in cache directory with size and modified (last used) time
+
+    Returns:
+        list: (full path, size [bytes], modified time [ns]) for each sidecar file
+    '''
+
+    files = []
+
+    # cache directory not yet created
+    if not os.path.isdir(CACHE['cache_dir']):
+        return files
+
+    for entry in os.scandir(CACHE['cache_dir']):
+        if entry.is_file() and entry.name.endswith('.pkl'):
+            try:
+                st = entry.stat()
+                files.append( (entry.path, st.st_size, st.st_mtime_ns) )
+
+            # removed concurrently
+            except FileNotFoundError:
+                pass
+
+
+    # return sidecar files
+    return files
+
+
+
+def remove_sidecar(path):
+
+    ''' Remove Sidecar File
+
+    Args:
+        path (str): full path of sidecar file
+
+    Returns:
+        (none): sidecar file removed where present
+    '''
+
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+
+def get_sidecar_path(file_path, parser):
+
+    ''' Get Sidecar Path
+
+        Get sidecar file path from hash of absolute source file path and qualified parser name
+
+    Args:
+        file_path (str): full source file path
+        parser (function): parser function
+
+    Returns:
+        str: full sidecar file path
+    '''
+
+    # hash source path and parser, name collisions between parsers of same file avoided
+    key = '{}|{}.{}'.format(os.path.abspath(file_path), parser.__module__, parser.__qualname__)
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+    # return sidecar file path
+    return os.path.join(CACHE['cache_dir'], '{}.pkl'.format(name))
+
+
+
+def get_code_hash(code, h = None):
+
+    ''' Get Code Hash
+
+        Hash bytecode, constants and referenced names of code object, recursive into nested code objects (functions,
+        comprehensions) such that changed literals (e.g. cell ranges) also change the hash
+
+    Args:
+        code (code): function code object
+        h (hashlib): hash object updated in place, new sha1 where None
+
+    Returns:
+        str: hex digest of code hash
+    '''
+
+    if h is None:
+        h = hashlib.sha1()
+
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode('utf-8'))
+
+    # hash constants, nested code objects recursively; set literals sorted, order varies with hash seed
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            get_code_hash(const, h)
+        elif isinstance(const, frozenset):
+            h.update(repr(sorted( repr(c) for c in const )).encode('utf-8'))
+        else:
+            h.update(repr(const).encode('utf-8'))
+
+
+    # return code hash
+    return h.hexdigest()
+
+
+
+def get_file_state(file_path, parser):
+
+    ''' Get Source File State
+
+        Get source file state used to validate sidecar; size, modified time, content hash, and parser code hash such
+        that parser changes also invalidate; changes to helper functions called by the parser are not detected, such
+        changes require CACHE_VERSION increment
+
+    Args:
+        file_path (str): full source file path
+        parser (function): parser function
+
+    Returns:
+        dict: source file state
+    '''
+
+    st = os.stat(file_path)
+
+    # hash file content in blocks
+    h = hashlib.blake2b(digest_size = 16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+
+
+    # return source file state
+    return {'version': CACHE_VERSION, 'path': os.path.abspath(file_path), 'size': st.st_size,
+        'mtime': st.st_mtime_ns, 'hash': h.hexdigest(),
+        'parser': get_code_hash(parser.__code__)}
+
+
+
+def load_sidecar(path, state):
+
+    ''' Load Sidecar File
+
+        Load parsed data from sidecar file where stored source file state matches; mark sidecar used for eviction order
+
+    Args:
+        path (str): full sidecar file path
+        state (dict): current source file state
+
+    Returns:
+        (dict, bool): parsed data (None where not valid), sidecar present but stale
+    '''
+
+    # no sidecar stored
+    if not os.path.isfile(path):
+        return None, False
+
+    with open(path, 'rb') as f:
+        entry = pickle.load(f)
+
+    # stale where any source state changed
+    if entry['state'] != state:
+        return None, True
+
+    # update modified time as last used
+    os.utime(path)
+
+
+    # return parsed data
+    return entry['data'], False
+
+
+
+def store_sidecar(path, state, data):
+
+    ''' Store Sidecar File
+
+        Store parsed data and source file state in sidecar file, written to temporary file then replaced such that
+        partial sidecar files are never loaded; evict least recently used sidecar files over maximum size
+
+    Args:
+        path (str): full sidecar file path
+        state (dict): source file state
+        data (dict): parsed data
+
+    Returns:
+        (none): sidecar file stored
+    '''
+
+    os.makedirs(CACHE['cache_dir'], exist_ok = True)
+
+    # write to temporary file, replace sidecar
+    temp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp, 'wb') as f:
+        pickle.dump({'state': state, 'data': data}, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, path)
+
+
+    # evict sidecar files over maximum size
+    evict_sidecars()
+
+
+
+def evict_sidecars():
+
+    ''' Evict Sidecar Files
+
+        Remove least recently used sidecar files until total size within maximum cache size
+
+    Returns:
+        int: number of sidecar files removed
+    '''
+
+    # sort sidecar files by last used, oldest first
+    files = sorted(list_sidecars(), key = lambda f: f[2])
+    size = sum( f[1] for f in files )
+
+    n = 0
+
+    # remove oldest until within maximum size
+    for path, s, _ in files:
+        if size <= CACHE['max_size']:
+            break
+        remove_sidecar(path)
+        size -= s
+        n += 1
+
+    CACHE['evictions'] += n
+
+
+    # return number of files removed
+    return n
+
+
+
+''' Cached Parse Functions '''
+
+def load_cached(parser, file_path):
+
+    ''' Load Cached Parsed Data
+
+        Load parsed data for source file from cache where valid, else parse source file and store in cache; cache
+        errors never fail the parse, parser called directly
+
+    Args:
+        parser (function): parser function, called with source file path
+        file_path (str): full source file path
+
+    Returns:
+        dict: parsed data
+    '''
+
+    # cache disabled, parse directly
+    if not CACHE['enabled']:
+        return parser(file_path = file_path)
+
+    path = get_sidecar_path(file_path, parser)
+
+
+    # missing or unreadable source file, parse uncached (parser raises)
+    try:
+        state = get_file_state(file_path, parser)
+    except OSError:
+        return parser(file_path = file_path)
+
+
+    # load from cache where valid
+    try:
+        data, stale = load_sidecar(path, state)
+
+        if data is not None:
+            CACHE['hits'] += 1
+            return data
+
+    # unreadable or corrupt sidecar, rebuild
+    except Exception:
+        CACHE['errors'] += 1
+        remove_sidecar(path)
+        stale = True
+
+    CACHE['stale' if stale else 'misses'] += 1
+
+
+    # parse source file, store in cache
+    data = parser(file_path = file_path)
+
+    try:
+        store_sidecar(path, state, data)
+
+    # read only or full cache directory, or unpicklable data
+    except Exception:
+        CACHE['errors'] += 1
+
+
+    # return parsed data
+    return data
+
+
+
+def cache_parse(parser):
+
+    ''' Cache Parse Decorator
+
+        Wrap file parser function such that parsed data is loaded from cache where valid
+
+    Args:
+        parser (function): parser function, called with source file path as keyword file_path
+
+    Returns:
+        function: cached parser function, original parser as attribute uncached
+    '''
+
+    @functools.wraps(parser)
+    def cached(file_path):
+        return load_cached(parser, file_path)
+
+    # direct access to uncached parser
+    cached.uncached = parser
+
+
+    # return cached parser function
+    return cached
@@ -0,0 +1,254 @@
+
+''' Lazy Image Handle Functions
+
+Summary:
+    This file contains functions for lazy image handles; a handle stores only a reference to the source image file or
+    spilled array, decoded on first access to an on-disk npy cache and reopened memory-mapped (read only) such that
+    many large images are never held in memory together
+
+Example:
+    Usage of
+
+        node['raw_img'] = lazy_image(file_path = './data/00001.tif')
+        img = get_image(node['raw_img'])
+        node['norm_img'] = store_image(img * 2., source = node['raw_img'], op = 'x2')
+
+Todo:
+    *
+'''
+
+
+
+''' Imports '''
+
+# data array handling
+import numpy as np
+
+# filesystem navigation
+import os
+
+# cache file names
+import hashlib
+
+# python image library
+from PIL import Image
+
+
+# parse cache directory
+from .cache import CACHE
+
+
+
+''' Image Cache State '''
+
+# image cache settings; npy cache directory (default parse cache subdirectory), store images as lazy handles
+IMAGE_CACHE = {
+    'cache_dir': os.environ.get('PVLIBS_IMAGE_DIR', None),
+    'lazy': os.environ.get('PVLIBS_LAZY_IMAGES', '1') != '0',
+}
+
+
+
+def set_image_cache(cache_dir = None, lazy = None):
+
+    ''' Set Image Cache Settings
+
+    Args:
+        cache_dir (str): full directory path of npy image cache
+        lazy (bool): store images as lazy handles, else as arrays in memory
+
+    Returns:
+        dict: image cache settings
+    '''
+
+    # update only given settings
+    if cache_dir is not None:
+        IMAGE_CACHE['cache_dir'] = cache_dir
+    if lazy is not None:
+        IMAGE_CACHE['lazy'] = lazy
+
+
+    # return image cache settings
+    return dict(IMAGE_CACHE)
+
+
+
+def get_image_dir():
+
+    ''' Get Image Cache Directory
+
+    Returns:
+        str: full directory path of npy image cache, created where missing
+    '''
+
+    # default to subdirectory of parse cache
+    path = IMAGE_CACHE['cache_dir'] or os.path.join(CACHE['cache_dir'], 'images')
+
+    os.makedirs(path, exist_ok = True)
+
+
+    # return image cache directory
+    return path
+
+
+
+def clear_images():
+
+    ''' Clear Image Cache
+
+        Remove all npy files from image cache; handles of source image files decode again on next access, handles of
+        stored arrays become invalid
+
+    Returns:
+        int: number of npy files removed
+    '''
+
+    path = get_image_dir()
+    files = [ f for f in os.listdir(path) if f.endswith('.npy') ]
+
+    for f in files:
+        os.remove(os.path.join(path, f))
+
+
+    # return number of files removed
+    return len(files)
+
+
+
+''' Image Handle Functions '''
+
+def is_image_handle(img):
+
+    ''' Check Image Handle
+
+    Args:
+        img (obj): image array or handle
+
+    Returns:
+        bool: True where lazy image handle
+    '''
+
+    return isinstance(img, dict) and 'npy_name' in img.keys()
+
+
+
+def lazy_image(file_path):
+
+    ''' Lazy Image Handle
+
+        Create handle of source image file without decoding; npy cache name from source path, size and modified time
+        such that changed source files decode again
+
+    Args:
+        file_path (str): full source image file path
+
+    Returns:
+        dict: image handle, or decoded image array where lazy images disabled
+    '''
+
+    # decode directly where lazy images disabled
+    if not IMAGE_CACHE['lazy']:
+        return np.array( Image.open(file_path) )
+
+    st = os.stat(file_path)
+    key = '{}|{}|{}'.format(os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+
+
+    # return image handle
+    return {'file_path': os.path.abspath(file_path),
+        'npy_name': '{}.npy'.format(hashlib.sha1(key.encode('utf-8')).hexdigest())}
+
+
+
+def store_image(img, source = None, op = None):
+
+    ''' Store Image
+
+        Spill image array to npy cache and return handle, array returned unchanged where lazy images disabled; npy
+        cache name from source image handle and operation where given, else from image content, such that repeated
+        processing overwrites the same npy file; npy files may be shared between handles, never removed on replace
+        (clear_images to remove all)
+
+    Args:
+        img (np.array): image array
+        source (dict): image handle of source image array was derived from
+        op (str): operation and parameters applied to source image
+
+    Returns:
+        dict: image handle, or image array where lazy images disabled
+    '''
+
+    # keep in memory where lazy images disabled, or already stored
+    if not IMAGE_CACHE['lazy'] or is_image_handle(img):
+        return img
+
+    img = np.asarray(img)
+
+    # name from source handle and operation, else from content
+    if is_image_handle(source) and op is not None:
+        key = '{}|{}'.format(source['npy_name'], op).encode('utf-8')
+    else:
+        key = b'|'.join([ str(img.shape).encode('utf-8'), img.dtype.str.encode('utf-8'),
+            np.ascontiguousarray(img).tobytes() ])
+
+    name = '{}.npy'.format(hashlib.sha1(key).hexdigest())
+    write_npy(os.path.join(get_image_dir(), name), img)
+
+
+    # return image handle
+    return {'file_path': None, 'npy_name': name}
+
+
+
+def write_npy(path, img):
+
+    ''' Write NPY File
+
+        Write array to npy file via temporary file then replace, such that partial files are never opened
+
+    Args:
+        path (str): full npy file path
+        img (np.array): image array
+
+    Returns:
+        (none): array stored
+    '''
+
+    temp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp, 'wb') as f:
+        np.save(f, img)
+    os.replace(temp, path)
+
+
+
+def get_image(img):
+
+    ''' Get Image
+
+        Get image array from array or handle; handle decoded on first access to npy cache, then reopened memory-mapped
+        read only, such that downstream functions accept either
+
+    Args:
+        img (obj): image array or handle
+
+    Returns:
+        np.array: image array (np.memmap where handle)
+    '''
+
+    # pass through arrays
+    if not is_image_handle(img):
+        return img
+
+    path = os.path.join(get_image_dir(), img['npy_name'])
+
+
+    # decode source image file to npy cache on first access
+    if not os.path.isfile(path):
+        if img['file_path'] is None:
+            raise FileNotFoundError('stored image removed from cache: {}'.format(path))
+
+        write_npy(path, np.array( Image.open(img['file_path']) ))
+
+
+    # return memory-mapped image array
+    return np.load(path, mmap_mode = 'r')
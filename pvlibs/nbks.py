@@ -31,6 +31,9 @@ from . import general
 # filesystem navigation, system, regex
 import glob
 
+# timing
+import time
+
 # pandas dataframe
 import pandas as pd
 
@@ -315,6 +318,203 @@ def process_file_data(db, meas_type = None, params = {}):
     return db
 
 
+def process_slt_batch(db, params = {}):
+
+    ''' Batch Process Sinton Lifetime Measurement Data
+
+    Args:
+        db (list): database instance as list of imported sinton lifetime measurement nodes (dict)
+        params (dict): additional parameters for processing
+
+    Returns:
+        (list): database instance of successfully processed measurement nodes
+    '''
+
+    print('begin batch sinton lifetime processing \n')
+
+    # update each node with additional parameters
+    for node in db:
+        for key, value in params.items():
+            node[key] = value
+
+
+    # process all nodes together as padded trace matrices
+    results, failures = process_data.slt.slt_batch(nodes = db)
+
+
+    # iterate each node in database
+    for i in range(len(db)):
+        node = db[i]
+
+        # on process error
+        if i in failures.keys():
+            print('failed to process measurement: {} ({})'.format(node['file_name'], failures[i]))
+
+        # store all processed results in measurement node
+        else:
+            for key, value in results[i].items():
+                node[key] = value
+
+
+    print('\nbatch sinton lifetime processing complete')
+
+
+    # discard any nodes where processing failed
+    db = [ db[i] for i in range(len(db)) if i not in failures.keys() ]
+
+    print('\n{} measurements processed'.format(len(db)))
+
+    return db
+
+
+def process_mlt_batch(db, params = {}, workers = None, warm = None, order = None):
+
+    ''' Batch Fit Lifetime Model to Measurement Data
+
+    Args:
+        db (list): database instance as list of processed sinton lifetime measurement nodes (dict)
+        params (dict): additional parameters for processing
+        workers (int): number of worker processes, default cpu count
+        warm (str): optional warm start across device states by device_id, 'previous' or 'median'
+        order (list): device_state values in process order for warm start, default database order
+
+    Returns:
+        (list): database instance of successfully fit measurement nodes
+    '''
+
+    print('begin batch lifetime model fitting \n')
+
+    # update each node with additional parameters
+    for node in db:
+        for key, value in params.items():
+            node[key] = value
+
+
+    # fit lifetime model to all nodes over process pool, optionally warm start across device states
+    if warm is not None:
+        results, failures = process_data.mlt.mlt_warm_batch(nodes = db, warm = warm, order = order, workers = workers)
+    else:
+        results, failures = process_data.mlt.mlt_batch(nodes = db, workers = workers)
+
+
+    # iterate each node in database
+    for i in range(len(db)):
+        node = db[i]
+
+        # on fit error
+        if i in failures.keys():
+            print('failed to process measurement: {} ({})'.format(node['file_name'], failures[i]))
+
+        # store all fit results in measurement node
+        else:
+            for key, value in results[i].items():
+                node[key] = value
+
+
+    print('\nbatch lifetime model fitting complete')
+
+
+    # discard any nodes where fit failed
+    db = [ db[i] for i in range(len(db)) if i not in failures.keys() ]
+
+    print('\n{} measurements processed'.format(len(db)))
+
+    return db
+
+
+
+def process_iv_fit_batch(db, params = {}, workers = None):
+
+    ''' Batch Fit Diode Model to Current-Voltage Measurement Data
+
+    Args:
+        db (list): database instance as list of imported current-voltage measurement nodes (dict)
+        params (dict): additional parameters for processing, e.g. 'fit-iv', 'fit-iv-curves'
+        workers (int): number of worker processes, default cpu count
+
+    Returns:
+        (list): database instance of successfully fit measurement nodes
+    '''
+
+    print('begin batch diode model fitting \n')
+
+    # update each node with additional parameters
+    for node in db:
+        for key, value in params.items():
+            node[key] = value
+
+
+    # fit diode model to all nodes over process pool
+    results, failures = process_data.iv.iv_fit_batch(nodes = db, workers = workers)
+
+
+    # iterate each node in database
+    for i in range(len(db)):
+        node = db[i]
+
+        # on fit error
+        if i in failures.keys():
+            print('failed to process measurement: {} ({})'.format(node['file_name'], failures[i]))
+
+        # store all fit results in measurement node
+        else:
+            for key, value in results[i].items():
+                node[key] = value
+
+
+    print('\nbatch diode model fitting complete')
+
+
+    # discard any nodes where fit failed
+    db = [ db[i] for i in range(len(db)) if i not in failures.keys() ]
+
+    print('\n{} measurements processed'.format(len(db)))
+
+    return db
+
+
+
+def bench_iv_fit(db, params = {}, workers = None):
+
+    ''' Benchmark Diode Model Fitting
+
+        Time diode model fit of current-voltage measurement data by scalar reference, vectorised in single process,
+        and vectorised over process pool; report agreement of fit residual with scalar reference
+
+    Args:
+        db (list): database instance as list of imported current-voltage measurement nodes (dict)
+        params (dict): additional parameters for processing, e.g. 'fit-iv', 'fit-iv-curves'
+        workers (int): number of worker processes, default cpu count
+
+    Returns:
+        (dict): run time [s] of each fit mode
+    '''
+
+    # update each node with additional parameters
+    nodes = [ {**node, **params} for node in db ]
+
+    # time each fit mode
+    times = {}; fits = {}
+    for mode, kwargs in [('scalar', {'workers': 1, 'vector': False}), ('vector', {'workers': 1}),
+                         ('pool', {'workers': workers})]:
+        start = time.time()
+        fits[mode], failures = process_data.iv.iv_fit_batch(nodes = nodes, **kwargs)
+        times[mode] = time.time() - start
+
+
+    # relative difference of fit residual to scalar reference
+    keys = [ k for k in fits['scalar'][0].keys() if k.endswith('_rmse') ] if fits['scalar'][0] else []
+    diff = [ abs(v[k] / r[k] - 1) for r, v in zip(fits['scalar'], fits['vector']) if r and v for k in keys ]
+
+    print('{} measurements, curves: {}'.format(len(nodes), ', '.join(keys)))
+    for mode in times.keys():
+        print('{}: {:.2f} s ({:.1f}x)'.format(mode, times[mode], times['scalar'] / times[mode]))
+    print('max relative rmse difference to scalar reference: {:.1e}'.format(np.nanmax(diff) if diff else np.nan))
+
+    return times
+
+
+
 def plot_mlt_fit(db, params):
 
     ''' Plot Sinton Lifetime Model Fit
@@ -602,8 +802,10 @@ def norm_pl_exposure(db, ref_exp = None):
             node['norm_exposure'] = ref_exp
 
 
-            # normalise pl images by exposure
-            node['norm_img'] = ((node['raw_img'].astype(np.float64)  * ref_exp / node['exposure']))
+            # normalise pl images by exposure, stored under same name on repeated normalisation
+            node['norm_img'] = general.image.store_image(
+                general.image.get_image(node['raw_img']).astype(np.float64) * ref_exp / node['exposure'],
+                source = node['raw_img'], op = 'norm|{}'.format(ref_exp / node['exposure']))
 
 
         # on data import error
@@ -650,11 +852,11 @@ def save_norm_pl(db, file_name_head, params, trim = False, png = False):
         # flag use trimmed image
         if trim:
             # convert normalised image array to tif image
-            img = PIL.Image.fromarray(node['trim_img'].astype(np.uint16))
+            img = PIL.Image.fromarray(general.image.get_image(node['trim_img']).astype(np.uint16))
 
         else:
             # convert normalised image array to tif image
-            img = PIL.Image.fromarray(node['norm_img'].astype(np.uint16))
+            img = PIL.Image.fromarray(general.image.get_image(node['norm_img']).astype(np.uint16))
 
 
         # save tif image to file
@@ -690,20 +892,21 @@ def fix_pl(db, params, raw = False):
 
 
             if raw:
-                img = node['raw_img']
+                src = node['raw_img']
             else:
                 # get normalised image data
-                img = node['norm_img']
+                src = node['norm_img']
 
             # rotate (align) and zero (top left) images, crop to wafer area (remove background)
-            img = process_data.photoluminescence_image.rotate_zero_image(img,
+            img = process_data.photoluminescence_image.rotate_zero_image(src,
                 _angle_lim = params['angle_lim'],
                 _angle_step = params['angle_step'],
                 _edge = params['edge'],
             )
 
-            # store trimmed image
-            node['trim_img'] = img
+            # store trimmed image, spilled to image cache where lazy
+            node['trim_img'] = general.image.store_image(img, source = src,
+                op = 'trim|{}|{}|{}'.format(params['angle_lim'], params['angle_step'], params['edge']))
 
 
         # on data import error
@@ -748,10 +951,10 @@ def plot_ocpl(db, params):
     ax = []; ax.append(fig.add_subplot(121)); ax.append(fig.add_subplot(122))
 
 
-    ax[0].imshow(_node['raw_img'], cmap = 'magma')
+    ax[0].imshow(general.image.get_image(_node['raw_img']), cmap = 'magma')
     ax[0].set_xticks([]); ax[0].set_yticks([])
 
-    ax[1].imshow(_node['trim_img'], cmap = 'magma')
+    ax[1].imshow(general.image.get_image(_node['trim_img']), cmap = 'magma')
     ax[1].set_xticks([]); ax[1].set_yticks([])
 
 
@@ -788,10 +991,10 @@ def pl_hist_stats(db, params, trim = False):
 
             if trim:
                 # get trim image data
-                img = node['trim_img']
+                img = general.image.get_image(node['trim_img'])
             else:
                 # get normalised image data
-                img = node['norm_img']
+                img = general.image.get_image(node['norm_img'])
 
 
             if 'floor' in params.keys():
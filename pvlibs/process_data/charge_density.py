@@ -18,10 +18,19 @@ Todo:
 # data array handling
 import numpy as np
 
+# least recently used cache
+from functools import lru_cache
+
+# b-spline interpolation
+from scipy.interpolate import splrep, splev
+
 
 # model calculation functions
 from . import models
 
+# wafer property calculation functions
+from .wafer import calc_wafer_intrinsic, calc_wafer_equilibrium, get_wafer_state
+
 
 
 ''' Core Calculation Functions '''
@@ -33,85 +42,316 @@ def calc_wafer_nonequilibrium(_T, _N_D, _N_A, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n
         Calculate equilibrium parameters dependent on doping density and excess carrier densities; effective
         electron, hole carrier concentrations; iterate for convergence of effective intrinsic carrier density
 
+        Excess carrier densities and temperature dependent parameters may be passed as arrays, broadcast together
+        (e.g. temperature axis (T, 1) and charge density axis (dn, ) to (T, dn)), each element is iterated together and
+        masked from further iteration once converged; scalar inputs return scalar results
+
     Args:
-        _T (float): temperature [K]
+        _T (float | np.array): temperature [K]
         _N_D (float): donor doping concentration [ / cm^-3]
         _N_A (float): acceptor doping concentration [ / cm^-3]
-        _N_c_i (float): intrinsic conduction band density of states [ / cm^3]
-        _N_v_i (float): intrinsic valance band density of states [ / cm^3]
-        _E_c_i (float): intrinsic conduction band energy relative to intrinsic Fermi level [eV]
-        _E_v_i (float): intrinsic valance band energy relative to intrinsic Fermi level [eV]
-        _n_i (float): effective intrinsic carrier concentration [ / cm^-3]
-        _n_i_0 (float): equilibrium effective intrinsic carrier concentration [ / cm^-3]
-        _dn (float): excess electron concentration [ / cm^-3]
-        _dp (float): excess hole concentration [ / cm^-3]
+        _N_c_i (float | np.array): intrinsic conduction band density of states [ / cm^3]
+        _N_v_i (float | np.array): intrinsic valance band density of states [ / cm^3]
+        _E_c_i (float | np.array): intrinsic conduction band energy relative to intrinsic Fermi level [eV]
+        _E_v_i (float | np.array): intrinsic valance band energy relative to intrinsic Fermi level [eV]
+        _n_i (float | np.array): effective intrinsic carrier concentration [ / cm^-3]
+        _n_i_0 (float | np.array): equilibrium effective intrinsic carrier concentration [ / cm^-3]
+        _dn (float | np.array): excess electron concentration [ / cm^-3]
+        _dp (float | np.array): excess hole concentration [ / cm^-3]
 
     Returns:
-        n_0 (float): non-equilibrium total electron concentration [ / cm^-3]
-        p_0 (float): non-equilibrium total hole concentration [ / cm^-3]
-        n_i_eff (float): non-equilibrium effective intrinsic carrier concentration [ / cm^-3]
+        n_0 (float | np.array): non-equilibrium total electron concentration [ / cm^-3]
+        p_0 (float | np.array): non-equilibrium total hole concentration [ / cm^-3]
+        n_i_eff (float | np.array): non-equilibrium effective intrinsic carrier concentration [ / cm^-3]
     '''
 
-    # initial guess (intrinsic/equilibrium values), calculate electron/hole conc.
-    n_i_eff = _n_i_0
+    # temperature dependent parameters
+    temp = [_T, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n_i, _n_i_0]
+
+    # flag scalar input to return scalar results
+    scalar = all( np.ndim(v) == 0 for v in [_dn, _dp] + temp )
 
+    # broadcast excess electron, hole concentrations and temperature dependent parameters to common flat arrays
+    shape = np.broadcast(_dn, _dp, *temp).shape
+    dn, dp, T, E_c_i, E_v_i, N_c_i, N_v_i, n_i, n_i_0 = [ np.ravel(v).astype(np.float64) for v in
+        np.broadcast_arrays(_dn, _dp, *temp) ]
 
-    # default initial reference to ensure initial iteration
-    n_i_ref = 2 * n_i_eff
+
+    # initial guess (intrinsic/equilibrium values), calculate electron/hole conc.
+    n_i_eff = n_i_0.copy()
+
+    # mask of elements not yet converged, all elements require initial iteration
+    active = np.ones(dn.shape, dtype = bool)
 
     # set iteration params
     _iter = 0
     max_iter = 20
 
 
-    # iterate for convergence of n_i to within 0.01% variation
-    while (_iter <= max_iter) and ( abs((n_i_eff - n_i_ref) / n_i_ref) > 1e-4 ):
+    # iterate for convergence of n_i to within 0.01% variation, only over unconverged elements
+    while (_iter <= max_iter) and active.any():
 
         # incriment iterator
         _iter += 1
 
+        # get indicies of unconverged elements
+        j = np.flatnonzero(active)
+
         # update reference value for intrinsic carrier concentration convergence
-        n_i_ref = n_i_eff
+        n_i_ref = n_i_eff[j]
 
 
         # calculate equilibrium electron, hole concentration [ / cm^-3], zero excess charge density
-        n, p = models.calc_np(_N_D = _N_D, _N_A = _N_A, _dn = _dn, _dp = _dp, _n_i = n_i_eff)
+        n, p = models.calc_np(_N_D = _N_D, _N_A = _N_A, _dn = dn[j], _dp = dp[j], _n_i = n_i_ref)
 
 
         # calculate shift in conduction, valance band energy due to bandgap narrowing [eV]
-        dE_g, dE_c, dE_v = models.calc_dE_bgn(_N_D = _N_D, _N_A = _N_A, _n = n, _p = p, _T = _T)
+        dE_g, dE_c, dE_v = models.calc_dE_bgn(_N_D = _N_D, _N_A = _N_A, _n = n, _p = p, _T = T[j])
 
 
         # adjust intrinsic conduction, valance band energy due to bandgap narrowing
-        E_c = _E_c_i - dE_c
-        E_v = _E_v_i + dE_v
+        E_c = E_c_i[j] - dE_c
+        E_v = E_v_i[j] + dE_v
 
 
         # calculate electron, hole fermi energy level [eV]
-        E_f_n, E_f_p = models.calc_E_f(_E_c = E_c, _E_v = E_v, _n = n, _p = p, _T = _T, _N_c_i = _N_c_i,
-                                       _N_v_i = _N_v_i)
+        E_f_n, E_f_p = models.calc_E_f(_E_c = E_c, _E_v = E_v, _n = n, _p = p, _T = T[j], _N_c_i = N_c_i[j],
+                                       _N_v_i = N_v_i[j])
 
 
         # calculate bandgap narrowing correction factor [ ]
-        gamma_bgn = models.calc_gamma_bgn(_dE_c = dE_c, _dE_v = dE_v, _E_c_i = _E_c_i, _E_v_i = _E_v_i,
-            _E_f_n = E_f_n, _E_f_p = E_f_p, _T = _T)
+        gamma_bgn = models.calc_gamma_bgn(_dE_c = dE_c, _dE_v = dE_v, _E_c_i = E_c_i[j], _E_v_i = E_v_i[j],
+            _E_f_n = E_f_n, _E_f_p = E_f_p, _T = T[j])
 
 
         # calculate degeneracy factor [ ]
-        gamma_degen = models.calc_gamma_degen(_E_c = E_c, _E_v = E_v, _E_f_n = E_f_n, _E_f_p = E_f_p, _T = _T)
+        gamma_degen = models.calc_gamma_degen(_E_c = E_c, _E_v = E_v, _E_f_n = E_f_n, _E_f_p = E_f_p, _T = T[j])
 
 
-        # calculate non-equilibrium correction factor [ ]
-        gamma_noneq = models.calc_gamma_noneq(_E_f_n = E_f_n, _E_f_p = E_f_p, _T = _T)
+        # update effective intrinsic carrier concentration
+        n_i_eff[j] = ((n_i[j]**2) * gamma_bgn * gamma_degen)**0.5
 
 
-        # update effective intrinsic carrier concentration
-        n_i_eff = ((_n_i**2) * gamma_bgn * gamma_degen)**0.5
+        # mask converged elements from further iteration
+        active[j] = np.abs((n_i_eff[j] - n_i_ref) / n_i_ref) > 1e-4
 
 
     # calculate non-equilibrium electron, hole concentration [ / cm^-3]
-    n, p = models.calc_np(_N_D = _N_D, _N_A = _N_A, _dn = _dn, _dp = _dp, _n_i = n_i_eff)
+    n, p = models.calc_np(_N_D = _N_D, _N_A = _N_A, _dn = dn, _dp = dp, _n_i = n_i_eff)
+
+
+    # return scalar results for scalar input
+    if scalar:
+        return n[0], p[0], n_i_eff[0]
 
 
     # return calculated parameters
-    return n, p, n_i_eff
+    return n.reshape(shape), p.reshape(shape), n_i_eff.reshape(shape)
+
+
+
+''' Charge Density Dependent Lookup Tables '''
+
+# lookup table charge density range [log10( / cm^-3)] and number of grid points
+ND_TABLE_RANGE = (10., 19.)
+ND_TABLE_POINTS = 361
+
+
+
+@lru_cache(maxsize = 32)
+def calc_nd_dep_table(_T, _N_D, _N_A):
+
+    ''' Calculate Charge Density Dependent Lookup Table
+
+        Calculate non-equilibrium effective intrinsic carrier concentration, radiative and Auger recombination lifetime
+        over a dense log-spaced charge density grid for given wafer parameters; tables are cached process-wide by
+        (T, N_D, N_A) and evicted least recently used
+
+        Interpolated values agree with direct calculation within 1e-5 relative for n_i_eff, and for tau_rad, tau_aug
+        of n-type wafers; for p-type wafers tau_rad, tau_aug agree within ~3e-4 relative, limited by steps of that
+        size in the direct calculation itself at low injection (not reduced by a denser grid)
+
+    Args:
+        _T (float): temperature [K]
+        _N_D (float): donor doping concentration [ / cm^-3]
+        _N_A (float): acceptor doping concentration [ / cm^-3]
+
+    Returns:
+        table (dict): intrinsic, equilibrium parameters and log10 of tabulated charge density dependent values
+
+            log_dn (np.array): log10 excess charge carrier density grid [log10( / cm^-3)]
+            n_i_eff (tuple): b-spline of log10 effective non-equilibrium intrinsic carrier densities
+            tau_rad (tuple): b-spline of log10 radiative recombination lifetime
+            tau_aug (tuple): b-spline of log10 auger recombination lifetime
+    '''
+
+    # get memoised intrinsic and equilibrium wafer parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = _T, _N_D = _N_D, _N_A = _N_A)
+
+    # store wafer parameters for direct calculation outside tabulated range
+    table = {'T': _T, 'N_D': _N_D, 'N_A': _N_A, 'N_c_i': N_c_i, 'N_v_i': N_v_i, 'E_c_i': E_c_i, 'E_v_i': E_v_i,
+        'n_i': n_i, 'n_0': n_0, 'p_0': p_0, 'n_i_0': n_i_0}
+
+
+    # define dense log-spaced charge density grid
+    log_dn = np.linspace(ND_TABLE_RANGE[0], ND_TABLE_RANGE[1], ND_TABLE_POINTS)
+
+    # calculate charge density dependent values over grid
+    n_i_eff, tau_rad, tau_aug = calc_nd_dep(_dn = 10**log_dn, _table = table)
+
+
+    # fit cubic b-spline to log values for log-space interpolation, protect shared cached arrays from modification
+    log_dn.setflags(write = False)
+    table['log_dn'] = log_dn
+
+    for key, value in [('n_i_eff', n_i_eff), ('tau_rad', tau_rad), ('tau_aug', tau_aug)]:
+
+        # flag invalid table where calculation fails over grid
+        if not np.all(np.isfinite(value) & (value > 0.)):
+            table['valid'] = False
+            return table
+
+        t, c, k = splrep(log_dn, np.log10(value), k = 3, s = 0)
+        t.setflags(write = False); c.setflags(write = False)
+        table[key] = (t, c, k)
+
+    table['valid'] = True
+
+
+    # return calculated lookup table
+    return table
+
+
+
+def calc_nd_dep(_dn, _table):
+
+    ''' Calculate Charge Density Dependent Values
+
+        Directly calculate non-equilibrium effective intrinsic carrier concentration, radiative and Auger
+        recombination lifetime from intrinsic and equilibrium wafer parameters; assume equal excess electron, hole
+        densities
+
+    Args:
+        _dn (np.array): excess electron concentrations [ / cm^-3]
+        _table (dict): wafer intrinsic and equilibrium parameters
+
+    Returns:
+        n_i_eff (np.array): effective non-equilibrium intrinsic carrier densities [ / cm^3]
+        tau_rad (np.array): radiative recombination lifetime [ / s]
+        tau_aug (np.array): auger recombination lifetime [ / s]
+    '''
+
+    # calculate non-equilibrium values over full charge density range
+    n, p, n_i_eff = calc_wafer_nonequilibrium(_T = _table['T'], _N_D = _table['N_D'], _N_A = _table['N_A'],
+        _E_c_i = _table['E_c_i'], _E_v_i = _table['E_v_i'], _N_c_i = _table['N_c_i'], _N_v_i = _table['N_v_i'],
+        _n_i = _table['n_i'], _n_i_0 = _table['n_i_0'], _dn = _dn, _dp = _dn)
+
+
+    # calculate radiative recombination lifetime
+    tau_rad = models.calc_tau_rad(_dn = _dn, _n = n, _p = p, _n_i_eff = n_i_eff, _T = _table['T'])
+
+    # calculate auger recombination lifetime
+    tau_aug = models.calc_tau_aug(_dn = _dn, _n = n, _p = p, _n_0 = _table['n_0'], _p_0 = _table['p_0'],
+        _n_i_eff = n_i_eff, _T = _table['T'])
+
+
+    # return calculated values
+    return n_i_eff, tau_rad, tau_aug
+
+
+
+def get_nd_dep_cached(_dn, _T, _N_D, _N_A):
+
+    ''' Get Charge Density Dependent Values from Lookup Table
+
+        Interpolate non-equilibrium effective intrinsic carrier concentration, radiative and Auger recombination
+        lifetime in log space (cubic b-spline) from cached lookup table; values outside tabulated range, or for
+        wafer parameters without valid table, calculated directly; accuracy as calc_nd_dep_table
+
+    Args:
+        _dn (np.array): excess electron concentrations [ / cm^-3]
+        _T (float): temperature [K]
+        _N_D (float): donor doping concentration [ / cm^-3]
+        _N_A (float): acceptor doping concentration [ / cm^-3]
+
+    Returns:
+        n_i_eff (np.array): effective non-equilibrium intrinsic carrier densities [ / cm^3]
+        tau_rad (np.array): radiative recombination lifetime [ / s]
+        tau_aug (np.array): auger recombination lifetime [ / s]
+    '''
+
+    # get lookup table for wafer parameters, round key to merge equivalent floating point values
+    table = calc_nd_dep_table(_T = float('{:.6g}'.format(_T)), _N_D = float('{:.6g}'.format(_N_D)),
+                              _N_A = float('{:.6g}'.format(_N_A)))
+
+
+    # cast charge density to array
+    dn = np.asarray(_dn, dtype = np.float64)
+
+    # directly calculate all values without valid table
+    if not table['valid']:
+        return calc_nd_dep(_dn = dn, _table = table)
+
+
+    # log-space cubic interpolation of tabulated values
+    log_dn = np.log10(dn)
+
+    n_i_eff = 10**splev(log_dn, table['n_i_eff'], ext = 3)
+    tau_rad = 10**splev(log_dn, table['tau_rad'], ext = 3)
+    tau_aug = 10**splev(log_dn, table['tau_aug'], ext = 3)
+
+
+    # directly calculate any values outside tabulated charge density range
+    j = np.where( (log_dn < table['log_dn'][0]) | (log_dn > table['log_dn'][-1]) )
+    if len(j[0]) > 0:
+        n_i_eff[j], tau_rad[j], tau_aug[j] = calc_nd_dep(_dn = dn[j], _table = table)
+
+
+    # return interpolated values
+    return n_i_eff, tau_rad, tau_aug
+
+
+
+def get_nd_dep_sweep(_dn, _T, _N_D, _N_A):
+
+    ''' Get Charge Density Dependent Values over Temperature Sweep
+
+        Calculate intrinsic, equilibrium and charge density dependent values for all temperatures of a wafer in a
+        single broadcast calculation, without building lookup table per temperature; each temperature may use a
+        common charge density range or its own (equal length) charge density range
+
+    Args:
+        _dn (np.array): excess electron concentrations [ / cm^-3], shape (dn, ) or (T, dn)
+        _T (np.array): temperatures [K], shape (T, )
+        _N_D (float): donor doping concentration [ / cm^-3]
+        _N_A (float): acceptor doping concentration [ / cm^-3]
+
+    Returns:
+        n_i_eff (np.array): effective non-equilibrium intrinsic carrier densities [ / cm^3], shape (T, dn)
+        tau_rad (np.array): radiative recombination lifetime [ / s], shape (T, dn)
+        tau_aug (np.array): auger recombination lifetime [ / s], shape (T, dn)
+    '''
+
+    # cast temperature to column, charge density to row or matrix for (T, dn) broadcast
+    T = np.asarray(_T, dtype = np.float64).reshape(-1, 1)
+    dn = np.asarray(_dn, dtype = np.float64)
+
+
+    # calculate effective intrinsic parameters over temperature axis
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = T)
+
+    # calculate effective equilibrium parameters over temperature axis
+    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = T, _N_D = _N_D, _N_A = _N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
+                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+
+    # store wafer parameters for each temperature
+    table = {'T': T, 'N_D': _N_D, 'N_A': _N_A, 'N_c_i': N_c_i, 'N_v_i': N_v_i, 'E_c_i': E_c_i, 'E_v_i': E_v_i,
+        'n_i': n_i, 'n_0': n_0, 'p_0': p_0, 'n_i_0': n_i_0}
+
+
+    # calculate charge density dependent values over (T, dn)
+    n_i_eff, tau_rad, tau_aug = calc_nd_dep(_dn = dn, _table = table)
+
+
+    # return calculated values
+    return n_i_eff, tau_rad, tau_aug
@@ -15,19 +15,32 @@ Todo:
 
 ''' Imports '''
 
+# cpu count
+import os
+
 # data array handling
 import numpy as np
 
+# parallel batch processing
+from concurrent.futures import ProcessPoolExecutor
+
 # simple linear regression
 from scipy.stats import linregress
 
 # b-spline interpolation
 from scipy.interpolate import splev, splrep
 
+# nonlinear least-squares optimisation
+from scipy import optimize
+
 
 # database search functions
 from .. import database
 
+# diode equivalent circuit models
+from .models.diode import calc_I_sd, calc_dI_sd, calc_I_dd, calc_dI_dd
+from .models.general import calc_V_T
+
 
 
 ''' Core Calculation Functions '''
@@ -92,7 +105,7 @@ def calc_performance(_data, _params):
 
     # rough maximum power point
     k = np.where(P == P.max())
-    Vj = V[j][k]
+    Vj = V[j][k][0]
 
     # b-pline fit around maximum power point (rel. power)
     k = np.where( (V[j] > Vj-0.1) & (V[j] < Vj+0.1) )
@@ -196,7 +209,8 @@ def calc_series_resistance(_full_data, _half_data, _params):
 
     ''' Calculate Series Resistance
 
-        Calculate series resistance from 1 sun and half sun current-voltage responses
+        Calculate series resistance from 1 sun and half sun current-voltage responses; number of current offsets and
+        offset step (fraction of 1 sun Isc) optionally set by 'rs_offsets', 'rs_delta' device node parameters
 
     Args:
         _full_data (dict): 1 sun current-voltage measurement node data
@@ -207,88 +221,1017 @@ def calc_series_resistance(_full_data, _half_data, _params):
         dict: calculated derivative data
     '''
 
-    # given two points ([x1, x2], [y1, y2]) and y value, return x at y
-    def get_y(p1, p2, y):
-        m = (p2[1] - p1[1]) / (p2[0] - p1[0])
-        b = p2[1] - (m * p2[0])
-        return (y - b) / m
+    # calculate series resistance of single curve pair
+    return calc_series_resistance_batch(_full_datas = [_full_data], _half_datas = [_half_data],
+        _params = [_params])[0]
 
 
-    # given two points ([x1, x2], [y1, y2]) and x value, return y at x
-    def get_x(p1, p2, x):
-        m = (p2[1] - p1[1]) / (p2[0] - p1[0])
-        b = p2[1] - (m * p2[0])
-        return m * x + b
 
+''' Batch Calculation Functions '''
 
-    calc_params = {}
+def stack_curves(_datas):
 
+    ''' Stack Current-Voltage Curves
 
-    V_f = _full_data['voltage']
-    I_f = _full_data['current']
+        Stack ragged current-voltage curves into nan padded (curves, points) matrices; each curve sorted on voltage
+        (start low) and current adjusted for positive in reverse bias
 
-    # sort data on voltage (start low)
-    j = np.argsort(V_f)
-    V_f = V_f[j]
-    I_f = I_f[j]
+    Args:
+        _datas (list): current-voltage measurement node data (dict) with voltage, current arrays
 
-    # adjust current for positive in reverse bias
-    if I_f[0] < 0:
-        I_f = -I_f
+    Returns:
+        V (np.array): voltage [V], shape (curves, points)
+        I (np.array): current [A], shape (curves, points)
+        mask (np.array): valid curve points
+    '''
 
+    # validity mask of padded curve matrices
+    length = np.array([ len(d['voltage']) for d in _datas ])
+    mask = np.arange(length.max())[None, :] < length[:, None]
 
-    V_h = _half_data['voltage']
-    I_h = _half_data['current']
+    # stack curves into nan padded matrices
+    V = np.full(mask.shape, np.nan)
+    I = np.full(mask.shape, np.nan)
+    V[mask] = np.concatenate([ d['voltage'] for d in _datas ])
+    I[mask] = np.concatenate([ d['current'] for d in _datas ])
 
-    # sort data on voltage (start low)
-    j = np.argsort(V_h)
-    V_h = V_h[j]
-    I_h = I_h[j]
+
+    # sort each curve on voltage (start low), padding last
+    j = np.argsort(V, axis = 1)
+    V = np.take_along_axis(V, j, axis = 1)
+    I = np.take_along_axis(I, j, axis = 1)
 
     # adjust current for positive in reverse bias
-    if I_h[0] < 0:
-        I_h = -I_h
+    I *= np.where(I[:, :1] < 0, -1., 1.)
+
+
+    # return stacked curves
+    return V, I, mask
+
+
+
+def fit_poly_masked(_x, _y, _mask, _deg):
+
+    ''' Fit Polynomial to Masked Rows
+
+        Least-squares polynomial fit to masked points of each row, solved together from batched normal equations
+
+    Args:
+        _x (np.array): independent values, shape (rows, points)
+        _y (np.array): dependent values, shape (rows, points)
+        _mask (np.array): points included in fit of each row
+        _deg (int): polynomial degree
+
+    Returns:
+        np.array: polynomial coefficients (lowest order first), shape (rows, _deg + 1); nan where underdetermined
+    '''
+
+    # zero excluded points, powers of independent values
+    w = _mask.astype(np.float64)
+    x = np.where(_mask, _x, 0.)
+    y = np.where(_mask, _y, 0.)
+    X = x[:, :, None]**np.arange(_deg + 1)[None, None, :]
+
 
+    # batched normal equations
+    A = np.einsum('rpi,rp,rpj->rij', X, w, X)
+    b = np.einsum('rpi,rp,rp->ri', X, w, y)
+
+    # solve rows with sufficient points, nan otherwise
+    c = np.full(b.shape, np.nan)
+    ok = w.sum(axis = 1) > _deg
+    if ok.any():
+        c[ok] = np.linalg.solve(A[ok], b[ok][:, :, None])[:, :, 0]
+
+
+    # return polynomial coefficients
+    return c
+
+
+
+def calc_performance_arrays(_V, _I, _mask, _A):
+
+    ''' Calculate Performance of Curve Stack
+
+        Calculate device performance from stack of sorted 1 sun current-voltage curves; Isc, Voc by linear
+        regression as calc_performance, maximum power point by local cubic fit of power and current about rough
+        maximum power point
+
+    Args:
+        _V (np.array): voltage [V], shape (curves, points), sorted
+        _I (np.array): current [A], shape (curves, points), positive in reverse bias
+        _mask (np.array): valid curve points
+        _A (np.array): device area [cm^2], shape (curves, )
+
+    Returns:
+        dict: calculated performance arrays, shape (curves, )
+    '''
 
     # calculate Isc from linear regression about -0.2 < V < 0.2
-    j = np.where( (V_f > -0.2) & (V_f < 0.2) )
-    slope, icept, r_value, p_value, std_err = linregress(V_f[j], I_f[j])
-    Isc_f = icept
+    Isc = fit_poly_masked(_V, _I, _mask & (_V > -0.2) & (_V < 0.2), 1)[:, 0]
+
+    # calculate Voc from linear regression about -3 <= I <= 4
+    Voc = fit_poly_masked(_I, _V, _mask & (_I >= -3) & (_I <= 4), 1)[:, 0]
+
+
+    # power in forward bias region, rough maximum power point
+    fwd = _mask & (_V < Voc[:, None]) & (_V > 0.)
+    P = np.where(fwd, _I * _V, -np.inf)
+    Vj = _V[np.arange(len(P)), np.argmax(P, axis = 1)][:, None]
+
+    # local cubic fit of power and current about rough maximum power point, centred and scaled voltage
+    h = 0.05
+    x = (_V - Vj) / h
+    k = fwd & (x > -1.) & (x < 0.5)
+    c_P = fit_poly_masked(x, _I * _V, k, 3)
+    c_I = fit_poly_masked(x, _I, k, 3)
+
+
+    # stationary points of local power, select maximum (negative curvature) nearest rough maximum power point
+    a, b, c = 3 * c_P[:, 3], 2 * c_P[:, 2], c_P[:, 1]
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        d = np.sqrt(b**2 - 4 * a * c)
+        r = np.stack([ (-b + d) / (2 * a), (-b - d) / (2 * a) ], axis = 1)
+        r[(6 * c_P[:, 3:] * r + 2 * c_P[:, 2:3]) >= 0.] = np.nan
+        i = np.argmin(np.where(np.isnan(r), np.inf, np.abs(r)), axis = 1)
+        xm = r[np.arange(len(r)), i]
+
+        # quadratic vertex where cubic term negligible or no maximum
+        xm = np.where(np.isfinite(xm), xm, -c / b)
+
+    # maximum power point voltage, current and power
+    Vmpp = Vj[:, 0] + h * xm
+    Impp = np.polynomial.polynomial.polyval(xm, c_I.T, tensor = False)
+    Pmpp = Vmpp * Impp
+
+
+    # calculate fill factor, solar conversion efficiency
+    FF = Pmpp / (Isc * Voc)
+    Eta = (Isc * Voc * FF) / _A
+
+
+    # return calculated performance
+    return {'area': _A, 'isc': Isc, 'voc': Voc, 'pmpp': Pmpp, 'impp': Impp, 'vmpp': Vmpp, 'ff': FF, 'eta': Eta}
+
+
+
+def calc_performance_batch(_datas, _params):
+
+    ''' Calculate Performance of Batch
+
+        Calculate device performance from batch of 1 sun current-voltage measurements together; ragged curves stacked
+        as nan padded matrices
+
+    Args:
+        _datas (list): 1 sun current-voltage measurement node data (dict)
+        _params (list): required device node parameters (dict) for each measurement
+
+    Returns:
+        list: calculated derivative data (dict) for each measurement, as calc_performance
+    '''
+
+    # stack curves, unpack device area
+    V, I, mask = stack_curves(_datas)
+    A = np.array([ p['wafer_area'] for p in _params ], dtype = np.float64)
+
+    # calculate performance of curve stack
+    perf = calc_performance_arrays(_V = V, _I = I, _mask = mask, _A = A)
+
+
+    # return calculated performance per measurement
+    return [ { k: v[i] for k, v in perf.items() } for i in range(len(_datas)) ]
+
+
+
+def calc_crossing_voltage(_V, _I, _mask, _I_):
+
+    ''' Calculate Crossing Voltage
+
+        Calculate voltage at each target current by linear interpolation across last point above target; crossing
+        points of all curves and targets found together by binary search of suffix maximum current, curves flattened
+        with row offset
+
+    Args:
+        _V (np.array): voltage [V], shape (curves, points), sorted
+        _I (np.array): current [A], shape (curves, points), positive in reverse bias
+        _mask (np.array): valid curve points
+        _I_ (np.array): target current [A], shape (curves, targets)
+
+    Returns:
+        np.array: voltage at target current [V], shape (curves, targets); nan where no crossing
+    '''
+
+    n, m = _I.shape
+    length = _mask.sum(axis = 1)
+
+    # suffix maximum current, non-increasing; last point above target same as for raw current
+    I_min = np.min(np.where(_mask, _I, np.inf), axis = 1)
+    M = np.where(_mask, _I, (I_min - 1.)[:, None])
+    M = np.maximum.accumulate(M[:, ::-1], axis = 1)[:, ::-1]
+
+    # flatten non-decreasing negative suffix maximum of all curves with row offset
+    span = np.max(M[:, 0] - M[:, -1]) + 2.
+    offset = np.arange(n)[:, None] * span
+    key = (offset - (M - M[:, :1])).ravel()
+
+
+    # binary search count of points above target current, last point above target
+    t = offset - (_I_ - M[:, :1])
+    j = np.searchsorted(key, t.ravel(), side = 'left').reshape(t.shape) - np.arange(n)[:, None] * m - 1
+
+    # crossing valid within curve only
+    ok = (j >= 0) & (j + 1 < length[:, None])
+    j = np.clip(j, 0, m - 2)
+    r = np.arange(n)[:, None]
+
+
+    # linear interpolation of voltage at target current between crossing points
+    V1, V2, I1, I2 = _V[r, j], _V[r, j + 1], _I[r, j], _I[r, j + 1]
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        V_ = V1 + (_I_ - I1) * (V2 - V1) / (I2 - I1)
+
+
+    # return voltage at target current
+    return np.where(ok, V_, np.nan)
+
+
+
+def calc_series_resistance_arrays(_V_f, _I_f, _mask_f, _V_h, _I_h, _mask_h, _offsets = 6, _delta = 0.05):
+
+    ''' Calculate Series Resistance of Curve Stack
+
+        Calculate series resistance from stacks of sorted 1 sun and half sun current-voltage curve pairs, average
+        over current offsets from Isc, ref (10.1002/pip.1216)
+
+    Args:
+        _V_f, _I_f, _mask_f (np.array): 1 sun voltage [V], current [A], valid points; shape (curves, points)
+        _V_h, _I_h, _mask_h (np.array): half sun voltage [V], current [A], valid points; shape (curves, points)
+        _offsets (int or np.array): number of current offsets, shape (curves, ) where per curve
+        _delta (float or np.array): current offset step as fraction of 1 sun Isc, shape (curves, ) where per curve
+
+    Returns:
+        np.array: series resistance [Ohm], shape (curves, )
+    '''
 
     # calculate Isc from linear regression about -0.2 < V < 0.2
-    j = np.where( (V_h > -0.2) & (V_h < 0.2) )
-    slope, icept, r_value, p_value, std_err = linregress(V_h[j], I_h[j])
-    Isc_h = icept
+    Isc_f = fit_poly_masked(_V_f, _I_f, _mask_f & (_V_f > -0.2) & (_V_f < 0.2), 1)[:, 0]
+    Isc_h = fit_poly_masked(_V_h, _I_h, _mask_h & (_V_h > -0.2) & (_V_h < 0.2), 1)[:, 0]
 
 
-    # set delta in I of 5% 1 sun Isc
-    dIsc = Isc_f * 0.05
-    Rs = []
+    # current offsets included per curve
+    offsets = np.broadcast_to(_offsets, Isc_f.shape)
+    k = np.arange(1, offsets.max() + 1)[None, :]
+    inc = k <= offsets[:, None]
 
-    # calculate series resistance using 1 sun and 1/2 sun IV method, average of 6 points, ref (10.1002/pip.1216)
-    for i in range(1,7):
+    # set I values from increasing delta I relative to Isc, delta in I as fraction of 1 sun Isc
+    dI = (Isc_f * _delta)[:, None] * k
+    I_f_ = Isc_f[:, None] - dI
+    I_h_ = Isc_h[:, None] - dI
 
-        # set I value from increasing delta I relative to Isc
-        I_f_ = Isc_f - dIsc * i
-        I_h_ = Isc_h - dIsc * i
+    # get V at each I by linear interpolation
+    V_f_ = calc_crossing_voltage(_V_f, _I_f, _mask_f, I_f_)
+    V_h_ = calc_crossing_voltage(_V_h, _I_h, _mask_h, I_h_)
 
-        # get V at each I using 2 point gradient
-        j = np.where(I_f > I_f_)[0][-1]
-        V_f_ = get_y([V_f[j], I_f[j]], [V_f[j+1], I_f[j+1]], I_f_)
 
-        j = np.where(I_h > I_h_)[0][-1]
-        V_h_ = get_y([V_h[j], I_h[j]], [V_h[j+1], I_h[j+1]], I_h_)
+    # calculate series resistance from slope, average over points
+    Rs = np.sum( np.where(inc, (V_h_ - V_f_) / (I_f_ - I_h_), 0.), axis = 1 ) / offsets
 
 
-        # calculate series resistance from slope
-        Rs.append( (V_h_ - V_f_) / (I_f_ - I_h_) )
+    # return series resistance
+    return Rs
 
-    # calculate series resistance from average over points
-    calc_params['rs'] = np.mean(Rs)
 
 
-    # return calculation results
-    return calc_params
+def calc_series_resistance_batch(_full_datas, _half_datas, _params):
+
+    ''' Calculate Series Resistance of Batch
+
+        Calculate series resistance from batch of 1 sun and half sun current-voltage measurement pairs together;
+        number of current offsets and offset step optionally set by 'rs_offsets', 'rs_delta' device node parameters
+
+    Args:
+        _full_datas (list): 1 sun current-voltage measurement node data (dict)
+        _half_datas (list): half sun current-voltage measurement node data (dict)
+        _params (list): required device node parameters (dict) for each measurement pair
+
+    Returns:
+        list: calculated derivative data (dict) for each measurement pair, as calc_series_resistance
+    '''
+
+    # stack full and half sun curves
+    V_f, I_f, mask_f = stack_curves(_full_datas)
+    V_h, I_h, mask_h = stack_curves(_half_datas)
+
+    # unpack current offset settings, default 6 offsets of 5 % 1 sun Isc
+    offsets = np.array([ p['rs_offsets'] if 'rs_offsets' in p.keys() else 6 for p in _params ], dtype = np.int64)
+    delta = np.array([ p['rs_delta'] if 'rs_delta' in p.keys() else 0.05 for p in _params ], dtype = np.float64)
+
+    # calculate series resistance of curve stack
+    Rs = calc_series_resistance_arrays(V_f, I_f, mask_f, V_h, I_h, mask_h, _offsets = offsets, _delta = delta)
+
+
+    # return calculated series resistance per measurement pair
+    return [ {'rs': Rs[i]} for i in range(len(_params)) ]
+
+
+
+''' Double Diode Model Functions '''
+
+def calc_dd_state(_Rs, _Isc, _Voc, _Impp, _Vmpp, _Vt, _K, _a1, _a2):
+
+    ''' Calculate Double Diode State
+
+        Calculate double diode model parameters at given series resistance from short circuit, open circuit and
+        maximum power points, second diode saturation current as fraction of first; updated series resistance from
+        zero power slope at maximum power point, ref (10.1016/j.solener.2018.01.047)
+
+    Args:
+        _Rs (np.array): series resistance [Ohm]
+        _Isc (np.array): short circuit current [A]
+        _Voc (np.array): open circuit voltage [V]
+        _Impp (np.array): maximum power point current [A]
+        _Vmpp (np.array): maximum power point voltage [V]
+        _Vt (np.array): thermal voltage [V]
+        _K (np.array): ratio of second to first diode saturation current
+        _a1 (float): first diode ideality factor
+        _a2 (float): second diode ideality factor
+
+    Returns:
+        dict: double diode parameters (Is1, Is2, Iph, Rsh) and updated series resistance (Rs_)
+    '''
+
+    # diode rectification at open circuit
+    Xoc1 = np.exp(_Voc / (_a1 * _Vt))
+    Xoc2 = np.exp(_Voc / (_a2 * _Vt))
+
+    # diode rectification at maximum power point
+    Xmpp1 = np.exp((_Vmpp + _Rs * _Impp) / (_a1 * _Vt))
+    Xmpp2 = np.exp((_Vmpp + _Rs * _Impp) / (_a2 * _Vt))
+
+
+    # first and second diode saturation current
+    D = _Voc * (Xmpp1 + _K * Xmpp2) - _Vmpp * (Xoc1 + _K * Xoc2)
+    Is1 = (_Voc * (_Isc - _Impp) - _Vmpp * _Isc) / D
+    Is2 = _K * Is1
+
+    # generation current under illumination
+    Iph = (_Voc * _Impp + Is1 * D) / (_Voc - _Vmpp)
+
+    # shunt conductance, shunt resistance
+    Gsh = (Iph - _Impp - Is1 * (Xmpp1 - 1) - Is2 * (Xmpp2 - 1)) / (_Vmpp + _Impp * _Rs)
+    Rsh = 1 / Gsh
+
+
+    # updated series resistance from zero power slope at maximum power point
+    Rs_ = (_Vmpp / _Impp) - 1 / ((Is1 / (_a1 * _Vt)) * Xmpp1 + (Is2 / (_a2 * _Vt)) * Xmpp2 + Gsh)
+
+
+    # return double diode state
+    return {'Is1': Is1, 'Is2': Is2, 'Iph': Iph, 'Rsh': Rsh, 'Rs_': Rs_}
+
+
+
+def calc_double_diode(_Isc, _Voc, _Impp, _Vmpp, _T = 298.15, _a1 = 1.26, _a2 = 2.84, _tol = 1e-12, _max_iter = 100):
+
+    ''' Calculate Double Diode Parameters
+
+        Extract double diode model parameters of batch of devices from performance parameters; self-consistent series
+        resistance found by bracketed false position (Illinois) on (0, (Voc - Vmpp) / Impp), converged devices masked
+        from further iteration, ref (10.1016/j.solener.2018.01.047)
+
+    Args:
+        _Isc (np.array): short circuit current [A], shape (devices, )
+        _Voc (np.array): open circuit voltage [V]
+        _Impp (np.array): maximum power point current [A]
+        _Vmpp (np.array): maximum power point voltage [V]
+        _T (float or np.array): device temperature [K]
+        _a1 (float): first diode ideality factor
+        _a2 (float): second diode ideality factor
+        _tol (float): series resistance convergence tolerance [Ohm]
+        _max_iter (int): maximum iterations
+
+    Returns:
+        dict: series resistance (rs_dd), shunt resistance (rp_dd), diode saturation currents (is1, is2), generation
+            current (iph) and solver iterations (dd_iter) per device; nan where not bracketed or not converged
+    '''
+
+    # broadcast performance parameters and temperature to devices
+    Isc, Voc, Impp, Vmpp, T = [ np.array(v, dtype = np.float64) for v in
+        np.broadcast_arrays(_Isc, _Voc, _Impp, _Vmpp, _T) ]
+    Isc, Voc, Impp, Vmpp, T = [ np.atleast_1d(v) for v in [Isc, Voc, Impp, Vmpp, T] ]
+
+    # thermal voltage, ratio of second to first diode saturation current
+    Vt = 1.38065e-23 * T / 1.602176e-19
+    K = (T**(2/5)) / 3.77
+
+    # residual of series resistance
+    def res(Rs, j):
+        return Rs - calc_dd_state(Rs, Isc[j], Voc[j], Impp[j], Vmpp[j], Vt[j], K[j], _a1, _a2)['Rs_']
+
+
+    # bracket series resistance, physical bound from slope about open circuit
+    with np.errstate(all = 'ignore'):
+        a = np.zeros(Isc.shape)
+        b = (Voc - Vmpp) / Impp
+        j = np.arange(len(Isc))
+        fa = res(a, j)
+        fb = res(b, j)
+
+    # devices with bracketed root, iteration count
+    Rs = np.full(Isc.shape, np.nan)
+    n = np.zeros(Isc.shape, dtype = np.int64)
+    act = np.where( (fa * fb <= 0.) & np.isfinite(fa) & np.isfinite(fb) )[0]
+    side = np.zeros(Isc.shape, dtype = np.int64)
+
+
+    # iterate false position on active devices until converged
+    for i in range(_max_iter):
+        if len(act) == 0:
+            break
+
+        with np.errstate(all = 'ignore'):
+
+            # false position estimate, bisection where estimate outside bracket
+            c = (a[act] * fb[act] - b[act] * fa[act]) / (fb[act] - fa[act])
+            mid = 0.5 * (a[act] + b[act])
+            c = np.where( np.isfinite(c) & (c > a[act]) & (c < b[act]), c, mid )
+            fc = res(c, act)
+        n[act] += 1
+
+        # replace bracket end of same sign, halve retained end residual on repeat side (Illinois)
+        lo = fa[act] * fc > 0.
+        hi = ~lo
+        a[act[lo]], fa[act[lo]] = c[lo], fc[lo]
+        b[act[hi]], fb[act[hi]] = c[hi], fc[hi]
+        fb[act[lo & (side[act] == -1)]] *= 0.5
+        fa[act[hi & (side[act] == 1)]] *= 0.5
+        side[act] = np.where(lo, -1, 1)
+
+        # store converged devices, mask from further iteration
+        done = (b[act] - a[act] < _tol) | (fc == 0.) | ~np.isfinite(fc)
+        Rs[act[done]] = np.where(np.isfinite(fc[done]), c[done], np.nan)
+        act = act[~done]
+
+
+    # calculate double diode parameters at converged series resistance
+    with np.errstate(all = 'ignore'):
+        dd = calc_dd_state(Rs, Isc, Voc, Impp, Vmpp, Vt, K, _a1, _a2)
+
+
+    # return double diode parameters
+    return {'rs_dd': Rs, 'rp_dd': dd['Rsh'], 'is1': dd['Is1'], 'is2': dd['Is2'], 'iph': dd['Iph'], 'dd_iter': n}
+
+
+
+def calc_double_diode_batch(_perfs, _params):
+
+    ''' Calculate Double Diode Parameters of Batch
+
+        Extract double diode model parameters from batch of calculated performance; device temperature [K] and diode
+        ideality factors optionally set by 'temperature', 'a1_dd', 'a2_dd' device node parameters
+
+    Args:
+        _perfs (list): calculated performance (dict) for each measurement, as calc_performance
+        _params (list): required device node parameters (dict) for each measurement
+
+    Returns:
+        list: calculated double diode parameters (dict) for each measurement, as calc_double_diode
+    '''
+
+    # unpack performance parameters, device temperature
+    Isc, Voc, Impp, Vmpp = [ np.array([ p[k] for p in _perfs ], dtype = np.float64)
+        for k in ['isc', 'voc', 'impp', 'vmpp'] ]
+    T = np.array([ p['temperature'] if 'temperature' in p.keys() else 298.15 for p in _params ], dtype = np.float64)
+
+    # group by diode ideality factors, solve each group together
+    a = [ (p['a1_dd'] if 'a1_dd' in p.keys() else 1.26, p['a2_dd'] if 'a2_dd' in p.keys() else 2.84)
+        for p in _params ]
+    results = [None] * len(_params)
+    for a1, a2 in set(a):
+        j = np.array([ i for i in range(len(a)) if a[i] == (a1, a2) ])
+        dd = calc_double_diode(Isc[j], Voc[j], Impp[j], Vmpp[j], _T = T[j], _a1 = a1, _a2 = a2)
+        for k, i in enumerate(j):
+            results[i] = { key: v[k] for key, v in dd.items() }
+
+
+    # return calculated double diode parameters per measurement
+    return results
+
+
+
+''' Diode Model Fitting Functions '''
+
+def unpack_diode_params(_x, _model, _n):
+
+    ''' Unpack Diode Model Parameters
+
+        Unpack diode model parameters from fit variables; single diode (I_ph, ln I_0, n, ln R_s, ln R_sh), double
+        diode (I_ph, ln I_01, ln I_02, ln R_s, ln R_sh) with fixed ideality factors
+
+    Args:
+        _x (np.array): fit variables, shape (curves, 5)
+        _model (str): diode model, 'single' or 'double'
+        _n (tuple): double diode ideality factors (n_1, n_2)
+
+    Returns:
+        dict: diode model parameters, shape (curves, )
+    '''
+
+    # single diode model parameters
+    if _model == 'single':
+        return {'I_ph': _x[:, 0], 'I_0': np.exp(_x[:, 1]), 'n': _x[:, 2], 'R_s': np.exp(_x[:, 3]),
+            'R_sh': np.exp(_x[:, 4])}
+
+    # double diode model parameters
+    return {'I_ph': _x[:, 0], 'I_01': np.exp(_x[:, 1]), 'I_02': np.exp(_x[:, 2]), 'R_s': np.exp(_x[:, 3]),
+        'R_sh': np.exp(_x[:, 4])}
+
+
+
+def calc_diode_residual(_x, _V, _I, _w, _T, _model, _n):
+
+    ''' Calculate Diode Model Residual
+
+        Calculate weighted residual of diode model current and analytic jacobian with respect to fit variables for
+        stack of curves; zero weight points (padding) excluded
+
+    Args:
+        _x (np.array): fit variables, shape (curves, 5)
+        _V (np.array): voltage [V], shape (curves, points)
+        _I (np.array): measured current [A], shape (curves, points), positive in reverse bias
+        _w (np.array): point weights, shape (curves, points)
+        _T (np.array): temperature [K], shape (curves, )
+        _model (str): diode model, 'single' or 'double'
+        _n (tuple): double diode ideality factors (n_1, n_2)
+
+    Returns:
+        r (np.array): weighted residual, shape (curves, points)
+        J (np.array): weighted residual jacobian, shape (curves, points, 5)
+    '''
+
+    # unpack diode model parameters as column vectors
+    p = unpack_diode_params(_x, _model, _n)
+    c = { k: v[:, None] for k, v in p.items() }
+    T = _T[:, None]
+
+    with np.errstate(all = 'ignore'):
+
+        # single diode current, jacobian scaled for log variables
+        if _model == 'single':
+            I = calc_I_sd(_V, c['I_ph'], c['I_0'], c['n'], c['R_s'], c['R_sh'], T)
+            dI = calc_dI_sd(_V, I, c['I_ph'], c['I_0'], c['n'], c['R_s'], c['R_sh'], T)
+            scale = np.stack([ np.ones_like(p['I_ph']), p['I_0'], np.ones_like(p['n']), p['R_s'], p['R_sh'] ], axis = 1)
+
+        # double diode current, jacobian scaled for log variables
+        else:
+            I = calc_I_dd(_V, c['I_ph'], c['I_01'], c['I_02'], _n[0], _n[1], c['R_s'], c['R_sh'], T)
+            dI = calc_dI_dd(_V, I, c['I_ph'], c['I_01'], c['I_02'], _n[0], _n[1], c['R_s'], c['R_sh'], T)
+            scale = np.stack([ np.ones_like(p['I_ph']), p['I_01'], p['I_02'], p['R_s'], p['R_sh'] ], axis = 1)
+
+        # weighted residual and jacobian, excluded points zero
+        k = _w > 0.
+        r = np.where(k, _w * (I - _I), 0.)
+        J = np.where(k[:, :, None], _w[:, :, None] * dI * scale[:, None, :], 0.)
+
+
+    # return residual and jacobian
+    return r, J
+
+
+
+def init_diode_params(_V, _I, _mask, _T, _model, _n, _dark):
+
+    ''' Initialise Diode Model Parameters
+
+        Estimate initial fit variables for stack of curves; photogenerated current from short circuit, shunt resistance
+        from slope about short circuit, saturation current from diode current at highest forward bias, series
+        resistance from slope at highest forward bias less junction contribution; light curves not measured past open
+        circuit, or without forward diode current at highest forward bias, rejected (nan)
+
+    Args:
+        _V (np.array): voltage [V], shape (curves, points), sorted
+        _I (np.array): current [A], shape (curves, points), positive in reverse bias
+        _mask (np.array): valid curve points
+        _T (np.array): temperature [K], shape (curves, )
+        _model (str): diode model, 'single' or 'double'
+        _n (tuple): double diode ideality factors (n_1, n_2)
+        _dark (bool): dark curves, no photogenerated current
+
+    Returns:
+        np.array: initial fit variables, shape (curves, 5), nan for rejected curves
+    '''
+
+    V_T = calc_V_T(_T)
+    a = (1.2 if _model == 'single' else _n[0]) * V_T
+
+    # photogenerated current and shunt resistance from linear regression about short circuit
+    c = fit_poly_masked(_V, _I, _mask & (_V > -0.2) & (_V < 0.2), 1)
+    I_ph = np.zeros(len(_V)) if _dark else c[:, 0]
+    with np.errstate(all = 'ignore'):
+        R_sh = np.clip(np.where(c[:, 1] < 0., -1 / c[:, 1], 1e4), 1e-2, 1e8)
+
+
+    # reference point and slope from linear regression within 50 mV of highest forward bias
+    V_m = np.max(np.where(_mask, _V, -np.inf), axis = 1)
+    d = fit_poly_masked(_I, _V, _mask & (_V >= V_m[:, None] - 0.05), 1)
+    with np.errstate(all = 'ignore'):
+        I_m = (V_m - d[:, 0]) / d[:, 1]
+
+    # diode current at reference point
+    I_d = I_ph - I_m
+
+    # reject light curves without forward bias point past open circuit, and any without forward diode current
+    reject = ~(I_d > 0.)
+    if not _dark:
+        reject |= ~np.any(_mask & (_I <= 0.), axis = 1)
+
+    # series resistance from slope less junction contribution, bound by fraction of slope
+    with np.errstate(all = 'ignore'):
+        R_s = np.clip(-d[:, 1] - a / I_d, -0.1 * d[:, 1], None)
+        R_s = np.where(np.isfinite(R_s) & (R_s > 0.), R_s, 1e-3)
+
+
+    # saturation currents from diode current at reference junction voltage
+    V_j = V_m + I_m * R_s
+    if _model == 'single':
+        x0 = [ I_ph, np.log(I_d) - V_j / a, np.full(len(_V), 1.2), np.log(R_s), np.log(R_sh) ]
+    else:
+        x0 = [ I_ph, np.log(0.5 * I_d) - V_j / (_n[0] * V_T), np.log(0.5 * I_d) - V_j / (_n[1] * V_T),
+            np.log(R_s), np.log(R_sh) ]
+
+
+    # no fit from rejected curves
+    x0 = np.stack(x0, axis = 1)
+    x0[reject] = np.nan
+
+
+    # return initial fit variables
+    return x0
+
+
+
+def get_diode_bounds(_model):
+
+    ''' Get Diode Model Fit Bounds
+
+        Bounds and maximum step per iteration of diode model fit variables; log variables bound to physical range,
+        steps limited to avoid overshoot into flat regions of log resistance
+
+    Args:
+        _model (str): diode model, 'single' or 'double'
+
+    Returns:
+        lb (np.array): fit variable lower bounds
+        ub (np.array): fit variable upper bounds
+        step (np.array): fit variable maximum step
+    '''
+
+    # photogenerated current, log saturation currents [A], log series, shunt resistance [Ohm]
+    lb = np.array([ -np.inf, np.log(1e-30), np.log(1e-30), np.log(1e-7), np.log(1e-3) ])
+    ub = np.array([ np.inf, np.log(1e-1), np.log(1e-1), np.log(1e2), np.log(1e8) ])
+    step = np.array([ np.inf, 2., 2., 2., 2. ])
+
+    # single diode ideality factor
+    if _model == 'single':
+        lb[2], ub[2], step[2] = 0.5, 10., 0.5
+
+
+    # return bounds and maximum step
+    return lb, ub, step
+
+
+
+def get_diode_pinned(_x, _model):
+
+    ''' Get Diode Model Fits Pinned at Bounds
+
+        Flag fits with ideality factor, saturation currents or shunt resistance at fit bounds; fit settled on bound
+        rather than minimum, typically from curves not constraining the diode (e.g. not measured past open circuit)
+
+    Args:
+        _x (np.array): fit variables, shape (curves, 5)
+        _model (str): diode model, 'single' or 'double'
+
+    Returns:
+        np.array: fits pinned at bounds (bool), shape (curves, )
+    '''
+
+    lb, ub = get_diode_bounds(_model)[:2]
+
+    # saturation current(s), ideality factor or saturation current, shunt resistance
+    k = [1, 2, 4]
+    tol = 1e-6 * np.maximum(np.abs(lb[k]), 1.)
+
+
+    # return fits pinned at lower or upper bound
+    return np.any((_x[:, k] <= lb[k] + tol) | (_x[:, k] >= ub[k] - tol), axis = 1)
+
+
+
+def fit_diode_arrays(_V, _I, _w, _T, _x0, _model = 'single', _n = (1., 2.), _fixed = None, _tol = 1e-10,
+                     _max_iter = 1000):
+
+    ''' Fit Diode Model to Curve Stack
+
+        Fit diode model to stack of curves together by vectorised Levenberg-Marquardt; damped normal equations of all
+        curves solved in batch, each curve accepts or rejects its own step, converged curves masked from further
+        iteration
+
+    Args:
+        _V (np.array): voltage [V], shape (curves, points), padding zero
+        _I (np.array): measured current [A], shape (curves, points), padding zero
+        _w (np.array): point weights, shape (curves, points), padding zero
+        _T (np.array): temperature [K], shape (curves, )
+        _x0 (np.array): initial fit variables, shape (curves, 5)
+        _model (str): diode model, 'single' or 'double'
+        _n (tuple): double diode ideality factors (n_1, n_2)
+        _fixed (list): fixed fit variables (bool), default none
+        _tol (float): relative cost and step convergence tolerance
+        _max_iter (int): maximum iterations
+
+    Returns:
+        x (np.array): fit variables, shape (curves, 5)
+        cost (np.array): final cost (half sum of squared weighted residual), shape (curves, )
+        n_iter (np.array): iterations per curve
+        conv (np.array): converged curves
+    '''
+
+    x = np.array(_x0, dtype = np.float64)
+    rows, m = x.shape
+
+    # fixed variables, bounds and maximum step
+    fixed = np.zeros(m, dtype = bool) if _fixed is None else np.array(_fixed, dtype = bool)
+    lb, ub, step_max = get_diode_bounds(_model)
+    x = np.clip(x, lb, ub)
+
+    # initial residual, jacobian and cost
+    r, J = calc_diode_residual(x, _V, _I, _w, _T, _model, _n)
+    cost = 0.5 * np.sum(r**2, axis = 1)
+
+    # damping and damping growth, iteration count and convergence per curve; active curves with finite cost
+    lam = np.full(rows, 1e-3)
+    nu = np.full(rows, 2.)
+    n_iter = np.zeros(rows, dtype = np.int64)
+    conv = np.zeros(rows, dtype = bool)
+    act = np.where(np.isfinite(cost))[0]
+
+
+    # iterate damped gauss-newton steps on active curves until converged
+    for i in range(_max_iter):
+        if len(act) == 0:
+            break
+
+        # normal equations, marquardt scaled damping
+        H = np.einsum('rpi,rpj->rij', J[act], J[act])
+        g = np.einsum('rpi,rp->ri', J[act], r[act])
+        D = np.diagonal(H, axis1 = 1, axis2 = 2)
+        D = np.maximum(D, 1e-12 * D.max(axis = 1, keepdims = True) + 1e-300)
+        A = H + (lam[act, None] * D)[:, :, None] * np.eye(m)[None, :, :]
+
+        # fixed variables and variables at bound with descent outward zero step
+        fix = fixed[None, :] | ((x[act] <= lb) & (g > 0.)) | ((x[act] >= ub) & (g < 0.))
+        A = np.where(fix[:, :, None] | fix[:, None, :], 0., A) + fix[:, :, None] * np.eye(m)[None, :, :]
+        g = np.where(fix, 0., g)
+
+        # trial step, limited to maximum step, within bounds
+        with np.errstate(all = 'ignore'):
+            dx = np.linalg.solve(A, -g[:, :, None])[:, :, 0]
+            dx /= np.maximum(np.max(np.abs(dx) / step_max, axis = 1, keepdims = True), 1.)
+        x_ = np.clip(x[act] + dx, lb, ub)
+
+        # trial residual and cost, cost reduction predicted by linear model
+        r_, J_ = calc_diode_residual(x_, _V[act], _I[act], _w[act], _T[act], _model, _n)
+        cost_ = 0.5 * np.sum(r_**2, axis = 1)
+        dx = x_ - x[act]
+        pred = -np.sum(g * dx, axis = 1) - 0.5 * np.einsum('ri,rij,rj->r', dx, H, dx)
+        n_iter[act] += 1
+
+
+        # accept improved steps, update damping by gain ratio; reject otherwise, increase damping growing (nielsen)
+        ok = cost_ < cost[act]
+        k = act[ok]
+        dc = cost[k] - cost_[ok]
+        with np.errstate(all = 'ignore'):
+            rho = np.nan_to_num(dc / pred[ok], nan = 0.)
+        x[k], r[k], J[k], cost[k] = x_[ok], r_[ok], J_[ok], cost_[ok]
+        lam[k] = np.maximum(lam[k] * np.maximum(1 / 3., 1 - (2 * np.clip(rho, 0., 1.) - 1)**3), 1e-12)
+        nu[k] = 2.
+        lam[act[~ok]] *= nu[act[~ok]]
+        nu[act[~ok]] *= 2.
+
+        # converged where accepted step reduces cost or moves variables within tolerance, or no further reduction
+        step = np.max(np.abs(dx) / (1. + np.abs(x_)), axis = 1)
+        done = lam[act] >= 1e12
+        done[ok] |= (dc <= _tol * cost[k]) | (step[ok] <= _tol)
+        conv[act[done]] = True
+
+        # stop converged curves
+        act = act[~done]
+
+
+    # return fit variables, final cost, iterations and convergence
+    return x, cost, n_iter, conv
+
+
+
+def get_diode_residual(_x, _V, _I, _w, _T, _model, _n, _x0, _free):
+
+    ''' Get Diode Model Residual of Single Curve
+
+    Args:
+        _x (np.array): free fit variables
+        _V, _I, _w (np.array): voltage [V], measured current [A], point weights of single curve
+        _T (float): temperature [K]
+        _model (str): diode model, 'single' or 'double'
+        _n (tuple): double diode ideality factors (n_1, n_2)
+        _x0 (np.array): all fit variables, fixed values
+        _free (np.array): free fit variables (bool)
+
+    Returns:
+        np.array: weighted residual
+    '''
+
+    x = _x0.copy()
+    x[_free] = _x
+
+    # return residual of single curve
+    return calc_diode_residual(x[None, :], _V[None, :], _I[None, :], _w[None, :], np.array([_T]), _model, _n)[0][0]
+
+
+
+def get_diode_residual_jac(_x, _V, _I, _w, _T, _model, _n, _x0, _free):
+
+    ''' Get Diode Model Residual Jacobian of Single Curve
+
+    Args:
+        as get_diode_residual
+
+    Returns:
+        np.array: weighted residual jacobian for free fit variables
+    '''
+
+    x = _x0.copy()
+    x[_free] = _x
+
+    # return residual jacobian of single curve
+    return calc_diode_residual(x[None, :], _V[None, :], _I[None, :], _w[None, :], np.array([_T]), _model,
+        _n)[1][0][:, _free]
+
+
+
+def fit_diode_scalar(_V, _I, _w, _T, _x0, _model = 'single', _n = (1., 2.), _fixed = None):
+
+    ''' Fit Diode Model to Single Curve
+
+        Fit diode model to single curve by bounded nonlinear least-squares with analytic jacobian; scalar reference for
+        vectorised fit_diode_arrays
+
+    Args:
+        _V, _I, _w (np.array): voltage [V], measured current [A], point weights of single curve
+        _T (float): temperature [K]
+        _x0 (np.array): initial fit variables
+        _model (str): diode model, 'single' or 'double'
+        _n (tuple): double diode ideality factors (n_1, n_2)
+        _fixed (list): fixed fit variables (bool), default none
+
+    Returns:
+        x (np.array): fit variables
+        cost (float): final cost (half sum of squared weighted residual)
+        n_iter (int): function evaluations
+        conv (bool): converged
+    '''
+
+    x0 = np.array(_x0, dtype = np.float64)
+    free = np.ones(len(x0), dtype = bool) if _fixed is None else ~np.array(_fixed, dtype = bool)
+
+    # no fit from invalid initial variables
+    if not np.all(np.isfinite(x0)):
+        return np.full(len(x0), np.nan), np.nan, 0, False
+
+    # fit variable bounds, initial variables within bounds
+    lb, ub = get_diode_bounds(_model)[:2]
+    x0 = np.clip(x0, lb, ub)
+
+    # minimise using bounded nonlinear least-squares
+    opt = optimize.least_squares(fun = get_diode_residual, x0 = x0[free], jac = get_diode_residual_jac,
+        bounds = (lb[free], ub[free]), args = (_V, _I, _w, _T, _model, _n, x0, free), method = 'trf',
+        ftol = 1e-10, xtol = 1e-10, gtol = 1e-12, x_scale = 'jac')
+
+    x = x0.copy()
+    x[free] = opt.x
+
+
+    # return fit variables, final cost, evaluations and convergence
+    return x, opt.cost, opt.nfev, opt.success
+
+
+
+def fit_diode_batch(_datas, _params, _model = 'single', _n = (1., 2.), _dark = False, _vector = True):
+
+    ''' Fit Diode Model to Batch of Curves
+
+        Fit diode model to batch of current-voltage curves; ragged curves stacked as nan padded matrices and fit
+        together, or each curve fit by scalar reference; dark curves fit without photogenerated current, relative
+        weighting over current decades; fits pinned at bounds (bound) flagged not converged (conv)
+
+    Args:
+        _datas (list): current-voltage measurement node data (dict) with voltage, current arrays
+        _params (list): required device node parameters (dict) for each measurement, optional 'temperature' [K]
+        _model (str): diode model, 'single' or 'double'
+        _n (tuple): double diode ideality factors (n_1, n_2)
+        _dark (bool): dark curves, no photogenerated current
+        _vector (bool): fit curves together, else each curve by scalar reference
+
+    Returns:
+        list: fit diode model parameters (dict) for each curve
+    '''
+
+    # stack curves, padding zero weight, unpack temperature
+    V, I, mask = stack_curves(_datas)
+    T = np.array([ p['temperature'] if 'temperature' in p.keys() else 298.15 for p in _params ], dtype = np.float64)
+
+    # point weights, relative to current for dark curves
+    w = mask.astype(np.float64)
+    if _dark:
+        I_max = np.nanmax(np.abs(I), axis = 1, keepdims = True)
+        w = np.where(mask, 1 / (np.abs(I) + 1e-3 * I_max), 0.)
+    V = np.where(mask, V, 0.)
+    I = np.where(mask, I, 0.)
+
+    # initial fit variables, fix photogenerated current of dark curves
+    x0 = init_diode_params(V, I, mask, T, _model, _n, _dark)
+    fixed = [_dark, False, False, False, False]
+
+
+    # fit all curves together
+    if _vector:
+        x, cost, n_iter, conv = fit_diode_arrays(V, I, w, T, x0, _model = _model, _n = _n, _fixed = fixed)
+
+    # fit each curve by scalar reference
+    else:
+        fits = [ fit_diode_scalar(V[i], I[i], w[i], T[i], x0[i], _model = _model, _n = _n, _fixed = fixed)
+            for i in range(len(V)) ]
+        x, cost, n_iter, conv = [ np.array(v) for v in zip(*fits) ]
+
+
+    # fits pinned at bounds not converged to minimum
+    bound = get_diode_pinned(x, _model)
+    conv = conv & ~bound
+
+
+    # unweighted root mean square residual of fit
+    r, _ = calc_diode_residual(x, V, I, mask.astype(np.float64), T, _model, _n)
+    rmse = np.sqrt(np.sum(r**2, axis = 1) / mask.sum(axis = 1))
+
+    # fit diode model parameters
+    p = unpack_diode_params(x, _model, _n)
+    names = {'I_ph': 'iph', 'I_0': 'i0', 'I_01': 'i01', 'I_02': 'i02', 'n': 'n', 'R_s': 'rs', 'R_sh': 'rp'}
+    fit = {**{ names[k]: v for k, v in p.items() }, 'rmse': rmse, 'iter': n_iter, 'conv': conv, 'bound': bound}
+
+
+    # return fit diode model parameters per curve
+    return [ { k: v[i] for k, v in fit.items() } for i in range(len(_datas)) ]
+
+
+
+def fit_diode_nodes(nodes, vector = True):
+
+    ''' Fit Diode Model to Measurement Nodes
+
+        Fit diode model to selected curves of each current-voltage measurement node; model by 'fit-iv' ('single' or
+        'double'), curves by 'fit-iv-curves' (default full, half, dark), double diode ideality factors by 'fit-iv-n'
+        (default 1, 2); nodes with equal settings fit together per curve
+
+    Args:
+        nodes (list): current-voltage measurement data nodes (dict)
+        vector (bool): fit curves together, else each curve by scalar reference
+
+    Returns:
+        list: fit results (dict) for each node, keys prefixed by curve (e.g. full_rs)
+    '''
+
+    # group node indicies by fit settings and curve
+    groups = {}
+    for i, node in enumerate(nodes):
+        model = node['fit-iv'] if 'fit-iv' in node.keys() and node['fit-iv'] in ['single', 'double'] else 'single'
+        n = tuple(node['fit-iv-n']) if 'fit-iv-n' in node.keys() else (1., 2.)
+        curves = node['fit-iv-curves'] if 'fit-iv-curves' in node.keys() else ['full', 'half', 'dark']
+        for curve in curves:
+            if curve in node.keys():
+                groups.setdefault((model, n, curve), []).append(i)
+
+
+    # fit each group of curves together, store results prefixed by curve
+    results = [ {} for node in nodes ]
+    for (model, n, curve), index in groups.items():
+        fits = fit_diode_batch([ nodes[i][curve] for i in index ], [ nodes[i] for i in index ], _model = model,
+            _n = n, _dark = (curve == 'dark'), _vector = vector)
+        for i, fit in zip(index, fits):
+            results[i].update({ '{}_{}'.format(curve, k): v for k, v in fit.items() })
+
+
+    # return fit results per node
+    return results
 
 
 
@@ -323,6 +1266,16 @@ def process_standard(device_state_params, full_data, half_data, dark_data):
     results = {**performance_data, **series, **shunt}
 
 
+    # optionally fit diode model to full, half and dark curves
+    if 'fit-iv' in device_state_params.keys() and device_state_params['fit-iv']:
+        results.update( fit_diode_nodes(nodes = [device_state_params])[0] )
+
+
+    # optionally extract double diode model parameters from performance
+    if 'dd-iv' in device_state_params.keys() and device_state_params['dd-iv']:
+        results.update( calc_double_diode_batch(_perfs = [performance_data], _params = [device_state_params])[0] )
+
+
     if True:
 
         # current density
@@ -382,153 +1335,92 @@ def iv(data):
 
 
 
+''' Batch Processing Functions '''
 
+def iv_fit_chunk(nodes, vector = True):
 
-''' convergence of series resistance
-ref doi 10.1016/j.solener.2018.01.047
-
-
-# thermal voltage
-def Vt_(T):
-    q = 1.602e-19 # [C]
-    kB = 1.38e-23 # [J/K]
-    return kB*T/q
-
-# factor for relative diode saturation currents
-def K_(T):
-    return (T**(2/5)) / 3.77
-
-# diode rectification at open circuit
-def Xoc_(Voc, a, Vt):
-    return np.exp(Voc/(a*Vt))
-
-# diode rectification at maximum power point
-def Xmpp_(Vmpp, Rs, Impp, a):
-    return np.exp((Vmpp + Rs*Impp)/(a*Vt))
-
-# diode rectification at short circuit
-def Xsc_(Rs, Isc, a):
-    return np.exp((Rs*Isc)/(a*Vt))
-
-# first diode saturation current
-def Is1_(Voc, Isc, Impp, Vmmp, Rs, Xmpp1, K, Xmpp2, Xoc1, Xoc2):
-    return (Voc*(Isc - Impp) - Vmmp*Isc) / (Voc*(Xmpp1 + K*Xmpp2) - Vmpp*(Xoc1 + K*Xoc2))
-
-# second diode saturation current
-def Is2_(K, Is1):
-    return K*Is1
-
-# generation current under illumination
-def Iph_(Voc, Impp, Is1, Xmpp1, K, Xmpp2, Vmpp, Xoc1, Xoc2):
-    return (Voc*Impp + Is1*(Voc*(Xmpp1 + K*Xmpp2) - Vmpp*(Xoc1 - K*Xoc2))) / (Voc - Vmpp)
-
-# shunt resistance
-def Rsh_(Vmpp, Impp, Rs, Iph, Is1, Xmpp1, Is2, Xmpp2):
-    return (Vmpp + Impp*Rs) / (Iph - Impp - Is1*(Xmpp1 - 1) - Is2*(Xmpp2 - 1))
-
-# series resistance
-def Rs_(Vmpp, Impp, Is1, a1, Vt, Xmpp1, Is2, a2, Xmpp2, Rsh):
-    return (Vmpp/Impp) - (1/((Is1/(a1*Vt))*Xmpp1 + (Is2/(a2*Vt))*Xmpp2 + (1/Rsh)))
-
-
-
+    ''' Fit Diode Model to Chunk of Measurements
 
+        Fit diode model to curves of each measurement in chunk within a single process, curves of equal settings fit
+        together; on failure each measurement is fit alone, such that errors are attributed to the failed measurement
 
+    Args:
+        nodes (list): current-voltage measurement data nodes (dict)
+        vector (bool): fit curves together, else each curve by scalar reference
 
-# define measurement conditions
-#T = 298.15 # [K]
-
-# thermal voltage
-Vt = Vt_(T)
-
-# factor for relative diode saturation currents
-K = K_(T)
-
-# define diode ideality factors
-a1 = 1.26
-a2 = 2.84
-
-# set initial series resistance
-Rs = 0.0
-
-
-## iterate series resistance calculation until convergence
-eps = 1e-5
-dRs = 1.
-while dRs > eps:
-
-    #print('\n Initial Rs {:.4f}\n'.format(Rs))
-
-    # update series resistance
-    Rs += eps
-
-    # diode rectification at open circuit
-    Xoc1 = Xoc_(Voc, a1, Vt)
-    Xoc2 = Xoc_(Voc, a2, Vt)
-
-    #print('\tXoc1 {:.1e}'.format(Xoc1))
-    #print('\tXoc2 {:.1e}'.format(Xoc2))
-
-    # diode rectification at maximum power point
-    Xmpp1 = Xmpp_(Vmpp, Rs, Impp, a1)
-    Xmpp2 = Xmpp_(Vmpp, Rs, Impp, a2)
-
-    #print('\tXmpp1 {:.1e}'.format(Xmpp1))
-    #print('\tXmpp2 {:.1e}'.format(Xmpp2))
-
-    # diode rectification at short circuit
-    Xsc1 = Xsc_(Rs, Isc, a1)
-    Xsc2 = Xsc_(Rs, Isc, a2)
-
-    #print('\tXsc1 {:.1e}'.format(Xsc1))
-    #print('\tXsc2 {:.1e}'.format(Xsc2))
-
+    Returns:
+        list: (fit results (dict), error message (str)) for each node, result None on failure
+    '''
 
-    # first diode saturation current
-    Is1 = Is1_(Voc, Isc, Impp, Vmpp, Rs, Xmpp1, K, Xmpp2, Xoc1, Xoc2)
+    try:
+        return [ (fit, None) for fit in fit_diode_nodes(nodes = nodes, vector = vector) ]
 
-    #print('\tIs1 {:.2e}'.format(Is1))
+    # on fit error, fit each node alone, store error message only for failed nodes
+    except Exception:
+        pass
 
-    # second diode saturation current
-    Is2 = Is2_(K, Is1)
+    res = []
+    for node in nodes:
+        try:
+            res.append( (fit_diode_nodes(nodes = [node], vector = vector)[0], None) )
+        except Exception as e:
+            res.append( (None, '{}: {}'.format(type(e).__name__, e)) )
 
-    #print('\tIs2 {:.2e}'.format(Is2))
 
+    # return fit results and error messages
+    return res
 
-    # generation current under illumination
-    Iph = Iph_(Voc, Impp, Is1, Xmpp1, K, Xmpp2, Vmpp, Xoc1, Xoc2)
 
-    #print('\tIph {:.2f}'.format(Iph))
 
+def iv_fit_batch(nodes, workers = None, vector = True):
 
-    # shunt resistance
-    Rsh = Rsh_(Vmpp, Impp, Rs, Iph, Is1, Xmpp1, Is2, Xmpp2)
+    ''' Fit Diode Model to Batch of Measurements
 
-    #print('\tRsh {:.3f}'.format(Rsh))
+        Split measurements into chunks and fit diode model to curves of each chunk in parallel over a process pool;
+        fit failures are reported per measurement without aborting the batch
 
+    Args:
+        nodes (list): current-voltage measurement data nodes (dict)
+        workers (int): number of worker processes, default cpu count; fit serially in current process if 1
+        vector (bool): fit curves of each chunk together, else each curve by scalar reference
 
-    # calculate updated series resistance
-    _Rs = Rs_(Vmpp, Impp, Is1, a1, Vt, Xmpp1, Is2, a2, Xmpp2, Rsh)
+    Returns:
+        results (list): fit results (dict) for each node in order, None on failure
+        failures (dict): error message (str) by node index for each failed fit
+    '''
 
-    #print('Calculated Rs {:.4f}\n'.format(_Rs))
+    # set number of worker processes
+    if workers is None:
+        workers = os.cpu_count() or 1
 
-    # check for convergence
-    dRs = Rs - _Rs
 
-    #print('Rs {:.5f}, _Rs {:.5f}, dRs {:.1e}'.format(Rs, _Rs, dRs))
+    # split nodes into chunks, spread across available workers
+    index = list(range(len(nodes)))
+    size = max(-(-len(index) // workers), 1)
+    chunks = [ index[j:j+size] for j in range(0, len(index), size) ]
 
-    # update series resistance
-    #Rs = _Rs
-    #Rs += eps
 
+    # fit each chunk serially in current process
+    if workers == 1:
+        fits = [ iv_fit_chunk([ nodes[i] for i in chunk ], vector) for chunk in chunks ]
 
-print('\nRs {:.4f}'.format(Rs))
-print('Rsh {:.2f}'.format(Rsh))
-print('Is1 {:.2e}'.format(Is1))
-print('Is2 {:.2e}'.format(Is2))
+    # fit chunks in parallel over process pool
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            fits = list(pool.map(iv_fit_chunk, [ [ nodes[i] for i in chunk ] for chunk in chunks ],
+                [vector] * len(chunks)))
 
 
+    # unpack fit results in original node order, collect failures
+    results = [None] * len(nodes)
+    failures = {}
 
+    for chunk, fit in zip(chunks, fits):
+        for i, (rec, err) in zip(chunk, fit):
+            results[i] = rec
+            if err is not None:
+                failures[i] = err
 
 
-'''
+    # return fit results and failures
+    return results, failures
@@ -16,23 +16,32 @@ Todo:
 
 ''' Imports '''
 
+# operating system interface
+import os
+
 # data array handling
 import numpy as np
 
+# parallel process pool
+from concurrent.futures import ProcessPoolExecutor
+
 # optimisation functions
 from scipy import optimize
 
 from scipy.interpolate import splrep, splev
 
+# quasi-monte carlo sampling
+from scipy.stats import qmc
+
 
 # lifetime model functions
 from . import models
 
 # wafer property calculation functions
-from .wafer import calc_wafer_intrinsic, calc_wafer_equilibrium
+from .wafer import calc_wafer_doping_density, get_wafer_state
 
 # charge density dependent calculation functions
-from .charge_density import calc_wafer_nonequilibrium
+from .charge_density import calc_wafer_nonequilibrium, get_nd_dep_cached, get_nd_dep_sweep
 
 
 
@@ -60,48 +69,51 @@ def get_nd_dep(_dn, _T, _N_D, _N_A, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n_i, _n_i_0
             dn (np.array): excess charge carrier density [ / cm^-3]
     '''
 
-    # initialise results storage list
-    n_i_eff = []
-    tau_rad = []
-    tau_aug = []
+    # calculate non-equilibrium values over full charge density range
+    n, p, n_i_eff = calc_wafer_nonequilibrium(_T = _T, _N_D = _N_D, _N_A = _N_A, _E_c_i = _E_c_i, _E_v_i = _E_v_i,
+                                              _N_c_i = _N_c_i, _N_v_i = _N_v_i, _n_i = _n_i, _n_i_0 = _n_i_0,
+                                              _dn = _dn, _dp = _dn)
+
 
+    # calculate radiative recombination lifetime
+    tau_rad = models.calc_tau_rad(_dn = _dn, _n = n, _p = p, _n_i_eff = n_i_eff, _T = _T)
 
-    # iterate each charge density value
-    for i in range(len(_dn)):
 
-        # calculate non-equilibrium values
-        n, p, _n_i_eff = calc_wafer_nonequilibrium(_T = _T, _N_D = _N_D, _N_A = _N_A, _E_c_i = _E_c_i, _E_v_i = _E_v_i,
-                                              _N_c_i = _N_c_i, _N_v_i = _N_v_i, _n_i = _n_i, _n_i_0 = _n_i_0,
-                                              _dn = _dn[i], _dp = _dn[i])
+    # calculate auger recombination lifetime
+    tau_aug = models.calc_tau_aug(_dn = _dn, _n = n, _p = p, _n_0 = _n_0, _p_0 = _p_0, _n_i_eff = n_i_eff, _T = _T)
 
 
-        # store calculated value
-        n_i_eff.append( _n_i_eff )
+    # return calculated non-equilibrium effective intrinsic carrier concentration as array
+    return n_i_eff, tau_rad, tau_aug
 
 
-        # calculate radiative recombination lifetime
-        _tau_rad = models.calc_tau_rad(_dn = _dn[i], _n = n, _p = p, _n_i_eff = _n_i_eff, _T = _T)
 
-        # store calculated value
-        tau_rad.append( _tau_rad )
+def get_nd_dep_direct(_dn, _T, _N_D, _N_A):
 
+    ''' Get Charge Density Dependent Values Directly
 
-        # calculate auger recombination lifetime
-        _tau_aug = models.calc_tau_aug(_dn = _dn[i], _n = n, _p = p, _n_0 = _n_0, _p_0 = _p_0, _n_i_eff = _n_i_eff,
-                                      _T = _T)
+        Calculate charge density dependent values from memoised wafer state without building lookup table, for wafer
+        parameters used only once (e.g. perturbed inputs)
 
-        # store calculated value
-        tau_aug.append( _tau_aug )
+    Args:
+        _dn (np.array): excess electron concentrations [ / cm^-3]
+        _T (float): temperature [K]
+        _N_D (float): donor doping concentration [ / cm^-3]
+        _N_A (float): acceptor doping concentration [ / cm^-3]
 
+    Returns:
+        n_i_eff (np.array): effective non-equilibrium intrinsic carrier densities [ / cm^3]
+        tau_rad (np.array): radiative recombination lifetime [ / s]
+        tau_aug (np.array): auger recombination lifetime [ / s]
+    '''
 
-    # pack results lists into arrays
-    n_i_eff = np.array(n_i_eff)
-    tau_rad = np.array(tau_rad)
-    tau_aug = np.array(tau_aug)
+    # get memoised intrinsic and equilibrium wafer parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = _T, _N_D = _N_D, _N_A = _N_A)
 
 
-    # return calculated non-equilibrium effective intrinsic carrier concentration as array
-    return n_i_eff, tau_rad, tau_aug
+    # return calculated charge density dependent values
+    return get_nd_dep(_dn = np.asarray(_dn, dtype = np.float64), _T = _T, _N_D = _N_D, _N_A = _N_A, _E_c_i = E_c_i,
+                      _E_v_i = E_v_i, _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i, _n_i_0 = n_i_0, _n_0 = n_0, _p_0 = p_0)
 
 
 
@@ -244,211 +256,319 @@ def get_residual(_opt_vars, _params, _data, _ref, _comps, _names):
     return residual
 
 
-def mlt(data):
 
-    ''' Fit Effective Lifetime Model to Measurement Data
+def calc_tau_eff_jac(_opt_vars, _params, _data, _comps, _names):
 
-        Calculate effective carrier lifetime from model and fit to measured effective lifetime using minimisation over
-        model component parameters; return fit results and components
+    ''' Calculate Effective Carrier Lifetime Jacobian
+
+        Calculate analytic derivative of effective carrier lifetime with respect to each (log10) model component
+        optimisation variable; effective lifetime is inverse sum of component lifetimes, d(tau_eff)/dx =
+        -tau_eff^2 * sum( d(tau^-1)/dx )
 
     Args:
-        _model (str): chosen model to fit to data
-        _sample (dict): sample data node
-        _sample_state (dict): sample state data node
-        _measurement (dict): measurement data node
-        _results (dict): results data node
+        _opt_vars (list): model component optimisation variables
+        _params (dict): required parameters for calculations
+        _data (dict): results from charge density dependent calculations
+        _comps (list): list of model components
+        _names (list): list of optimisation variable names
 
     Returns:
-        dict: effective lifetime fit results and model components
+        np.array: effective lifetime jacobian [len(dn), len(_opt_vars)]
     '''
 
-    T = data['temperature']
-    W = data['wafer_thickness']
-    N_D = data['N_D']
-    N_A = data['N_A']
-    N_M = np.max([N_D, N_A])
+    # calculate effective lifetime and each model component
+    rec = calc_tau_eff(_opt_vars = _opt_vars, _params = _params, _data = _data, _comps = _comps, _names = _names)
 
-    # initialise global parameters storage dict
-    params = {'T': T, 'W': W, 'N_M': N_M, 'N_D': N_D, 'N_A': N_A}
+    # initialise jacobian storage, d(tau^-1)/dx for each optimisation variable
+    jac = np.zeros( (len(rec['dn']), len(_names)) )
 
+    # derivative of log10 optimisation variable, d(10^x)/dx = ln(10) * 10^x
+    ln10 = np.log(10.)
 
-    # intrinsic calculation
-    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = T)
 
+    # surface defect recombination, tau^-1 linear in J_0
+    if 'sdr' in _comps:
+        jac[:, list(_names).index('J_0')] = ln10 / rec['tau_sdr']
 
-    # calculate effective equilibrium parameters
-    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+    if 'sdr2' in _comps:
+        jac[:, list(_names).index('J_02')] = ln10 / rec['tau_sdr2']
 
 
-    # unpack required data to fit model
-    nd = data['nd']
-    tau = data['tau']
+    # SRH recombination, tau = t_m0 + t_M0 * dn / (dn + N_M)
+    if 'srh' in _comps:
+        t_m0 = 10.**_opt_vars[ list(_names).index('t_m0') ]
+        t_M0 = 10.**_opt_vars[ list(_names).index('t_M0') ]
 
+        jac[:, list(_names).index('t_m0')] = -ln10 * t_m0 / rec['tau_srh']**2
+        jac[:, list(_names).index('t_M0')] = -ln10 * (rec['tau_srh'] - t_m0) / rec['tau_srh']**2
 
-    # trim charge density data range
-    j = np.where((nd >= data['nd_range'][0]) & (nd <= data['nd_range'][1]))
-    nd = nd[j]
-    tau = tau[j]
 
+    # bulk component is constant, no dependence on t_blk
 
-    # get charge density dependent values (n_i_eff, tau_aug, tau_rad), assume equal excess electron, hole generation
-    n_i_eff, tau_rad, tau_aug = get_nd_dep(_dn = nd, _T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                           _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i, _n_i_0 = n_i_0, _n_0 = n_0,
-                                           _p_0 = p_0)
 
-    _data = {'n_i_eff': n_i_eff, 'tau_rad': tau_rad, 'tau_aug': tau_aug, 'dn': nd}
+    # chain rule through inverse sum for effective lifetime
+    jac *= -(rec['tau_eff']**2)[:, None]
 
 
-    # define model, initial parameter values, parameter limits; (log values for parameters)
+    # return calculated effective lifetime jacobian
+    return jac
 
-    if 'model' in data.keys():
-        model = data['model']
 
 
-    else:
-        model = {'aug':{}, 'rad':{},
-                 'sdr':{'params':['J_0'],
-                        'inits':[-14],
-                        'limits':[ [-18, -10] ]},
-                 'srh':{'params':['t_m0', 't_M0'],
-                        'inits':[-4, -4],
-                        'limits':[ [-7, -1], [-7, -1] ]},
-                 #'sdr2':{'params':['J_02'],
-                 #       'inits':[-12],
-                 #       'limits':[ [-16, -10] ]},
-                }
+def get_residual_jac(_opt_vars, _params, _data, _ref, _comps, _names):
 
+    ''' Get Effective Lifetime Residual Jacobian
 
-    # prepare model and params for optimisation
-    comps = [ k for k in model.keys() ]
-    opt_vars = [ p for v in model.values() if len(v) != 0 for p in v['params'] ]
-    inits = [ i for v in model.values() if len(v) != 0 for i in v['inits'] ]
-    limits = [ l for v in model.values() if len(v) != 0 for l in v['limits'] ]
-    bounds = [ tuple( l[i] for l in limits ) for i in range(len(limits[0])) ]
+        Calculate analytic jacobian of effective lifetime residual relative to measured effective lifetime
 
+    Args:
+        _opt_vars (list): model component optimisation variables
+        _params (dict): required parameters for calculations
+        _data (dict): results from charge density dependent calculations
+        _ref (np.array): measured effective lifetime
+        _comps (list): list of model components
+        _names (list): list of optimisation variable names
 
-    # minimise using bounded nonlinear least-squares
-    opt = optimize.least_squares(fun = get_residual, x0 = inits, bounds = bounds,
-        args = (params, _data, tau, comps, opt_vars), jac = '3-point',
-        method = 'trf', ftol = 1e-10, xtol = 1e-12, gtol = 1e-12, x_scale = 'jac', loss = 'cauchy')
+    Returns:
+        np.array: effective lifetime residual jacobian
+    '''
 
+    # residual is measured less model effective lifetime
+    return -calc_tau_eff_jac(_opt_vars = _opt_vars, _params = _params, _data = _data, _comps = _comps,
+        _names = _names)
 
-    #### update optimisation of SRH to take t_M0 and "k" rather than t_m0, set limits on k more straight forward
 
-    ## perform automatic sensitivity analysis of opt vars
 
+def compile_model_plan(_model, _params, _data):
 
-    # residual sum of squares
-    ss_res = np.sum((opt.fun) ** 2)
+    ''' Compile Effective Lifetime Model Plan
 
-    # total sum of squares
-    ss_tot = np.sum((tau - np.mean(tau)) ** 2)
+        Compile model definition into evaluation plan for fixed charge density data; precompute fixed (aug, rad, blk)
+        inverse lifetime sum and charge density dependent coefficients, resolve optimisation variable slot indicies,
+        and preallocate working buffers such that repeat evaluation requires no dict or list construction
 
-    # r-squared
-    r2 = 1 - (ss_res / ss_tot)
+    Args:
+        _model (dict): model components, each with optimisation variable params, inits, limits
+        _params (dict): required parameters for calculations
+        _data (dict): results from charge density dependent calculations
 
+    Returns:
+        dict: compiled model plan
+    '''
 
-    # define new charge density range
-    dn = np.logspace(12, 17, 200)
+    # unpack model components and optimisation variable names
+    comps = [ k for k in _model.keys() ]
+    names = [ p for v in _model.values() if len(v) != 0 for p in v['params'] ]
 
-    if 'rerange' in data.keys():
-        # define new charge density range
-        dn = np.logspace(data['rerange'][0], data['rerange'][1], 300)
+    # unpack charge density
+    dn = np.asarray(_data['dn'], dtype = np.float64)
 
+    # elementary charge [C], as used in surface defect recombination model
+    q = 1.602e-19
 
-    # get charge density dependent values (n_i_eff, tau_aug, tau_rad), assume equal excess electron, hole generation
-    n_i_eff, tau_rad, tau_aug = get_nd_dep(_dn = dn, _T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                           _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i, _n_i_0 = n_i_0, _n_0 = n_0,
-                                           _p_0 = p_0)
 
-    _data = {'n_i_eff': n_i_eff, 'tau_rad': tau_rad, 'tau_aug': tau_aug, 'dn': dn}
+    # initialise plan with fixed inverse lifetime sum and working buffers
+    plan = {'comps': comps, 'names': names, 'dn': dn, 'inv_fixed': np.zeros(dn.shape),
+        'inv': np.empty(dn.shape), 'tmp': np.empty(dn.shape), 'tau_eff': np.empty(dn.shape),
+        'sdr': [], 'srh': None}
 
 
+    # radiative, auger components independent of optimisation variables
+    if 'rad' in comps:
+        plan['inv_fixed'] += _data['tau_rad']**-1
 
-    # calculate sdr, srh, and effective charge carrier lifetime from optimal parameters
-    rec = calc_tau_eff(_opt_vars = opt.x, _params = params, _data = _data, _comps = comps, _names = opt_vars)
+    if 'aug' in comps:
+        plan['inv_fixed'] += _data['tau_aug']**-1
 
+    # constant bulk component
+    if 'blk' in comps:
+        plan['inv_fixed'] += 1.
 
-    # calculate bulk lifetime component
-    #rec['tau_blk'] = (rec['tau_eff']**-1 - rec['tau_sdr']**-1)**-1
 
+    # surface defect recombination, inverse lifetime linear in J_0; store (slot, coefficient)
+    for comp, name in [('sdr', 'J_0'), ('sdr2', 'J_02')]:
+        if comp in comps:
+            coef = (_params['N_M'] + dn) / (_params['W'] * q * _data['n_i_eff']**2)
+            plan['sdr'].append( (names.index(name), coef) )
 
 
-    #o = np.where(dn >= 1e16)
-    #rec['n_i_eff'] = n_i_eff[o][0]
+    # SRH recombination, tau = t_m0 + t_M0 * dn / (dn + N_M); store (t_m0 slot, t_M0 slot, injection fraction)
+    if 'srh' in comps:
+        plan['srh'] = (names.index('t_m0'), names.index('t_M0'), dn / (dn + _params['N_M']))
 
 
+    # return compiled model plan
+    return plan
 
-    # store optimal model parameters
-    rec['opt_vars'] = { opt_vars[i]: np.power(10., opt.x[i]) for i in range(len(opt_vars)) }
 
 
-    # calculate and store values
-    rec['J_0'] = rec['opt_vars']['J_0']
+def calc_tau_eff_plan(_opt_vars, _plan):
 
+    ''' Calculate Effective Carrier Lifetime from Compiled Plan
 
-    # check for specific nd value for extraction
-    if 'nd_vals' in data.keys():
-        _dn = data['nd_vals']
-    # default to 10 % doping density
-    else:
-        _dn = N_M * 0.1
+        Calculate effective carrier lifetime from compiled model plan using preallocated buffers; returned array is
+        plan buffer, overwritten on next evaluation
 
-    j = np.where(rec['dn'] >= _dn)[0][0]
-    #j = np.where(rec['dn'] >= N_M*0.1)[0][0]
-    rec['t_blk'] = rec['tau_srh'][j]
-    rec['t_eff'] = rec['tau_eff'][j]
-    rec['t_sdr'] = rec['tau_sdr'][j]
-    rec['t_aug'] = rec['tau_aug'][j]
-    rec['t_rad'] = rec['tau_rad'][j]
-    #rec['t_BLK'] = rec['tau_blk'][j]
+    Args:
+        _opt_vars (list): model component optimisation variables (log10)
+        _plan (dict): compiled model plan
 
-    rec['R2'] = r2
+    Returns:
+        np.array: effective carrier lifetime [s]
+    '''
 
-    #rec['opt_full'] = opt
+    # renormalise optimisation variables
+    x = np.power(10., _opt_vars)
 
+    # unpack working buffers
+    inv = _plan['inv']
+    tmp = _plan['tmp']
 
-    # calculate SRH k-value
-    t_m0 = rec['opt_vars']['t_m0']
-    t_M0 = rec['opt_vars']['t_M0']
+    # initialise inverse lifetime sum from fixed components
+    np.copyto(inv, _plan['inv_fixed'])
 
-    k = t_M0/t_m0
-    rec['k_val'] = k
 
+    # add surface defect recombination components
+    for i, coef in _plan['sdr']:
+        np.multiply(coef, x[i], out = tmp)
+        inv += tmp
 
+    # add SRH recombination component
+    if _plan['srh'] is not None:
+        i, k, frac = _plan['srh']
+        np.multiply(frac, x[k], out = tmp)
+        tmp += x[i]
+        np.divide(1., tmp, out = tmp)
+        inv += tmp
 
-    if False:
-        # calculate ratio thermal velocity charge carriers
-        v_th_e, v_th_h = pvlibs.process_data.models.intrinsic.calc_v_th(T)
 
-        if data['wafer_doping'] == 'p-type':
-            v_th_r = (v_th_h/v_th_e)
-        else:
-            v_th_r = (v_th_h/v_th_e)**-1
+    # calculate effective lifetime from inverse sum
+    np.divide(1., inv, out = _plan['tau_eff'])
 
 
-    # return fitting results
-    return rec
+    # return calculated effective lifetime
+    return _plan['tau_eff']
 
 
 
-def sim_model(model_params, data):
+def get_residual_plan(_opt_vars, _plan, _ref):
 
-    ''' Fit Effective Lifetime Model to Measurement Data
+    ''' Get Effective Lifetime Residual from Compiled Plan
 
-        Calculate effective carrier lifetime from model and fit to measured effective lifetime using minimisation over
-        model component parameters; return fit results and components
+    Args:
+        _opt_vars (list): model component optimisation variables (log10)
+        _plan (dict): compiled model plan
+        _ref (np.array): measured effective lifetime
+
+    Returns:
+        np.array: effective lifetime residual
+    '''
+
+    # calculate residual, new array as retained by optimiser
+    return _ref - calc_tau_eff_plan(_opt_vars = _opt_vars, _plan = _plan)
+
+
+
+def get_residual_jac_plan(_opt_vars, _plan, _ref):
+
+    ''' Get Effective Lifetime Residual Jacobian from Compiled Plan
+
+        Calculate analytic jacobian of effective lifetime residual with respect to each (log10) optimisation variable
 
     Args:
-        _model (str): chosen model to fit to data
-        _sample (dict): sample data node
-        _sample_state (dict): sample state data node
-        _measurement (dict): measurement data node
-        _results (dict): results data node
+        _opt_vars (list): model component optimisation variables (log10)
+        _plan (dict): compiled model plan
+        _ref (np.array): measured effective lifetime
 
     Returns:
-        dict: effective lifetime fit results and model components
+        np.array: effective lifetime residual jacobian [len(dn), len(_opt_vars)]
+    '''
+
+    # calculate effective lifetime
+    tau_eff = calc_tau_eff_plan(_opt_vars = _opt_vars, _plan = _plan)
+
+    # renormalise optimisation variables, scale by derivative of log10 variable
+    x = np.power(10., _opt_vars)
+    ln10 = np.log(10.)
+
+    # initialise jacobian, new array as retained by optimiser
+    jac = np.zeros( (tau_eff.shape[0], len(_plan['names'])) )
+
+
+    # surface defect recombination, d(tau^-1)/dx
+    for i, coef in _plan['sdr']:
+        jac[:, i] = (ln10 * x[i]) * coef
+
+    # SRH recombination, d(tau^-1)/dx = -tau^-2 * d(tau)/dx
+    if _plan['srh'] is not None:
+        i, k, frac = _plan['srh']
+        tmp = _plan['tmp']
+        np.multiply(frac, x[k], out = tmp)
+        tmp += x[i]
+        np.divide(-ln10, tmp**2, out = tmp)
+        jac[:, i] = x[i] * tmp
+        jac[:, k] = (x[k] * frac) * tmp
+
+
+    # chain rule through inverse sum, residual is measured less model effective lifetime
+    jac *= (tau_eff**2)[:, None]
+
+
+    # return calculated residual jacobian
+    return jac
+
+
+
+def get_nd_index(data):
+
+    ''' Get Charge Density Fit Range Index
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+
+    Returns:
+        np.array: indicies of measured charge density within fit range
+    '''
+
+    # return indicies of charge density within range
+    return np.where((data['nd'] >= data['nd_range'][0]) & (data['nd'] <= data['nd_range'][1]))[0]
+
+
+
+def get_dn_range(data):
+
+    ''' Get Charge Density Output Range
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+
+    Returns:
+        np.array: log-spaced charge density range for output of fit model components [ / cm^-3]
+    '''
+
+    # define new charge density range, optionally from data node
+    if 'rerange' in data.keys():
+        return np.logspace(data['rerange'][0], data['rerange'][1], 300)
+
+    # return default charge density range
+    return np.logspace(12, 17, 200)
+
+
+
+def prepare_fit(data, direct = False):
+
+    ''' Prepare Effective Lifetime Model Fit
+
+        Trim measured effective lifetime to charge density range, get charge density dependent values from cached
+        lookup table (or precomputed values, nd_dep), unpack model definition and compile model evaluation plan for
+        optimisation
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+        direct (bool): calculate charge density dependent values directly, without building lookup table
+
+    Returns:
+        dict: model fit definition; params, tau, comps, opt_vars, inits, bounds, plan, jac
     '''
 
     T = data['temperature']
@@ -461,59 +581,1076 @@ def sim_model(model_params, data):
     params = {'T': T, 'W': W, 'N_M': N_M, 'N_D': N_D, 'N_A': N_A}
 
 
-    # intrinsic calculation
-    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = T)
+    # unpack required data to fit model
+    nd = data['nd']
+    tau = data['tau']
+
 
+    # trim charge density data range
+    j = get_nd_index(data)
+    nd = nd[j]
+    tau = tau[j]
 
-    # calculate effective equilibrium parameters
-    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
 
+    # use precomputed charge density dependent values over trimmed range, e.g. from temperature sweep
+    if 'nd_dep' in data.keys():
+        n_i_eff, tau_rad, tau_aug = data['nd_dep']
 
-    # define new charge density range
-    dn = np.logspace(13, 17, 100)
+    # get charge density dependent values (n_i_eff, tau_aug, tau_rad) from cached lookup table
+    elif not direct:
+        n_i_eff, tau_rad, tau_aug = get_nd_dep_cached(_dn = nd, _T = T, _N_D = N_D, _N_A = N_A)
 
-    # get charge density dependent values (n_i_eff, tau_aug, tau_rad), assume equal excess electron, hole generation
-    n_i_eff, tau_rad, tau_aug = get_nd_dep(_dn = dn, _T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                           _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i, _n_i_0 = n_i_0, _n_0 = n_0,
-                                           _p_0 = p_0)
+    # calculate directly for single use wafer parameters
+    else:
+        n_i_eff, tau_rad, tau_aug = get_nd_dep_direct(_dn = nd, _T = T, _N_D = N_D, _N_A = N_A)
 
-    data = {'n_i_eff': n_i_eff, 'tau_rad': tau_rad, 'tau_aug': tau_aug, 'dn': dn}
+    _data = {'n_i_eff': n_i_eff, 'tau_rad': tau_rad, 'tau_aug': tau_aug, 'dn': nd}
 
 
     # define model, initial parameter values, parameter limits; (log values for parameters)
-    model = model_params['model_params']
+
+    if 'model' in data.keys():
+        model = data['model']
+
+
+    else:
+        model = {'aug':{}, 'rad':{},
+                 'sdr':{'params':['J_0'],
+                        'inits':[-14],
+                        'limits':[ [-18, -10] ]},
+                 'srh':{'params':['t_m0', 't_M0'],
+                        'inits':[-4, -4],
+                        'limits':[ [-7, -1], [-7, -1] ]},
+                 #'sdr2':{'params':['J_02'],
+                 #       'inits':[-12],
+                 #       'limits':[ [-16, -10] ]},
+                }
 
 
+    # prepare model and params for optimisation
     comps = [ k for k in model.keys() ]
-    inits = [ np.log10(i) for v in model.values() if len(v) != 0 for i in v['inits'] ]
     opt_vars = [ p for v in model.values() if len(v) != 0 for p in v['params'] ]
+    inits = [ i for v in model.values() if len(v) != 0 for i in v['inits'] ]
+    limits = [ l for v in model.values() if len(v) != 0 for l in v['limits'] ]
+    bounds = [ tuple( l[i] for l in limits ) for i in range(len(limits[0])) ]
 
 
-    # calculate sdr, srh, and effective charge carrier lifetime from optimal parameters
-    rec = calc_tau_eff(_opt_vars = inits, _params = params, _data = data, _comps = comps, _names = opt_vars)
+    # compile model evaluation plan for measured charge density
+    plan = compile_model_plan(_model = model, _params = params, _data = _data)
 
 
-    # calculate bulk lifetime component
-    rec['tau_blk'] = (rec['tau_eff']**-1 - rec['tau_sdr']**-1)**-1
+    # use analytic jacobian by default, optionally fall back to numerical approximation (e.g. '3-point')
+    jac = get_residual_jac_plan
+    if 'jac' in data.keys() and data['jac'] != 'analytic':
+        jac = data['jac']
 
-    rec['n_i_eff'] = n_i_eff
 
+    # return model fit definition
+    return {'params': params, 'tau': tau, 'comps': comps, 'opt_vars': opt_vars, 'inits': inits, 'bounds': bounds,
+            'plan': plan, 'jac': jac}
 
-    # store optimal model parameters
-    rec['opt_vars'] = { opt_vars[i]: np.power(10., inits[i]) for i in range(len(inits)) }
 
 
-    # calculate and store values
-    rec['J_0'] = rec['opt_vars']['J_0']
+def fit_model_plan(_x0, _fit):
 
-    j = np.where(rec['dn'] >= N_M*0.1)[0][0]
-    rec['t_blk'] = rec['tau_srh'][j]
-    rec['t_eff'] = rec['tau_eff'][j]
-    rec['t_sdr'] = rec['tau_sdr'][j]
+    ''' Fit Effective Lifetime Model Plan
 
+        Minimise effective lifetime residual using bounded nonlinear least-squares from initial (log) parameter values
 
-    # return fitting results
-    return rec
+    Args:
+        _x0 (list): initial (log) optimisation variable values
+        _fit (dict): model fit definition
+
+    Returns:
+        scipy.optimize.OptimizeResult: optimisation result
+    '''
+
+    # minimise using bounded nonlinear least-squares
+    opt = optimize.least_squares(fun = get_residual_plan, x0 = _x0, bounds = _fit['bounds'],
+        args = (_fit['plan'], _fit['tau']), jac = _fit['jac'],
+        method = 'trf', ftol = 1e-10, xtol = 1e-12, gtol = 1e-12, x_scale = 'jac', loss = 'cauchy')
+
+
+    # return optimisation result
+    return opt
+
+
+
+def sample_starts(_bounds, _n, _sampler = 'lhs', _seed = 0):
+
+    ''' Sample Starting Points
+
+        Sample (log) optimisation variable starting points within parameter limits using scrambled quasi-random
+        Latin hypercube or Sobol sequences; deterministic for given seed
+
+    Args:
+        _bounds (list): lower and upper (log) parameter limits
+        _n (int): number of starting points
+        _sampler (str): sampling method, 'lhs' or 'sobol' (power of two number of points preferred)
+        _seed (int): random number generator seed
+
+    Returns:
+        np.array: sampled starting points, shape (_n, number of parameters)
+    '''
+
+    # unpack parameter limits
+    lower = np.array(_bounds[0], dtype = np.float64)
+    upper = np.array(_bounds[1], dtype = np.float64)
+
+
+    # sample unit hypercube
+    if _sampler == 'sobol':
+        sample = qmc.Sobol(d = len(lower), scramble = True, seed = _seed).random(_n)
+    else:
+        sample = qmc.LatinHypercube(d = len(lower), seed = _seed).random(_n)
+
+
+    # return starting points scaled to parameter limits
+    return qmc.scale(sample, lower, upper)
+
+
+
+def fit_starts(data, starts):
+
+    ''' Fit Effective Lifetime Model from Starting Points
+
+        Fit effective lifetime model from each starting point within a single process, sharing cached charge density
+        dependent lookup tables
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+        starts (np.array): (log) optimisation variable starting points
+
+    Returns:
+        list: (optimal parameters, cost, status, nfev, njev) for each starting point
+    '''
+
+    # prepare model fit definition
+    fit = prepare_fit(data)
+
+
+    # fit from each starting point
+    results = []
+    for x0 in starts:
+        opt = fit_model_plan(_x0 = x0, _fit = fit)
+        results.append( (opt.x, opt.cost, opt.status, opt.nfev, opt.njev) )
+
+
+    # return fit results
+    return results
+
+
+
+def fit_multistart(data, fit):
+
+    ''' Fit Effective Lifetime Model from Multiple Starting Points
+
+        Fit effective lifetime model from default initial values and sampled starting points within parameter limits
+        in parallel over a process pool, keep lowest cost minimum (first on tie, deterministic for given seed); options
+        taken from data node: starts (int), starts_sampler ('lhs' or 'sobol'), starts_seed (int), starts_workers (int)
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+        fit (dict): model fit definition
+
+    Returns:
+        opt (scipy.optimize.OptimizeResult): lowest cost optimisation result
+        starts (dict): starting points, minima, cost and status of each start, spread of (log) minima by parameter
+    '''
+
+    # unpack multiple start options
+    sampler = data['starts_sampler'] if 'starts_sampler' in data.keys() else 'lhs'
+    seed = data['starts_seed'] if 'starts_seed' in data.keys() else 0
+    workers = data['starts_workers'] if 'starts_workers' in data.keys() else (os.cpu_count() or 1)
+
+
+    # sample starting points, include default initial values as first start
+    x0 = np.vstack([ np.clip(fit['inits'], fit['bounds'][0], fit['bounds'][1]),
+        sample_starts(_bounds = fit['bounds'], _n = data['starts'], _sampler = sampler, _seed = seed) ])
+
+
+    # fit from each starting point serially in current process
+    if workers == 1:
+        fits = fit_starts(data, x0)
+
+    # split starting points into chunks and fit in parallel over process pool
+    else:
+        size = -(-len(x0) // workers)
+        chunks = [ x0[j:j+size] for j in range(0, len(x0), size) ]
+
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            fits = [ f for chunk in pool.map(fit_starts, [data] * len(chunks), chunks) for f in chunk ]
+
+
+    # unpack minima of each start
+    x = np.array([ f[0] for f in fits ])
+    cost = np.array([ f[1] for f in fits ])
+
+    starts = {'names': fit['opt_vars'], 'x0': x0, 'x': x, 'cost': cost,
+              'status': np.array([ f[2] for f in fits ]),
+              'nfev': np.array([ f[3] for f in fits ]),
+              'njev': np.array([ f[4] for f in fits ]) }
+
+
+    # select lowest cost minimum
+    i = int(np.argmin(cost))
+
+    # spread of (log) minima by parameter, number of starts reaching lowest cost minimum
+    starts['best'] = i
+    starts['spread'] = { v: np.std(x[:,k]) for k, v in enumerate(fit['opt_vars']) }
+    starts['n_best'] = int(np.sum(cost <= cost[i] * (1 + 1e-6)))
+
+
+    # polish lowest cost minimum in current process to return full optimisation result
+    opt = fit_model_plan(_x0 = x[i], _fit = fit)
+
+
+    # return lowest cost optimisation result and multiple start results
+    return opt, starts
+
+
+
+def calc_fit_point(_x, _fit, _dn, _nd_dep):
+
+    ''' Calculate Fit Values at Charge Density
+
+        Calculate J_0, bulk (SRH) lifetime, effective lifetime and SRH k-value from optimal (log) parameters at a
+        single charge density
+
+    Args:
+        _x (np.array): optimal (log) optimisation variable values
+        _fit (dict): model fit definition
+        _dn (float): excess charge carrier density for extraction [ / cm^-3]
+        _nd_dep (tuple): charge density dependent values (n_i_eff, tau_rad, tau_aug) at _dn
+
+    Returns:
+        list: J_0, t_blk, t_eff, k_val (nan where not in model)
+    '''
+
+    # calculate recombination and effective lifetimes at charge density
+    _data = {'n_i_eff': _nd_dep[0], 'tau_rad': _nd_dep[1], 'tau_aug': _nd_dep[2], 'dn': np.array([_dn])}
+    rec = calc_tau_eff(_opt_vars = _x, _params = _fit['params'], _data = _data, _comps = _fit['comps'],
+                       _names = _fit['opt_vars'])
+
+    # renormalise optimisation variables
+    v = { _fit['opt_vars'][i]: 10.**_x[i] for i in range(len(_x)) }
+
+
+    # return extracted values
+    return [ v['J_0'] if 'J_0' in v.keys() else np.nan,
+             rec['tau_srh'][0] if 'tau_srh' in rec.keys() else np.nan,
+             rec['tau_eff'][0],
+             v['t_M0'] / v['t_m0'] if 't_m0' in v.keys() and 't_M0' in v.keys() else np.nan ]
+
+
+
+def perturb_inputs(data, draw):
+
+    ''' Perturb Measurement Inputs
+
+        Scale wafer thickness, resistivity and optical constant, propagate to fit inputs to first order: charge density
+        scales inversely with thickness, generalised (quasi-steady-state) mode lifetime inversely with optical constant,
+        doping density recalculated from resistivity
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+        draw (np.array): relative scale of wafer thickness, resistivity and optical constant
+
+    Returns:
+        dict: copy of data node with perturbed inputs
+    '''
+
+    # unpack relative scale of inputs
+    f_W, f_rho, f_k = draw
+
+    # recalculate doping density from perturbed resistivity
+    N_D, N_A = calc_wafer_doping_density(_wafer_doping_type = data['wafer_doping_type'],
+                                         _wafer_resistivity = data['wafer_resistivity'] * f_rho)
+
+    # lifetime independent of optical constant in transient mode
+    tau = data['tau']
+    if 'illumination_mode' in data.keys() and data['illumination_mode'] == 'gen':
+        tau = tau / f_k
+
+
+    # drop precomputed charge density dependent values, invalid for perturbed inputs
+    data = { k: v for k, v in data.items() if k not in ['nd_dep', 'nd_dep_range'] }
+
+
+    # return perturbed copy of data node
+    return dict(data, wafer_thickness = data['wafer_thickness'] * f_W, N_D = N_D, N_A = N_A,
+                nd = data['nd'] / f_W, tau = tau)
+
+
+
+def bootstrap_chunk(data, x, dn, draws, mode):
+
+    ''' Fit Effective Lifetime Model to Bootstrap Replicates
+
+        Refit effective lifetime model from optimum to each replicate within a single process; replicates either
+        resample relative residuals about the optimal fit, or perturb measurement inputs
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+        x (np.array): optimal (log) optimisation variable values
+        dn (float): excess charge carrier density for extraction [ / cm^-3]
+        draws (np.array): residual resample indicies or relative input scale for each replicate
+        mode (str): bootstrap mode, 'residual' or 'inputs'
+
+    Returns:
+        results (np.array): J_0, t_blk, t_eff, k_val for each replicate, nan on failure
+        errors (dict): count of failed replicates by error message (str)
+    '''
+
+    # prepare model fit and relative residuals about optimal fit
+    if mode == 'residual':
+        fit = prepare_fit(data)
+        tau_fit = fit['tau'] - get_residual_plan(_opt_vars = x, _plan = fit['plan'], _ref = fit['tau'])
+        rel = fit['tau'] / tau_fit - 1
+
+        nd_dep = get_nd_dep_cached(_dn = np.array([dn]), _T = fit['params']['T'], _N_D = fit['params']['N_D'],
+                                   _N_A = fit['params']['N_A'])
+
+
+    # store extracted values for each replicate, count of each fit error
+    results = np.full((len(draws), 4), np.nan)
+    errors = {}
+
+    # iterate each replicate
+    for i, draw in enumerate(draws):
+
+        try:
+
+            # resample residuals
+            if mode == 'residual':
+                _fit = dict(fit, tau = tau_fit * (1 + rel[draw]))
+
+            # perturb inputs, directly calculate charge density dependent values
+            else:
+                _fit = prepare_fit(perturb_inputs(data = data, draw = draw), direct = True)
+
+                nd_dep = get_nd_dep_direct(_dn = np.array([dn]), _T = _fit['params']['T'],
+                                           _N_D = _fit['params']['N_D'], _N_A = _fit['params']['N_A'])
+
+            # refit from optimum, extract values
+            opt = fit_model_plan(_x0 = np.clip(x, _fit['bounds'][0], _fit['bounds'][1]), _fit = _fit)
+            results[i] = calc_fit_point(_x = opt.x, _fit = _fit, _dn = dn, _nd_dep = nd_dep)
+
+        # on fit error, leave replicate as nan, count error message
+        except Exception as e:
+            msg = '{}: {}'.format(type(e).__name__, e)
+            errors[msg] = errors.get(msg, 0) + 1
+
+
+    # return extracted values and fit errors
+    return results, errors
+
+
+
+def fit_bootstrap(data, fit, x, dn):
+
+    ''' Estimate Fit Uncertainty by Bootstrap
+
+        Refit effective lifetime model to replicates generated by resampling relative residuals or perturbing wafer
+        thickness, resistivity and optical constant, in parallel over a process pool; deterministic for given seed.
+        Options taken from data node: bootstrap (int, replicates), bootstrap_mode ('residual' or 'inputs'),
+        bootstrap_sigma (dict, relative std. dev. by input), bootstrap_level (float), bootstrap_seed (int),
+        bootstrap_workers (int)
+
+    Args:
+        data (dict): processed sinton lifetime measurement data node
+        fit (dict): model fit definition
+        x (np.array): optimal (log) optimisation variable values
+        dn (float): excess charge carrier density for extraction [ / cm^-3]
+
+    Returns:
+        dict: replicate values, standard deviation and confidence interval of J_0, t_blk, t_eff, k_val, with count
+            of failed replicates by error message
+    '''
+
+    # unpack bootstrap options
+    mode = data['bootstrap_mode'] if 'bootstrap_mode' in data.keys() else 'residual'
+    level = data['bootstrap_level'] if 'bootstrap_level' in data.keys() else 0.95
+    seed = data['bootstrap_seed'] if 'bootstrap_seed' in data.keys() else 0
+    workers = data['bootstrap_workers'] if 'bootstrap_workers' in data.keys() else (os.cpu_count() or 1)
+
+    sigma = {'wafer_thickness': 0.02, 'wafer_resistivity': 0.05, 'wafer_optical_const': 0.05}
+    if 'bootstrap_sigma' in data.keys():
+        sigma.update(data['bootstrap_sigma'])
+
+
+    # generate replicate draws; residual resample indicies or log-normal relative input scale
+    rng = np.random.default_rng(seed)
+    if mode == 'residual':
+        draws = rng.integers(0, len(fit['tau']), size = (data['bootstrap'], len(fit['tau'])))
+    else:
+        scale = [ sigma[k] for k in ['wafer_thickness', 'wafer_resistivity', 'wafer_optical_const'] ]
+        draws = np.exp(rng.standard_normal((data['bootstrap'], 3)) * scale)
+
+
+    # fit replicates serially in current process
+    if workers == 1:
+        chunks = [ bootstrap_chunk(data, x, dn, draws, mode) ]
+
+    # split replicates into chunks and fit in parallel over process pool
+    else:
+        size = -(-len(draws) // workers)
+        chunks = [ draws[j:j+size] for j in range(0, len(draws), size) ]
+
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            chunks = list(pool.map(bootstrap_chunk, [data] * len(chunks), [x] * len(chunks),
+                [dn] * len(chunks), chunks, [mode] * len(chunks)))
+
+
+    # join replicate values, sum error counts over chunks
+    values = np.vstack([ v for v, _ in chunks ])
+    errors = {}
+    for _, err in chunks:
+        for msg, n in err.items():
+            errors[msg] = errors.get(msg, 0) + n
+
+
+    # replicate values, standard deviation, confidence interval by percentile
+    names = ['J_0', 't_blk', 't_eff', 'k_val']
+    q = [ 100 * (1 - level) / 2, 100 * (1 + level) / 2 ]
+
+    boot = {'mode': mode, 'level': level, 'n': len(draws), 'failed': int(np.sum(np.isnan(values[:,2]))),
+            'errors': errors,
+            'samples': { k: values[:,i] for i, k in enumerate(names) },
+            'std': { k: np.nanstd(values[:,i]) for i, k in enumerate(names) },
+            'ci': { k: tuple(np.nanpercentile(values[:,i], q)) for i, k in enumerate(names) } }
+
+
+    # return bootstrap results
+    return boot
+
+
+
+def mlt(data):
+
+    ''' Fit Effective Lifetime Model to Measurement Data
+
+        Calculate effective carrier lifetime from model and fit to measured effective lifetime using minimisation over
+        model component parameters; return fit results and components
+
+    Args:
+        _model (str): chosen model to fit to data
+        _sample (dict): sample data node
+        _sample_state (dict): sample state data node
+        _measurement (dict): measurement data node
+        _results (dict): results data node
+
+    Returns:
+        dict: effective lifetime fit results and model components
+    '''
+
+    # prepare model fit definition
+    fit = prepare_fit(data)
+
+    params = fit['params']
+    tau = fit['tau']
+    comps = fit['comps']
+    opt_vars = fit['opt_vars']
+    inits = fit['inits']
+    bounds = fit['bounds']
+
+    T = params['T']
+    N_D = params['N_D']
+    N_A = params['N_A']
+    N_M = params['N_M']
+
+
+    # optionally fit from multiple sampled starting points within limits
+    starts = None
+    if 'starts' in data.keys():
+        opt, starts = fit_multistart(data = data, fit = fit)
+
+    # otherwise fit from initial values
+    else:
+
+        # optionally warm start from provided (log) parameter values, e.g. optimum of previous device state
+        x0 = inits
+        if 'warm_inits' in data.keys():
+            x0 = [ data['warm_inits'][v] if v in data['warm_inits'].keys() else i for v, i in zip(opt_vars, inits) ]
+            x0 = np.clip(x0, bounds[0], bounds[1])
+
+        # minimise using bounded nonlinear least-squares
+        opt = fit_model_plan(_x0 = x0, _fit = fit)
+
+    # count function and jacobian (one per iteration) evaluations
+    nfev = opt.nfev
+    njev = opt.njev
+    if starts is not None:
+        nfev += np.sum(starts['nfev'])
+        njev += np.sum(starts['njev'])
+
+
+    #### update optimisation of SRH to take t_M0 and "k" rather than t_m0, set limits on k more straight forward
+
+    ## perform automatic sensitivity analysis of opt vars
+
+
+    # total sum of squares
+    ss_tot = np.sum((tau - np.mean(tau)) ** 2)
+
+    # r-squared
+    r2 = 1 - (np.sum((opt.fun) ** 2) / ss_tot)
+
+
+    # fall back to default initial values if warm start failed to converge or fit worse than reference r-squared
+    fallback = False
+    if starts is None and 'warm_inits' in data.keys() and ( opt.status <= 0 or ('warm_r2' in data.keys() and r2 < data['warm_r2']) ):
+        fallback = True
+
+        ref = fit_model_plan(_x0 = inits, _fit = fit)
+
+        nfev += ref.nfev
+        njev += ref.njev
+
+        # keep lowest cost minimum
+        if ref.cost <= opt.cost:
+            opt = ref
+
+
+    # residual sum of squares
+    ss_res = np.sum((opt.fun) ** 2)
+
+    # r-squared
+    r2 = 1 - (ss_res / ss_tot)
+
+
+    # define new charge density range
+    dn = get_dn_range(data)
+
+
+    # use precomputed charge density dependent values over new range, e.g. from temperature sweep
+    if 'nd_dep_range' in data.keys():
+        n_i_eff, tau_rad, tau_aug = data['nd_dep_range']
+
+    # get charge density dependent values (n_i_eff, tau_aug, tau_rad) from cached lookup table
+    else:
+        n_i_eff, tau_rad, tau_aug = get_nd_dep_cached(_dn = dn, _T = T, _N_D = N_D, _N_A = N_A)
+
+    _data = {'n_i_eff': n_i_eff, 'tau_rad': tau_rad, 'tau_aug': tau_aug, 'dn': dn}
+
+
+
+    # calculate sdr, srh, and effective charge carrier lifetime from optimal parameters
+    rec = calc_tau_eff(_opt_vars = opt.x, _params = params, _data = _data, _comps = comps, _names = opt_vars)
+
+
+    # calculate bulk lifetime component
+    #rec['tau_blk'] = (rec['tau_eff']**-1 - rec['tau_sdr']**-1)**-1
+
+
+
+    #o = np.where(dn >= 1e16)
+    #rec['n_i_eff'] = n_i_eff[o][0]
+
+
+
+    # store optimal model parameters
+    rec['opt_vars'] = { opt_vars[i]: np.power(10., opt.x[i]) for i in range(len(opt_vars)) }
+
+
+    # calculate and store values
+    rec['J_0'] = rec['opt_vars']['J_0']
+
+
+    # check for specific nd value for extraction
+    if 'nd_vals' in data.keys():
+        _dn = data['nd_vals']
+    # default to 10 % doping density
+    else:
+        _dn = N_M * 0.1
+
+    j = np.where(rec['dn'] >= _dn)[0][0]
+    #j = np.where(rec['dn'] >= N_M*0.1)[0][0]
+    rec['t_blk'] = rec['tau_srh'][j]
+    rec['t_eff'] = rec['tau_eff'][j]
+    rec['t_sdr'] = rec['tau_sdr'][j]
+    rec['t_aug'] = rec['tau_aug'][j]
+    rec['t_rad'] = rec['tau_rad'][j]
+    #rec['t_BLK'] = rec['tau_blk'][j]
+
+    rec['R2'] = r2
+
+    # store optimisation cost and effort
+    rec['cost'] = opt.cost
+    rec['nfev'] = nfev
+    rec['njev'] = njev
+    # warm start only used for single start fit, multiple start fit samples own starting points
+    rec['warm_start'] = 'warm_inits' in data.keys() and starts is None
+    rec['warm_fallback'] = fallback
+
+    # store multiple start minima and spread
+    if starts is not None:
+        rec['multistart'] = starts
+
+    #rec['opt_full'] = opt
+
+
+    # calculate SRH k-value
+    t_m0 = rec['opt_vars']['t_m0']
+    t_M0 = rec['opt_vars']['t_M0']
+
+    k = t_M0/t_m0
+    rec['k_val'] = k
+
+
+    # optionally estimate confidence intervals from bootstrap refits of resampled residuals or perturbed inputs
+    if 'bootstrap' in data.keys():
+        rec['bootstrap'] = fit_bootstrap(data = data, fit = fit, x = opt.x, dn = rec['dn'][j])
+
+
+
+    if False:
+        # calculate ratio thermal velocity charge carriers
+        v_th_e, v_th_h = pvlibs.process_data.models.intrinsic.calc_v_th(T)
+
+        if data['wafer_doping'] == 'p-type':
+            v_th_r = (v_th_h/v_th_e)
+        else:
+            v_th_r = (v_th_h/v_th_e)**-1
+
+
+    # return fitting results
+    return rec
+
+
+
+def sim_model(model_params, data):
+
+    ''' Fit Effective Lifetime Model to Measurement Data
+
+        Calculate effective carrier lifetime from model and fit to measured effective lifetime using minimisation over
+        model component parameters; return fit results and components
+
+    Args:
+        _model (str): chosen model to fit to data
+        _sample (dict): sample data node
+        _sample_state (dict): sample state data node
+        _measurement (dict): measurement data node
+        _results (dict): results data node
+
+    Returns:
+        dict: effective lifetime fit results and model components
+    '''
+
+    T = data['temperature']
+    W = data['wafer_thickness']
+    N_D = data['N_D']
+    N_A = data['N_A']
+    N_M = np.max([N_D, N_A])
+
+    # initialise global parameters storage dict
+    params = {'T': T, 'W': W, 'N_M': N_M, 'N_D': N_D, 'N_A': N_A}
+
+
+    # define new charge density range
+    dn = np.logspace(13, 17, 100)
+
+    # get charge density dependent values (n_i_eff, tau_aug, tau_rad) from cached lookup table
+    n_i_eff, tau_rad, tau_aug = get_nd_dep_cached(_dn = dn, _T = T, _N_D = N_D, _N_A = N_A)
+
+    data = {'n_i_eff': n_i_eff, 'tau_rad': tau_rad, 'tau_aug': tau_aug, 'dn': dn}
+
+
+    # define model, initial parameter values, parameter limits; (log values for parameters)
+    model = model_params['model_params']
+
+
+    comps = [ k for k in model.keys() ]
+    inits = [ np.log10(i) for v in model.values() if len(v) != 0 for i in v['inits'] ]
+    opt_vars = [ p for v in model.values() if len(v) != 0 for p in v['params'] ]
+
+
+    # calculate sdr, srh, and effective charge carrier lifetime from optimal parameters
+    rec = calc_tau_eff(_opt_vars = inits, _params = params, _data = data, _comps = comps, _names = opt_vars)
+
+
+    # calculate bulk lifetime component
+    rec['tau_blk'] = (rec['tau_eff']**-1 - rec['tau_sdr']**-1)**-1
+
+    rec['n_i_eff'] = n_i_eff
+
+
+    # store optimal model parameters
+    rec['opt_vars'] = { opt_vars[i]: np.power(10., inits[i]) for i in range(len(inits)) }
+
+
+    # calculate and store values
+    rec['J_0'] = rec['opt_vars']['J_0']
+
+    j = np.where(rec['dn'] >= N_M*0.1)[0][0]
+    rec['t_blk'] = rec['tau_srh'][j]
+    rec['t_eff'] = rec['tau_eff'][j]
+    rec['t_sdr'] = rec['tau_sdr'][j]
+
+
+    # return fitting results
+    return rec
+
+
+
+
+
+''' Batch Processing Functions '''
+
+def mlt_chunk(nodes):
+
+    ''' Fit Effective Lifetime Model to Chunk of Measurements
+
+        Fit effective lifetime model to each measurement in chunk within a single process, sharing cached charge
+        density dependent lookup tables; failures are caught and returned per measurement
+
+    Args:
+        nodes (list): processed sinton lifetime measurement data nodes (dict)
+
+    Returns:
+        list: (fit results (dict), error message (str)) for each node, result None on failure
+    '''
+
+    # store fit results or error message for each node
+    results = []
+
+    # iterate each node in chunk
+    for node in nodes:
+
+        try:
+            results.append( (mlt(data = node), None) )
+
+        # on fit error, store error message and continue
+        except Exception as e:
+            results.append( (None, '{}: {}'.format(type(e).__name__, e)) )
+
+
+    # return fit results
+    return results
+
+
+
+def mlt_batch(nodes, workers = None):
+
+    ''' Fit Effective Lifetime Model to Batch of Measurements
+
+        Group measurements by wafer parameters (T, N_D, N_A) such that charge density dependent physics is calculated
+        once per group per process, split groups into chunks and fit in parallel over a process pool; fit failures are
+        reported per measurement without aborting the batch
+
+    Args:
+        nodes (list): processed sinton lifetime measurement data nodes (dict)
+        workers (int): number of worker processes, default cpu count; fit serially in current process if 1
+
+    Returns:
+        results (list): fit results (dict) for each node in order, None on failure
+        failures (dict): error message (str) by node index for each failed fit
+    '''
+
+    # set number of worker processes
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+
+    # group node indicies by rounded wafer parameters
+    groups = {}
+    for i, node in enumerate(nodes):
+        key = tuple( '{:.6g}'.format(node[k]) if k in node.keys() else None for k in ['temperature', 'N_D', 'N_A'] )
+        groups.setdefault(key, []).append(i)
+
+
+    # split each group into chunks, spread across available workers
+    chunks = []
+    for index in groups.values():
+        size = -(-len(index) // workers)
+        chunks.extend( index[j:j+size] for j in range(0, len(index), size) )
+
+
+    # fit each chunk serially in current process
+    if workers == 1:
+        fits = [ mlt_chunk([ nodes[i] for i in chunk ]) for chunk in chunks ]
+
+    # fit chunks in parallel over process pool
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            fits = list(pool.map(mlt_chunk, [ [ nodes[i] for i in chunk ] for chunk in chunks ]))
+
+
+    # unpack fit results in original node order, collect failures
+    results = [None] * len(nodes)
+    failures = {}
+
+    for chunk, fit in zip(chunks, fits):
+        for i, (rec, err) in zip(chunk, fit):
+            results[i] = rec
+            if err is not None:
+                failures[i] = err
+
+
+    # return fit results and failures
+    return results, failures
+
+
+
+def mlt_warm_chunk(nodes, warm = 'previous', tol = 0.02):
+
+    ''' Fit Effective Lifetime Model to Device State Sequence
+
+        Fit effective lifetime model to each state of a single device in process order, warm starting each fit from
+        the optimal parameters of the previous state or the median over all prior states of the device; fits fall back
+        to default initial values where the warm start fails or r-squared drops more than tol below the seed fit
+
+    Args:
+        nodes (list): processed sinton lifetime measurement data nodes (dict) of one device, in process order
+        warm (str): warm start seed, 'previous' state optimum or 'median' of prior state optima
+        tol (float): allowed r-squared reduction relative to seed fit before fall back to default initial values
+
+    Returns:
+        list: (fit results (dict), error message (str)) for each node, result None on failure
+    '''
+
+    # store fit results or error message for each node, optimal (log) parameters and r-squared of prior fits
+    results = []
+    seeds = []
+
+    # iterate each node in sequence
+    for node in nodes:
+
+        # warm start from prior fits, first state fit from default initial values
+        data = node
+        if len(seeds) > 0:
+
+            # select seed parameters and reference r-squared
+            if warm == 'median':
+                inits = { k: np.median([ s[0][k] for s in seeds if k in s[0].keys() ]) for k in seeds[-1][0].keys() }
+                r2 = np.median([ s[1] for s in seeds ])
+            else:
+                inits, r2 = seeds[-1]
+
+            # copy node to avoid storing warm start values
+            data = dict(node, warm_inits = inits, warm_r2 = r2 - tol)
+
+        try:
+            rec = mlt(data = data)
+            results.append( (rec, None) )
+
+            # store optimal (log) parameters as seed for subsequent states
+            seeds.append( ({ k: np.log10(v) for k, v in rec['opt_vars'].items() }, rec['R2']) )
+
+        # on fit error, store error message and continue
+        except Exception as e:
+            results.append( (None, '{}: {}'.format(type(e).__name__, e)) )
+
+
+    # return fit results
+    return results
+
+
+
+def mlt_warm_batch(nodes, warm = 'previous', tol = 0.02, order = None, workers = None):
+
+    ''' Fit Effective Lifetime Model to Batch of Measurements with Warm Start
+
+        Group measurements by device (device_id), order each group by process step (device_state), fit each device
+        sequence with warm start in parallel over a process pool; fit failures are reported per measurement
+
+    Args:
+        nodes (list): processed sinton lifetime measurement data nodes (dict)
+        warm (str): warm start seed, 'previous' state optimum or 'median' of prior state optima
+        tol (float): allowed r-squared reduction relative to seed fit before fall back to default initial values
+        order (list): device_state values in process order, default node order within each device
+        workers (int): number of worker processes, default cpu count; fit serially in current process if 1
+
+    Returns:
+        results (list): fit results (dict) for each node in order, None on failure
+        failures (dict): error message (str) by node index for each failed fit
+    '''
+
+    # set number of worker processes
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+
+    # group node indicies by device, nodes without device id fit individually
+    groups = {}
+    for i, node in enumerate(nodes):
+        key = node['device_id'] if 'device_id' in node.keys() else ('node', i)
+        groups.setdefault(key, []).append(i)
+
+    # sort each device sequence by process order of device state, unknown states last
+    chunks = list(groups.values())
+    if order is not None:
+        rank = lambda i: order.index(nodes[i]['device_state']) if nodes[i].get('device_state') in order else len(order)
+        chunks = [ sorted(chunk, key = rank) for chunk in chunks ]
+
+
+    # fit each device sequence serially in current process
+    if workers == 1:
+        fits = [ mlt_warm_chunk([ nodes[i] for i in chunk ], warm, tol) for chunk in chunks ]
+
+    # fit device sequences in parallel over process pool
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            fits = list(pool.map(mlt_warm_chunk, [ [ nodes[i] for i in chunk ] for chunk in chunks ],
+                [warm] * len(chunks), [tol] * len(chunks)))
+
+
+    # unpack fit results in original node order, collect failures
+    results = [None] * len(nodes)
+    failures = {}
+
+    for chunk, fit in zip(chunks, fits):
+        for i, (rec, err) in zip(chunk, fit):
+            results[i] = rec
+            if err is not None:
+                failures[i] = err
+
+
+    # return fit results and failures
+    return results, failures
+
+
+
+def get_temp_sweep_data(nodes):
+
+    ''' Get Temperature Sweep Data
+
+        Calculate charge density dependent values for every temperature of a single wafer in one broadcast (T, dn)
+        calculation over measured and output charge density ranges (rows padded to equal length)
+
+    Args:
+        nodes (list): processed sinton lifetime measurement data nodes (dict) of one wafer, in temperature order
+
+    Returns:
+        list: copied nodes (dict) with precomputed values (nd_dep, nd_dep_range)
+    '''
+
+    # measured charge density within fit range and output charge density range for each temperature
+    rows = [ np.concatenate([ node['nd'][get_nd_index(node)], get_dn_range(node) ]) for node in nodes ]
+
+    # pad rows to equal length by repeating last value
+    size = max( len(r) for r in rows )
+    dn = np.vstack([ np.pad(r, (0, size - len(r)), mode = 'edge') for r in rows ])
+
+
+    # calculate charge density dependent values for all temperatures
+    T = np.array([ node['temperature'] for node in nodes ], dtype = np.float64)
+    nd_dep = get_nd_dep_sweep(_dn = dn, _T = T, _N_D = nodes[0]['N_D'], _N_A = nodes[0]['N_A'])
+
+
+    # split values into measured and output ranges, copy nodes to avoid storing precomputed values
+    data = []
+    for i, node in enumerate(nodes):
+        k = len(get_nd_index(node)); m = len(rows[i])
+        data.append( dict(node, nd_dep = tuple( v[i,:k] for v in nd_dep ),
+                          nd_dep_range = tuple( v[i,k:m] for v in nd_dep )) )
+
+
+    # return nodes with precomputed values
+    return data
+
+
+
+def mlt_temp_chunk(nodes, tol = 0.02):
+
+    ''' Fit Effective Lifetime Model to Temperature Sweep
+
+        Fit effective lifetime model to all temperatures of a single wafer together; charge density dependent values
+        for every temperature calculated together, then each temperature fit in order warm started from the optimum
+        of the previous temperature; where calculation fails each measurement is fit alone, such that errors are
+        attributed to the failed measurement
+
+    Args:
+        nodes (list): processed sinton lifetime measurement data nodes (dict) of one wafer, in temperature order
+        tol (float): allowed r-squared reduction relative to seed fit before fall back to default initial values
+
+    Returns:
+        list: (fit results (dict), error message (str)) for each node, result None on failure
+    '''
+
+    # fit each temperature in order, warm start from previous temperature
+    try:
+        data = get_temp_sweep_data(nodes)
+
+    # on calculation error, fit each node alone, store error message only for failed nodes
+    except Exception:
+        results = []
+        for node in nodes:
+            try:
+                results.extend( mlt_warm_chunk(get_temp_sweep_data([node]), warm = 'previous', tol = tol) )
+            except Exception as e:
+                results.append( (None, '{}: {}'.format(type(e).__name__, e)) )
+
+        return results
+
+
+    # return fit results
+    return mlt_warm_chunk(data, warm = 'previous', tol = tol)
+
+
+
+def mlt_temp_batch(nodes, tol = 0.02, workers = None):
+
+    ''' Fit Effective Lifetime Model to Batch of Temperature Sweeps
+
+        Group measurements by wafer (device_id, device_state, N_D, N_A), order each group by temperature, fit each
+        temperature sweep together in parallel over a process pool; measurements without device_id are fit
+        individually; fit failures are reported per measurement
+
+    Args:
+        nodes (list): processed sinton lifetime measurement data nodes (dict)
+        tol (float): allowed r-squared reduction relative to seed fit before fall back to default initial values
+        workers (int): number of worker processes, default cpu count; fit serially in current process if 1
+
+    Returns:
+        results (list): fit results (dict) for each node in order, None on failure
+        failures (dict): error message (str) by node index for each failed fit
+    '''
+
+    # set number of worker processes
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+
+    # group node indicies by wafer and rounded doping density, nodes without device id fit individually; nodes
+    # without valid temperature or doping density reported as failed
+    groups = {}
+    failures = {}
+    for i, node in enumerate(nodes):
+        try:
+            float(node['temperature'])
+            doping = tuple( '{:.6g}'.format(node[k]) for k in ['N_D', 'N_A'] )
+        except Exception as e:
+            failures[i] = '{}: {}'.format(type(e).__name__, e)
+            continue
+
+        key = ( node['device_id'], node.get('device_state') ) + doping if 'device_id' in node.keys() else ('node', i)
+        groups.setdefault(key, []).append(i)
+
+    # sort each wafer sequence by temperature
+    chunks = [ sorted(chunk, key = lambda i: float(nodes[i]['temperature'])) for chunk in groups.values() ]
+
+
+    # fit each temperature sweep serially in current process
+    if workers == 1:
+        fits = [ mlt_temp_chunk([ nodes[i] for i in chunk ], tol) for chunk in chunks ]
+
+    # fit temperature sweeps in parallel over process pool
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            fits = list(pool.map(mlt_temp_chunk, [ [ nodes[i] for i in chunk ] for chunk in chunks ],
+                [tol] * len(chunks)))
+
+
+    # unpack fit results in original node order, collect failures
+    results = [None] * len(nodes)
+
+    for chunk, fit in zip(chunks, fits):
+        for i, (rec, err) in zip(chunk, fit):
+            results[i] = rec
+            if err is not None:
+                failures[i] = err
 
 
+    # return fit results and failures
+    return results, failures
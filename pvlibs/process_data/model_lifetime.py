@@ -27,11 +27,14 @@ from scipy import optimize
 from . import models
 
 # wafer property calculation functions
-from .wafer import calc_wafer_intrinsic, calc_wafer_equilibrium
+from .wafer import get_wafer_state
 
 # charge density dependent calculation functions
 from .charge_density import calc_wafer_nonequilibrium
 
+# analytic effective lifetime residual jacobian
+from .mlt import get_residual_jac
+
 
 
 ''' Core Calculation Functions '''
@@ -58,44 +61,18 @@ def get_nd_dep(_dn, _T, _N_D, _N_A, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n_i, _n_i_0
             dn (np.array): excess charge carrier density [ / cm^-3]
     '''
 
-    # initialise results storage list
-    n_i_eff = []
-    tau_rad = []
-    tau_aug = []
-
-
-    # iterate each charge density value
-    for i in range(len(_dn)):
-
-        # calculate non-equilibrium values
-        n, p, _n_i_eff = calc_wafer_nonequilibrium(_T = _T, _N_D = _N_D, _N_A = _N_A, _E_c_i = _E_c_i, _E_v_i = _E_v_i,
+    # calculate non-equilibrium values over full charge density range
+    n, p, n_i_eff = calc_wafer_nonequilibrium(_T = _T, _N_D = _N_D, _N_A = _N_A, _E_c_i = _E_c_i, _E_v_i = _E_v_i,
                                               _N_c_i = _N_c_i, _N_v_i = _N_v_i, _n_i = _n_i, _n_i_0 = _n_i_0,
-                                              _dn = _dn[i], _dp = _dn[i])
-
-
-        # store calculated value
-        n_i_eff.append( _n_i_eff )
-
-
-        # calculate radiative recombination lifetime
-        _tau_rad = models.calc_tau_rad(_dn = _dn[i], _n = n, _p = p, _n_i_eff = _n_i_eff, _T = _T)
-
-        # store calculated value
-        tau_rad.append( _tau_rad )
-
+                                              _dn = _dn, _dp = _dn)
 
-        # calculate auger recombination lifetime
-        _tau_aug = models.calc_tau_aug(_dn = _dn[i], _n = n, _p = p, _n_0 = _n_0, _p_0 = _p_0, _n_i_eff = _n_i_eff,
-                                      _T = _T)
 
-        # store calculated value
-        tau_aug.append( _tau_aug )
+    # calculate radiative recombination lifetime
+    tau_rad = models.calc_tau_rad(_dn = _dn, _n = n, _p = p, _n_i_eff = n_i_eff, _T = _T)
 
 
-    # pack results lists into arrays
-    n_i_eff = np.array(n_i_eff)
-    tau_rad = np.array(tau_rad)
-    tau_aug = np.array(tau_aug)
+    # calculate auger recombination lifetime
+    tau_aug = models.calc_tau_aug(_dn = _dn, _n = n, _p = p, _n_0 = _n_0, _p_0 = _p_0, _n_i_eff = n_i_eff, _T = _T)
 
 
     # return calculated non-equilibrium effective intrinsic carrier concentration as array
@@ -242,13 +219,8 @@ def fit_model(_model_params, _sample, _sample_state, _measurement, _results):
     params = {'T': T, 'W': W, 'N_M': N_M, 'N_D': N_D, 'N_A': N_A}
 
 
-    # intrinsic calculation
-    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = T)
-
-
-    # calculate effective equilibrium parameters
-    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+    # get memoised intrinsic and equilibrium wafer parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = T, _N_D = N_D, _N_A = N_A)
 
 
     # unpack required data to fit model
@@ -424,13 +396,8 @@ def sim_model(_model_params, _sample, _sample_state, _measurement, _results):
     params = {'T': T, 'W': W, 'N_M': N_M, 'N_D': N_D, 'N_A': N_A}
 
 
-    # intrinsic calculation
-    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = T)
-
-
-    # calculate effective equilibrium parameters
-    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+    # get memoised intrinsic and equilibrium wafer parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = T, _N_D = N_D, _N_A = N_A)
 
 
     # define new charge density range
@@ -509,13 +476,8 @@ def quick_fit_model(model, params, data):
     params = {'T': T, 'W': W, 'N_M': N_M, 'N_D': N_D, 'N_A': N_A}
 
 
-    # intrinsic calculation
-    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = T)
-
-
-    # calculate effective equilibrium parameters
-    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = T, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+    # get memoised intrinsic and equilibrium wafer parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = T, _N_D = N_D, _N_A = N_A)
 
 
     # unpack required data to fit model
@@ -537,6 +499,12 @@ def quick_fit_model(model, params, data):
     data = {'n_i_eff': n_i_eff, 'tau_rad': tau_rad, 'tau_aug': tau_aug, 'dn': nd}
 
 
+    # use analytic jacobian by default, optionally fall back to numerical approximation (e.g. '3-point')
+    jac = get_residual_jac
+    if 'jac' in model.keys() and model['jac'] != 'analytic':
+        jac = model['jac']
+
+
     # define model, initial parameter values, parameter limits; (log values for parameters)
     model = {'aug':{}, 'rad':{},
              'sdr':{'params':['J_0'],
@@ -557,7 +525,7 @@ def quick_fit_model(model, params, data):
 
     # minimise using bounded nonlinear least-squares
     opt = optimize.least_squares(fun = get_residual, x0 = inits, bounds = bounds,
-        args = (params, data, tau, comps, opt_vars), jac = '3-point',
+        args = (params, data, tau, comps, opt_vars), jac = jac,
         method = 'trf', ftol = 1e-10, xtol = 1e-12, gtol = 1e-12, x_scale = 'jac', loss = 'cauchy')
 
 
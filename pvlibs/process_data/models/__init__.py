@@ -22,5 +22,8 @@ from .fermi_stats import calc_F_half, calc_F_half_inv, calc_E_f, calc_gamma_dege
 # charge carrier dependent models
 from .charge_carrier import calc_np, calc_dE_bgn
 
+# diode equivalent circuit models
+from .diode import calc_I_sd, calc_dI_sd, calc_I_dd, calc_dI_dd
+
 
 
@@ -0,0 +1,200 @@
+
+'''
+    Diode Model Functions
+
+'''
+
+
+
+''' Imports '''
+
+# data array processing
+import numpy as np
+
+# wright omega function, lambert w of exponential argument
+from scipy.special import wrightomega
+
+
+# general calculation functions
+from .general import calc_V_T
+
+
+
+''' Single Diode Model Functions '''
+
+def calc_I_sd(_V, _I_ph, _I_0, _n, _R_s, _R_sh, _T):
+
+    ''' Calculate Single Diode Current
+
+        Calculates current of single diode equivalent circuit at given voltage, explicit solution by Lambert W function
+        evaluated in log space (wright omega) to avoid overflow in forward bias
+
+    Args:
+        _V (np.array): voltage [V]
+        _I_ph (np.array): photogenerated current [A]
+        _I_0 (np.array): diode saturation current [A]
+        _n (np.array): diode ideality factor
+        _R_s (np.array): series resistance [Ohm]
+        _R_sh (np.array): shunt resistance [Ohm]
+        _T (np.array): temperature [K]
+
+    Returns:
+        I (np.array): current [A], positive in reverse bias
+    '''
+
+    # modified thermal voltage, total resistance
+    a = _n * calc_V_T(_T)
+    G = _R_s + _R_sh
+
+    # log of lambert w argument
+    z = np.log(_R_s * _R_sh * _I_0 / (a * G)) + _R_sh * (_R_s * (_I_ph + _I_0) + _V) / (a * G)
+
+    # calculate current from explicit solution
+    I = (_R_sh * (_I_ph + _I_0) - _V) / G - (a / _R_s) * wrightomega(z)
+
+
+    # return calculated current
+    return I
+
+
+
+def calc_dI_sd(_V, _I, _I_ph, _I_0, _n, _R_s, _R_sh, _T):
+
+    ''' Calculate Single Diode Current Derivatives
+
+        Calculates analytic derivatives of single diode current with respect to each model parameter at solved current,
+        by implicit differentiation of the circuit equation
+
+    Args:
+        _V (np.array): voltage [V]
+        _I (np.array): solved current [A]
+        _I_ph, _I_0, _n, _R_s, _R_sh (np.array): single diode model parameters, as calc_I_sd
+        _T (np.array): temperature [K]
+
+    Returns:
+        dI (np.array): current derivatives, stacked on last axis (I_ph, I_0, n, R_s, R_sh)
+    '''
+
+    # modified thermal voltage, junction voltage, diode rectification
+    a = _n * calc_V_T(_T)
+    V_j = _V + _I * _R_s
+    X = np.exp(np.minimum(V_j / a, 700.))
+
+    # junction conductance, implicit derivative denominator
+    g = _I_0 * X / a + 1 / _R_sh
+    d = 1 + _R_s * g
+
+
+    # parameter derivatives of circuit equation, scaled by denominator
+    dI = np.stack([
+        np.ones_like(V_j),
+        -(X - 1),
+        _I_0 * X * V_j / (a * _n),
+        -_I * g,
+        V_j / _R_sh**2,
+    ], axis = -1) / d[..., None]
+
+
+    # return calculated derivatives
+    return dI
+
+
+
+''' Double Diode Model Functions '''
+
+def calc_I_dd(_V, _I_ph, _I_01, _I_02, _n_1, _n_2, _R_s, _R_sh, _T, _tol = 1e-12, _max_iter = 50):
+
+    ''' Calculate Double Diode Current
+
+        Calculates current of double diode equivalent circuit at given voltage; initial current from single diode
+        solution of first diode, refined by Newton iteration of circuit equation (concave, monotonic in current)
+
+    Args:
+        _V (np.array): voltage [V]
+        _I_ph (np.array): photogenerated current [A]
+        _I_01 (np.array): first diode saturation current [A]
+        _I_02 (np.array): second diode saturation current [A]
+        _n_1 (np.array): first diode ideality factor
+        _n_2 (np.array): second diode ideality factor
+        _R_s (np.array): series resistance [Ohm]
+        _R_sh (np.array): shunt resistance [Ohm]
+        _T (np.array): temperature [K]
+        _tol (float): current convergence tolerance [A]
+        _max_iter (int): maximum iterations
+
+    Returns:
+        I (np.array): current [A], positive in reverse bias
+    '''
+
+    # modified thermal voltages
+    a_1 = _n_1 * calc_V_T(_T)
+    a_2 = _n_2 * calc_V_T(_T)
+
+    # initial current from single diode solution of first diode
+    I = calc_I_sd(_V, _I_ph, _I_01, _n_1, _R_s, _R_sh, _T)
+
+
+    # newton iteration of circuit equation until converged
+    for i in range(_max_iter):
+
+        V_j = _V + I * _R_s
+        X_1 = np.exp(np.minimum(V_j / a_1, 700.))
+        X_2 = np.exp(np.minimum(V_j / a_2, 700.))
+
+        F = _I_ph - _I_01 * (X_1 - 1) - _I_02 * (X_2 - 1) - V_j / _R_sh - I
+        dF = -1 - _R_s * (_I_01 * X_1 / a_1 + _I_02 * X_2 / a_2 + 1 / _R_sh)
+
+        dI = F / dF
+        I = I - dI
+
+        # converged where all finite current steps within tolerance
+        if not np.any(np.abs(dI) >= _tol):
+            break
+
+
+    # return calculated current
+    return I
+
+
+
+def calc_dI_dd(_V, _I, _I_ph, _I_01, _I_02, _n_1, _n_2, _R_s, _R_sh, _T):
+
+    ''' Calculate Double Diode Current Derivatives
+
+        Calculates analytic derivatives of double diode current with respect to each model parameter at solved current,
+        by implicit differentiation of the circuit equation; ideality factors fixed
+
+    Args:
+        _V (np.array): voltage [V]
+        _I (np.array): solved current [A]
+        _I_ph, _I_01, _I_02, _n_1, _n_2, _R_s, _R_sh (np.array): double diode model parameters, as calc_I_dd
+        _T (np.array): temperature [K]
+
+    Returns:
+        dI (np.array): current derivatives, stacked on last axis (I_ph, I_01, I_02, R_s, R_sh)
+    '''
+
+    # modified thermal voltages, junction voltage, diode rectification
+    a_1 = _n_1 * calc_V_T(_T)
+    a_2 = _n_2 * calc_V_T(_T)
+    V_j = _V + _I * _R_s
+    X_1 = np.exp(np.minimum(V_j / a_1, 700.))
+    X_2 = np.exp(np.minimum(V_j / a_2, 700.))
+
+    # junction conductance, implicit derivative denominator
+    g = _I_01 * X_1 / a_1 + _I_02 * X_2 / a_2 + 1 / _R_sh
+    d = 1 + _R_s * g
+
+
+    # parameter derivatives of circuit equation, scaled by denominator
+    dI = np.stack([
+        np.ones_like(V_j),
+        -(X_1 - 1),
+        -(X_2 - 1),
+        -_I * g,
+        V_j / _R_sh**2,
+    ], axis = -1) / d[..., None]
+
+
+    # return calculated derivatives
+    return dI
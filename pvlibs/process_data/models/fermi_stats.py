@@ -20,24 +20,32 @@ def calc_F_half(_eta):
 
         Approximate Fermi integral of order 1/2 - Unger, Phys. Stat. Sol., 1988 [10.1002/pssb.2221490254]
 
+        Accepts scalar or array input of any shape; each piecewise region is evaluated only over its masked elements
+
     Args:
-        _eta (float): energy level [J]
+        _eta (float | np.array): energy level [J]
 
     Returns:
-        F_half (float): Fermi Statistics of Order 1/2 [ ]
+        F_half (float | np.array): Fermi Statistics of Order 1/2 [ ]
     '''
 
-    z = np.log(1 + np.exp(_eta))
+    # cast energy level to array, initialise results storage
+    eta = np.asarray(_eta, dtype = np.float64)
+    F_half = np.empty(eta.shape)
+
 
-    if _eta <= 3:
-        F_half = z + 0.1535 * z**2
+    # non-degenerate region
+    j = (eta <= 3)
+    z = np.log(1 + np.exp(eta[j]))
+    F_half[j] = z + 0.1535 * z**2
 
-    else:
-        F_half = (4 / (3 * np.pi**0.5)) * (_eta**2 + 1.7788)**(3/4)
+    # degenerate region
+    j = ~j
+    F_half[j] = (4 / (3 * np.pi**0.5)) * (eta[j]**2 + 1.7788)**(3/4)
 
 
-    # return calculated Fermi statistics
-    return F_half
+    # return calculated Fermi statistics, as scalar for scalar input
+    return F_half[()]
 
 
 
@@ -47,26 +55,35 @@ def calc_F_half_inv(_f):
 
         Approximate inverse Fermi integral of order 1/2 - Unger, Phys. Stat. Sol., 1988 [10.1002/pssb.2221490254]
 
+        Accepts scalar or array input of any shape; each piecewise region is evaluated only over its masked elements
+
     Args:
-        _f (float): energy level [ ]
+        _f (float | np.array): energy level [ ]
 
     Returns:
-        F_half (float): Inverse Fermi statistics of order 1/2 [J]
+        F_half (float | np.array): Inverse Fermi statistics of order 1/2 [J]
     '''
 
+    # cast fractional population to array, initialise results storage
+    f = np.asarray(_f, dtype = np.float64)
+    F_half_inv = np.empty(f.shape)
+
 
-    if _f < 1e-2: ## required to avoid div by zero error
-        F_half_inv = np.log(_f + 1e-16)
+    # low population region, offset required to avoid div by zero error
+    j = (f < 1e-2)
+    F_half_inv[j] = np.log(f[j] + 1e-16)
 
-    elif _f <= 4.475:
-        F_half_inv = np.log(-1 + np.exp((-1 + (1 + 0.614 * _f)**(1/2)) / 0.307))
+    # intermediate population region
+    k = ~j & (f <= 4.475)
+    F_half_inv[k] = np.log(-1 + np.exp((-1 + (1 + 0.614 * f[k])**(1/2)) / 0.307))
 
-    else:
-        F_half_inv = (((3/4) * _f * np.pi**(1/2))**(4/3) - 1.7788)**(1/2)
+    # degenerate population region
+    k = ~j & ~k
+    F_half_inv[k] = (((3/4) * f[k] * np.pi**(1/2))**(4/3) - 1.7788)**(1/2)
 
 
-    # return calculated inverse Fermi statistics
-    return F_half_inv
+    # return calculated inverse Fermi statistics, as scalar for scalar input
+    return F_half_inv[()]
 
 
 
@@ -77,17 +94,17 @@ def calc_E_f(_E_c, _E_v, _n, _p, _T, _N_c_i, _N_v_i):
         Fermi energy level using Fermi-Dirac Statistics relative to intrinsic Fermi level energy
 
     Args:
-        _E_c (float): conduction band energy relative to intrinsic Fermi level [eV]
-        _E_v (float): valance band energy relative to intrinsic Fermi level [eV]
-        _n (float): electron concentration [ / cm^-3]
-        _p (float): hole concentration [ / cm^-3]
+        _E_c (float | np.array): conduction band energy relative to intrinsic Fermi level [eV]
+        _E_v (float | np.array): valance band energy relative to intrinsic Fermi level [eV]
+        _n (float | np.array): electron concentration [ / cm^-3]
+        _p (float | np.array): hole concentration [ / cm^-3]
         _T (float): temperature [K]
         _N_c_i (float): intrinsic conduction band density of states [ / cm^3]
         _N_v_i (float): intrinsic valance band density of states [ / cm^3]
 
     Returns:
-        E_f_n (float): electron Fermi level energy [eV]
-        E_f_p (float): hole Fermi level energy [eV]
+        E_f_n (float | np.array): electron Fermi level energy [eV]
+        E_f_p (float | np.array): hole Fermi level energy [eV]
     '''
 
     # Boltzmann constant [J / K]
@@ -119,14 +136,14 @@ def calc_gamma_degen(_E_c, _E_v, _E_f_n, _E_f_p, _T):
         Calculates the degeneracy correction factor
 
     Args:
-        _E_c (float): conduction band energy relative to equilibrium Fermi level [eV]
-        _E_v (float): valance band energy relative to equilibrium Fermi level [eV]
-        _E_f_n (float): electron Fermi level energy [eV]
-        _E_f_p (float): hole Fermi level energy [eV]
+        _E_c (float | np.array): conduction band energy relative to equilibrium Fermi level [eV]
+        _E_v (float | np.array): valance band energy relative to equilibrium Fermi level [eV]
+        _E_f_n (float | np.array): electron Fermi level energy [eV]
+        _E_f_p (float | np.array): hole Fermi level energy [eV]
         _T (float): temperature [K]
 
     Returns:
-        gamma_degen (float): degeneracy correction factor [ ]
+        gamma_degen (float | np.array): degeneracy correction factor [ ]
     '''
 
     # Boltzmann constant [J / K]
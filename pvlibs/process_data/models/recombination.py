@@ -28,7 +28,7 @@ def calc_tau_aug(_dn, _n, _p, _n_0, _p_0, _n_i_eff, _T):
         _n (float): total electron concentration [ / cm^-3]
         _p (float): total hole concentration [ / cm^-3]
         _n_i_eff (float): effective intrinsic carrier concentration [ / cm^3]
-        _T (float) - temperature [K]
+        _T (float | np.array) - temperature [K]
 
     Returns:
         tau_aug (float): auger recombination lifetime [ / s]
@@ -128,7 +128,7 @@ def calc_tau_rad(_dn, _n, _p, _n_i_eff, _T):
         _n (float): total electron concentration [ / cm^-3]
         _p (float): total hole concentration [ / cm^-3]
         _n_i_eff (float): effective intrinsic carrier concentration [ / cm^3]
-        _T (float) - temperature [K]
+        _T (float | np.array) - temperature [K]
 
     Returns:
         tau_r (float): radiative recombination lifetime [ / s]
@@ -30,6 +30,9 @@ from scipy.signal import correlate
 # database search functions
 from .. import database
 
+# lazy image handles
+from ..general.image import get_image
+
 
 
 ''' Core Calculation Functions '''
@@ -82,6 +85,9 @@ def process_photoluminescence_image(_db, ):
 
 def rotate_zero_image(_img, _angle_lim = 1.5, _angle_step = 0.1, _edge = .1):
 
+    # load image array from lazy handle
+    _img = get_image(_img)
+
 
     #pad_img = np.pad(_img, ((20,20),(20,20)), 'constant')
 
@@ -146,6 +152,9 @@ def rotate_zero_image(_img, _angle_lim = 1.5, _angle_step = 0.1, _edge = .1):
 
 def get_angle_edges(_img, _angle_lim = 1.5, _angle_step = 0.1, _edge = .1):
 
+    # load image array from lazy handle
+    _img = get_image(_img)
+
 
     #pad_img = np.pad(_img, ((20,20),(20,20)), 'constant')
 
@@ -211,6 +220,9 @@ def get_angle_edges(_img, _angle_lim = 1.5, _angle_step = 0.1, _edge = .1):
 
 def rotate_zero_shift_image(_img, _angle_lim = 1.5, _angle_step = 0.1, _edge = .1, crop = False):
 
+    # load image array from lazy handle
+    _img = get_image(_img)
+
     top = []; bottom = []; left = []; right = []
     angles = np.arange(-_angle_lim, _angle_lim, _angle_step)
     for i in range(len(angles)):
@@ -274,6 +286,10 @@ def rotate_zero_shift_image(_img, _angle_lim = 1.5, _angle_step = 0.1, _edge = .
 
 def get_diff_image(_img, _ref, s = 5):
 
+    # load image arrays from lazy handles
+    _img = get_image(_img)
+    _ref = get_image(_ref)
+
     _pre = _ref
     _post = _img
 
@@ -300,6 +316,10 @@ def get_diff_image(_img, _ref, s = 5):
 
 def align_images(_img, _ref, _mode = 'rough'):
 
+    # load image arrays from lazy handles
+    _img = get_image(_img)
+    _ref = get_image(_ref)
+
 
     if _mode == 'fine':
         scale = .5
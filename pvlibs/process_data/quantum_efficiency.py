@@ -25,6 +25,9 @@ import os
 # database search functions
 from .. import database
 
+# parsed data cache
+from ..general.cache import cache_parse
+
 
 
 ''' Data Processing Functions '''
@@ -143,8 +146,31 @@ def get_solar_spectrum():
         dict: solar spectrum dataset
     '''
 
+    # import air mass solar spectrum, parsed once and cached
+    data = read_solar_spectrum(file_path = os.path.dirname(__file__) + '/../data/' + 'solar-spec.xls')
+
+
+    # return calculated results
+    return data
+
+
+
+@cache_parse
+def read_solar_spectrum(file_path):
+
+    ''' Read Solar Spectrum
+
+        Parse air mass solar spectrum workbook, trim wavelength range
+
+    Args:
+        file_path (str): full file path of solar spectrum workbook
+
+    Returns:
+        dict: solar spectrum dataset
+    '''
+
     # import air mass solar spectrum
-    sol = pd.read_excel(os.path.dirname(__file__) + '/../data/' + 'solar-spec.xls', skiprows = 1)
+    sol = pd.read_excel(file_path, skiprows = 1)
 
     # extract each dataset
     sol_am0 = sol.iloc[:, -2:].values
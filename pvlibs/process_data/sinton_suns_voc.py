@@ -23,7 +23,7 @@ from scipy.signal import savgol_filter
 
 
 # wafer property calculation functions
-from .wafer import calc_wafer_doping_density, calc_wafer_intrinsic, calc_wafer_equilibrium
+from .wafer import calc_wafer_doping_density, get_wafer_state
 
 # charge density dependent calculation functions
 from .charge_density import calc_wafer_nonequilibrium
@@ -99,12 +99,8 @@ def process_standard(_wafer_doping_type, _wafer_resistivity, _wafer_thickness, _
 
 
 
-    # calculate effective intrinsic parameters
-    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = _temperature)
-
-    # calculate effective equilibrium parameters
-    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = _temperature, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+    # get memoised intrinsic and equilibrium wafer parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = _temperature, _N_D = N_D, _N_A = N_A)
 
 
 
@@ -23,7 +23,7 @@ from scipy.signal import savgol_filter
 
 
 # wafer property calculation functions
-from .wafer import calc_wafer_doping_density, calc_wafer_intrinsic, calc_wafer_equilibrium
+from .wafer import calc_wafer_doping_density, get_wafer_state
 
 # charge density dependent calculation functions
 from .charge_density import calc_wafer_nonequilibrium
@@ -31,12 +31,74 @@ from .charge_density import calc_wafer_nonequilibrium
 
 from scipy.stats import linregress
 
-from scipy.interpolate import splev, splrep
 
 
+''' Core Calculation Functions '''
+
+def calc_trace_trim(_time, _conductance):
+
+    ''' Calculate Trace Trim Index
+
+        Use photoconductance transient first, second derivatives (single filter pass each) to locate valid measurement
+        range; strip error values at head and tail (time and noise floor), rising edge and pre-flash noise
+
+    Args:
+        _time (np.array): measurement time [s]
+        _conductance (np.array): measured conductance [C]
+
+    Returns:
+        np.array: indicies of trace elements within valid measurement range
+    '''
+
+    # strip error values at head and tail (time and noise floor)
+    i = np.where( (_time > 0.) & (_conductance > 2e-4) )[0]
+    x = _time[i]
+    y = _conductance[i]
+
+    # calculate first, second derivative
+    dy = savgol_filter(y, 15, 2, deriv = 1, mode = 'nearest')
+    ddy = savgol_filter(y, 15, 2, deriv = 2, mode = 'nearest')
+
+    # strip error values
+    j = np.where( (y > 1e-3) & (dy > 0.) )[0]
+    if len(j) > 0:
+        i = i[(j[-1]+1):]
+        x = x[(j[-1]+1):]
+        ddy = ddy[(j[-1]+1):]
+
+    k = np.where( (ddy == ddy.max()) )[0][0]
+    j = np.where( (ddy < 0.) & (x < x[k]) )[0]
+    if len(j) > 0:
+        i = i[(j[-1]+1):]
+
+
+    # return trim index
+    return i
+
+
+
+def get_trace_trim(data):
+
+    ''' Get Trace Trim Index
+
+        Get trim index cached on measurement data node (trim_index) from previous processing, otherwise calculate
+        from photoconductance transient
+
+    Args:
+        data (dict): sinton lifetime measurement data node
+
+    Returns:
+        np.array: indicies of trace elements within valid measurement range
+    '''
+
+    # use cached trim index
+    if 'trim_index' in data.keys():
+        return data['trim_index']
+
+    # return calculated trim index
+    return calc_trace_trim(_time = data['time'], _conductance = data['conductance'])
 
 
-''' Core Calculation Functions '''
 
 def calc_charge_density(_N_M, _wafer_thickness, _conductance):
 
@@ -79,12 +141,14 @@ def calc_lifetime(_time, _nd, _illumination, _wafer_optical_const, _wafer_thickn
         Calculate minority charge carrier lifetime as a function of time from charge density derivative; ref: Sinton
         Instruments
 
+        Equal length traces may be stacked as rows, with wafer constants as column arrays
+
     Args:
         _time (np.array): measurement time [s]
         _nd (np.array): minority carrier density [ / cm^3]
         _illumination (np.array): illumination photon density [ / cm^3]
-        _wafer_optical_const (float): wafer optical constant [ ]
-        _wafer_thickness (float): wafer thickness [cm]
+        _wafer_optical_const (float | np.array): wafer optical constant [ ]
+        _wafer_thickness (float | np.array): wafer thickness [cm]
         _illumination_mode: measurement illumination mode ['gen' | 'trans']
 
     Returns:
@@ -93,8 +157,8 @@ def calc_lifetime(_time, _nd, _illumination, _wafer_optical_const, _wafer_thickn
 
     ## calculate derevative of charge density with respect to time
 
-    # get sampling rate (s)
-    sample_rate = _time.ptp() / (_time.shape[0] - 1)
+    # get sampling rate (s) of each trace
+    sample_rate = np.ptp(_time, axis = -1, keepdims = True) / (_time.shape[-1] - 1)
 
     # apply savitzky-golay filter with minimal smoothing, obtain derivative, adjust for sameple rate
     nd_deriv = savgol_filter(_nd, window_length = 21, polyorder = 3, deriv = 1) / sample_rate
@@ -118,11 +182,130 @@ def calc_lifetime(_time, _nd, _illumination, _wafer_optical_const, _wafer_thickn
 
 
 
+def calc_ivoc(_isuns, _ivocs):
+
+    ''' Calculate Implied Voc at 1 Sun
+
+        Take implied Voc at last point with implied suns of at least 1 sun, otherwise extrapolate by linear
+        regression of implied Voc over log implied suns
+
+    Args:
+        _isuns (np.array): implied suns [suns]
+        _ivocs (np.array): implied open-circuit voltage [V]
+
+    Returns:
+        ivoc (float): implied open-circuit voltage at 1 sun [V]
+    '''
+
+    # get charge density at 1 sun
+    j = np.where(_isuns[::-1] >= 1.)[0]
+
+    # handle case for isuns max less than 1 sun
+    if len(j) > 0:
+        k = len(_isuns) - j[0] - 1
+        ivoc = _ivocs[k]
+
+    else:
+        # linear regression for ivoc at 1 sun
+        x = np.log(_isuns)
+        y = _ivocs
+        j = np.where((x > -5))
+        m, b, std, err1, err2 = linregress(x = x[j], y = y[j])
+        ivoc = b
+
+
+    # return implied Voc at 1 sun
+    return ivoc
+
+
+
+def calc_pff(_ivocs, _isuns, _points = 500):
+
+    ''' Calculate Pseudo Fill Factor
+
+        Calculate pseudo (implied) fill factor from implied suns-Voc curve, taking current as 1 - suns; single
+        monotone interpolation of log implied suns over implied Voc, maximum power point over uniform voltage grid,
+        refined over local grid about grid maximum then by parabola; vectorised over batch of traces (rows, nan padded)
+
+    Args:
+        _ivocs (np.array): implied open-circuit voltage [V], shape (points, ) or (traces, points)
+        _isuns (np.array): implied suns [suns], shape as _ivocs
+        _points (int): number of voltage grid points, each of full range (zero to implied Voc) and local grid
+
+    Returns:
+        pFF (float | np.array): pseudo fill factor [ ], nan where implied suns does not span 1 sun
+    '''
+
+    # flag single trace to return scalar result
+    scalar = np.ndim(_ivocs) == 1
+
+    # cast traces to rows
+    v = np.atleast_2d(np.asarray(_ivocs, dtype = np.float64))
+    s = np.atleast_2d(np.asarray(_isuns, dtype = np.float64))
+    rows = np.arange(v.shape[0])
+
+
+    # mask invalid entries and sort each trace by voltage, invalid entries last
+    valid = np.isfinite(v) & np.isfinite(s) & (s > 0.)
+    k = np.argsort(np.where(valid, v, np.inf), axis = 1)
+    v = np.take_along_axis(v, k, axis = 1)
+    ls = np.take_along_axis(np.log(np.where(valid, s, 1.)), k, axis = 1)
+    valid = np.take_along_axis(valid, k, axis = 1)
+
+    # enforce monotone log implied suns, fill invalid tail with last valid entry
+    last = np.maximum(valid.sum(axis = 1) - 1, 0)
+    ls = np.maximum.accumulate(np.where(valid, ls, -np.inf), axis = 1)
+    v = np.where(valid, v, v[rows, last][:, None])
+    ls = np.where(valid, ls, ls[rows, last][:, None])
+
+    # zero traces without valid entries
+    v[~valid[:, 0]] = 0.
+    ls[~valid[:, 0]] = 0.
+
+
+    # offset each row to flatten batch into single monotone interpolation
+    v_off = rows * (np.ptp(v, axis = 1).max() + 1.) - v[:, 0]
+    ls_off = rows * (np.ptp(ls, axis = 1).max() + 1.) - ls[:, 0]
+
+    # implied Voc at 1 sun, nan where 1 sun outside measured range
+    voc = np.interp(ls_off, (ls + ls_off[:, None]).ravel(), v.ravel())
+    voc[(ls[:, 0] > 0.) | (ls[rows, last] < 0.) | ~valid[:, 0]] = np.nan
+
+
+    # voltage range of power grid, zero to implied Voc
+    lo = np.zeros_like(voc)
+    hi = voc.copy()
+
+    # power over uniform voltage grid, current 1 - suns; clamp to measured range of each trace; second pass over
+    # local grid spanning neighbours of first pass grid maximum
+    for _pass in range(2):
+        V = lo[:, None] + (hi - lo)[:, None] * np.linspace(0., 1., _points)[None, :]
+        x = np.clip(V, v[:, :1], v[rows, last][:, None]) + v_off[:, None]
+        P = V * (1. - np.exp(np.interp(x, (v + v_off[:, None]).ravel(), ls.ravel())))
+
+        i = np.clip(np.argmax(np.nan_to_num(P, nan = -np.inf), axis = 1), 1, _points - 2)
+        lo, hi = V[rows, i - 1], V[rows, i + 1]
+
+    # parabolic refinement of maximum power about local grid maximum
+    p0, p1, p2 = P[rows, i - 1], P[rows, i], P[rows, i + 1]
+    d = p0 - 2 * p1 + p2
+    P_mpp = p1 - 0.125 * (p0 - p2)**2 / np.where(d == 0., -np.inf, d)
+
+
+    # pseudo fill factor, short circuit current 1 sun
+    pFF = P_mpp / voc
+
+
+    # return calculated pseudo fill factor
+    return pFF[0] if scalar else pFF
+
+
+
 ''' Data Processing Functions '''
 
 def process_standard(_wafer_doping_type, _wafer_resistivity, _wafer_thickness, _wafer_optical_const,
                      _illumination_mode, _temperature,
-                     _time, _conductance, _illumination):
+                     _time, _conductance, _illumination, _pff = False):
 
     ''' Standard Sinton Lifetime Measurement Data Processsing
 
@@ -139,6 +322,7 @@ def process_standard(_wafer_doping_type, _wafer_resistivity, _wafer_thickness, _
         _time
         _conductance
         _illumination
+        _pff (bool): calculate pseudo fill factor, nan if not
 
     Returns:
         dict: calculated derivative data
@@ -161,12 +345,8 @@ def process_standard(_wafer_doping_type, _wafer_resistivity, _wafer_thickness, _
                         _illumination_mode = _illumination_mode)
 
 
-    # calculate effective intrinsic parameters
-    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = _temperature)
-
-    # calculate effective equilibrium parameters
-    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = _temperature, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
-                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+    # get memoised intrinsic and equilibrium wafer parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = _temperature, _N_D = N_D, _N_A = N_A)
 
 
     # calculate implied suns
@@ -174,86 +354,21 @@ def process_standard(_wafer_doping_type, _wafer_resistivity, _wafer_thickness, _
 
 
     # calculate non-equilibrium parameters over charge density range
-    n_i_eff = np.array([
-        calc_wafer_nonequilibrium(_T = _temperature, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i,
-            _E_v_i = E_v_i, _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i, _n_i_0 = n_i_0, _dn = dn, _dp = dn)
-        for dn in nd ])[:,2]
+    n, p, n_i_eff = calc_wafer_nonequilibrium(_T = _temperature, _N_D = N_D, _N_A = N_A, _E_c_i = E_c_i,
+        _E_v_i = E_v_i, _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i, _n_i_0 = n_i_0, _dn = nd, _dp = nd)
 
     # calculate implied Voc
     ivocs = ( (1.381e-23 * _temperature / 1.602e-19) * np.log(nd * (N_M + nd) / (n_i_eff**2)) )
 
 
-    # get charge density at 1 sun
-    j = np.where(isuns[::-1] >= 1.)[0]
-
-    # handle case for isuns max less than 1 sun
-    if len(j) > 0:
-        k = len(isuns) - j[0] - 1
-        ivoc = ivocs[k]
-
-    else:
-        # linear regression for ivoc at 1 sun
-        x = np.log(isuns)
-        y = ivocs
-        j = np.where((x > -5))
-        m, b, std, err1, err2 = linregress(x = x[j], y = y[j])
-        ivoc = b
-
-
-    ''' pseudo-FF calc '''
-
-    if True:
-
-        # sort data
-        j = np.argsort(ivocs)
-        _ivocs = ivocs[j]
-        _isuns = isuns[j]
-
-        # get 1 sun voc
-        spl = splrep(_isuns, _ivocs)
-        voc = splev(1., spl, der = 0)
-
-        # extrapolate suns-voc from log-linear regression
-        slope, icept, err1, err1, err3 = linregress(_ivocs, np.log(_isuns))
-        V = np.arange(.1, .8, .01)
-        iss = np.exp(slope*V + icept)
-
-        I = -(iss-1)
-        P = I*V
-
-        j = np.where(I >= 0.)
-        I = I[j]
-        V = V[j]
-        P = P[j]
-
-
-        # rough maximum power point
-        k = np.where(P == P.max())
-        Vj = V[j][k]
-
-        # b-pline fit around maximum power point (rel. power)
-        k = np.where( (V[j] > Vj-0.1) & (V[j] < Vj+0.1) )
-        spl = splrep( V[j][k], P[k], )
-
-        # derivative of power at maximum power point
-        xr = np.arange(Vj-0.05, Vj+0.025, .001)
-        dP = splev(xr, spl, der = 1)
-
-        # linear regression for maximum power point voltage
-        slope, icept, r_value, p_value, std_err = linregress(dP, xr)
-        Vmpp = icept
-
-        # power at maximum power point
-        Pmpp = splev(Vmpp, spl, der = 0)
+    # get implied Voc at 1 sun
+    ivoc = calc_ivoc(_isuns = isuns, _ivocs = ivocs)
 
-        # b-pline fit around maximum power point (rel. power)
-        spl = splrep(V, I)
-        Impp = splev(Vmpp, spl, der = 0)
 
-        pFF = Impp*Vmpp/(1.*voc)
-
-    # temp
-    pFF = .99
+    # calculate pseudo fill factor from implied suns-Voc
+    pFF = np.nan
+    if _pff:
+        pFF = calc_pff(_ivocs = ivocs, _isuns = isuns)
 
 
     # return calculated results
@@ -345,42 +460,20 @@ def slt(data):
     else:
         trim = True
 
-    # use voltage transient derivatives to trim start and end, remove error values and noise
-    if trim:
+    # optionally calculate pseudo fill factor
+    if 'pff-slt' in data.keys():
+        pff = data['pff-slt']
+    else:
+        pff = False
 
-        # select data range
-        x = time.copy()
-        y = conductance.copy()
-        z = illumination.copy()
-
-        # strip error values at head and tail (time and noise floor)
-        j = np.where( (x > 0.) & (y > 2e-4) )
-        x = x[j]; y = y[j]; z = z[j]
-
-        # calculate first derivative
-        dy = savgol_filter(y, 15, 2, deriv = 1, mode = 'nearest')
-        ddy = savgol_filter(y, 15, 2, deriv = 2, mode = 'nearest')
-
-        # strip error values
-        j = np.where( (y > 1e-3) & (dy > 0.) )[0]
-        if len(j) > 0:
-            x = x[(j[-1]+1):]
-            y = y[(j[-1]+1):]
-            z = z[(j[-1]+1):]
-            dy = dy[(j[-1]+1):]
-            ddy = ddy[(j[-1]+1):]
-
-        k = np.where( (ddy == ddy.max()) )[0][0]
-        j = np.where( (ddy < 0.) & (x < x[k]) )[0]
-        if len(j) > 0:
-            x = x[(j[-1]+1):]
-            y = y[(j[-1]+1):]
-            z = z[(j[-1]+1):]
+    # use voltage transient derivatives to trim start and end, remove error values and noise; cached trim index
+    if trim:
+        k = get_trace_trim(data)
 
         # update raw data
-        time = x
-        conductance = y
-        illumination = z
+        time = time[k]
+        conductance = conductance[k]
+        illumination = illumination[k]
 
 
 
@@ -392,7 +485,7 @@ def slt(data):
                                                                _illumination_mode = illumination_mode,
                                                                _temperature = temperature, _time = time,
                                                                _conductance = conductance,
-                                                               _illumination = illumination)
+                                                               _illumination = illumination, _pff = pff)
 
     results = {'N_D': N_D, 'N_A': N_A, 'nd': nd, 'tau': tau, 'isuns': isuns, 'n_i_eff': n_i_eff, 'ivoc': ivoc,
         'ivocs': ivocs, 'pFF': pFF}
@@ -400,6 +493,189 @@ def slt(data):
 
     results['calc_wafer_resistivity'] = data['dark_res'] * wafer_thickness
 
+    # cache trim index on node for repeat processing
+    if trim:
+        results['trim_index'] = k
+
 
     # return calculated results
     return results
+
+
+
+''' Batch Processing Functions '''
+
+def slt_batch(nodes):
+
+    ''' Process Batch of Sinton Lifetime Measurement Data
+
+        Stack trimmed traces of all measurements into nan padded (traces, points) matrices with validity mask;
+        calculate charge density, lifetime, implied suns and implied Voc for whole stack with array operations,
+        lifetime per group of equal trace length and illumination mode, non-equilibrium parameters once per group of
+        wafer parameters (T, N_D, N_A); split results per measurement, failures reported per measurement without
+        aborting the batch
+
+    Args:
+        nodes (list): sinton lifetime measurement data nodes (dict)
+
+    Returns:
+        results (list): processed results (dict) for each node in order, None on failure
+        failures (dict): error message (str) by node index for each failed node
+    '''
+
+    # store results and failures by node index
+    results = [None] * len(nodes)
+    failures = {}
+
+
+    # trim each trace by cached or calculated trim index, calculate wafer doping density
+    index = []; trims = []; doping = []
+    for i, node in enumerate(nodes):
+
+        try:
+            trim = node['trim-slt'] if 'trim-slt' in node.keys() else True
+            k = get_trace_trim(node) if trim else np.arange(len(node['time']))
+
+            doping.append( calc_wafer_doping_density(node['wafer_doping_type'], node['wafer_resistivity']) )
+            trims.append( (k, trim) )
+            index.append(i)
+
+        # on error, store error message and continue
+        except Exception as e:
+            failures[i] = '{}: {}'.format(type(e).__name__, e)
+
+    # no valid traces to process
+    if len(index) == 0:
+        return results, failures
+
+
+    # unpack wafer parameters as column arrays
+    T = np.array([ nodes[i]['temperature'] for i in index ], dtype = np.float64)[:, None]
+    W = np.array([ nodes[i]['wafer_thickness'] for i in index ], dtype = np.float64)[:, None]
+    k_opt = np.array([ nodes[i]['wafer_optical_const'] for i in index ], dtype = np.float64)[:, None]
+    N_D = np.array([ d[0] for d in doping ], dtype = np.float64)
+    N_A = np.array([ d[1] for d in doping ], dtype = np.float64)
+    N_M = np.maximum(N_D, N_A)[:, None]
+
+
+    # validity mask of padded trace matrices
+    length = np.array([ len(k) for k, trim in trims ])
+    mask = np.arange(length.max())[None, :] < length[:, None]
+
+    # stack trimmed traces into nan padded matrices
+    def stack(key):
+        m = np.full(mask.shape, np.nan)
+        m[mask] = np.concatenate([ nodes[i][key][k] for i, (k, trim) in zip(index, trims) ])
+        return m
+
+    time = stack('time')
+    conductance = stack('conductance')
+    illumination = stack('illumination')
+
+
+    # calculate excess minority carrier density
+    nd = calc_charge_density(_N_M = N_M, _wafer_thickness = W, _conductance = conductance)
+
+
+    # calculate minority carrier lifetime per group of equal trace length and illumination mode
+    tau = np.full(mask.shape, np.nan)
+
+    groups = {}
+    for r, i in enumerate(index):
+        groups.setdefault( (length[r], nodes[i]['illumination_mode']), [] ).append(r)
+
+    for (L, mode), r in groups.items():
+        try:
+            tau[r, :L] = calc_lifetime(_time = time[r, :L], _nd = nd[r, :L], _illumination = illumination[r, :L],
+                _wafer_optical_const = k_opt[r], _wafer_thickness = W[r], _illumination_mode = mode)
+
+        # on error, store error message for each node in group
+        except Exception as e:
+            failures.update({ index[j]: '{}: {}'.format(type(e).__name__, e) for j in r })
+
+
+    # calculate implied suns
+    isuns = ( nd * W * 1.602e-19 / (0.038 * k_opt * tau) )
+
+
+    # calculate non-equilibrium parameters per group of wafer parameters, over valid trace elements
+    n_i_eff = np.full(mask.shape, np.nan)
+
+    groups = {}
+    for r in range(len(index)):
+        groups.setdefault( tuple( '{:.6g}'.format(v) for v in [T[r, 0], N_D[r], N_A[r]] ), [] ).append(r)
+
+    for r in groups.values():
+        try:
+            _T, _N_D, _N_A = T[r[0], 0], N_D[r[0]], N_A[r[0]]
+            N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 = get_wafer_state(_T = _T, _N_D = _N_D, _N_A = _N_A)
+
+            dn = nd[r][mask[r]]
+            n, p, _n_i_eff = calc_wafer_nonequilibrium(_T = _T, _N_D = _N_D, _N_A = _N_A, _E_c_i = E_c_i,
+                _E_v_i = E_v_i, _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i, _n_i_0 = n_i_0, _dn = dn, _dp = dn)
+
+            m = np.full((len(r), mask.shape[1]), np.nan)
+            m[mask[r]] = _n_i_eff
+            n_i_eff[r] = m
+
+        # on error, store error message for each node in group
+        except Exception as e:
+            failures.update({ index[j]: '{}: {}'.format(type(e).__name__, e) for j in r })
+
+
+    # calculate implied Voc
+    ivocs = ( (1.381e-23 * T / 1.602e-19) * np.log(nd * (N_M + nd) / (n_i_eff**2)) )
+
+
+    # implied Voc at last point of at least 1 sun
+    hit = (isuns >= 1.) & mask
+    last = mask.shape[1] - 1 - np.argmax(hit[:, ::-1], axis = 1)
+    ivoc = ivocs[np.arange(len(index)), last]
+
+    # linear regression of implied Voc over log implied suns, intercept at 1 sun
+    r = np.flatnonzero(~hit.any(axis = 1))
+    if len(r) > 0:
+        x = np.log(np.where(mask[r], isuns[r], np.nan))
+        y = ivocs[r]
+        j = (x > -5) & np.isfinite(y)
+        n = j.sum(axis = 1)
+        x_m = np.where(j, x, 0.).sum(axis = 1) / n
+        y_m = np.where(j, y, 0.).sum(axis = 1) / n
+        m = ( np.where(j, (x - x_m[:, None]) * (y - y_m[:, None]), 0.).sum(axis = 1) /
+              np.where(j, (x - x_m[:, None])**2, 0.).sum(axis = 1) )
+        ivoc[r] = y_m - m * x_m
+
+
+    # calculate pseudo fill factor from implied suns-Voc for selected traces
+    pFF = np.full(len(index), np.nan)
+    r = [ r for r, i in enumerate(index) if 'pff-slt' in nodes[i].keys() and nodes[i]['pff-slt'] ]
+    if len(r) > 0:
+        pFF[r] = calc_pff(_ivocs = ivocs[r], _isuns = isuns[r])
+
+
+    # split results per node
+    for r, i in enumerate(index):
+        if i in failures.keys():
+            continue
+
+        try:
+            L = length[r]
+            rec = {'N_D': N_D[r], 'N_A': N_A[r], 'nd': nd[r, :L], 'tau': tau[r, :L], 'isuns': isuns[r, :L],
+                'n_i_eff': n_i_eff[r, :L], 'ivoc': ivoc[r], 'ivocs': ivocs[r, :L], 'pFF': pFF[r]}
+
+            rec['calc_wafer_resistivity'] = nodes[i]['dark_res'] * nodes[i]['wafer_thickness']
+
+            # cache trim index on node for repeat processing
+            k, trim = trims[r]
+            if trim:
+                rec['trim_index'] = k
+
+            results[i] = rec
+
+        # on error, store error message and continue
+        except Exception as e:
+            failures[i] = '{}: {}'.format(type(e).__name__, e)
+
+
+    # return processed results and failures
+    return results, failures
@@ -18,6 +18,9 @@ Todo:
 # data array handling
 import numpy as np
 
+# least recently used cache
+from functools import lru_cache
+
 
 # model calculation functions
 from . import models
@@ -72,17 +75,17 @@ def calc_wafer_intrinsic(_T):
     ''' Get Effective Intrinsic Parameters
 
         Calculate and return intrinsic silicon parameters dependent only on temperature; band density of states,
-        intrinsic bandgap, intrinsic carrier concentration
+        intrinsic bandgap, intrinsic carrier concentration; broadcasts over temperature array
 
     Args:
-        _T (float): temperature [K]
+        _T (float | np.array): temperature [K]
 
     Returns:
-        N_c_i (float): effective intrinsic conduction band density of states [ / cm^3]
-        N_v_i (float): effective intrinsic valance band density of states [ / cm^3]
-        E_c_i (float): effective intrinsic conduction band energy relative to intrinsic Fermi level [eV]
-        E_v_i (float): effective intrinsic valance band energy relative to intrinsic Fermi level [eV]
-        n_i (float): effective intrinsic carrier density [ / cm^3]
+        N_c_i (float | np.array): effective intrinsic conduction band density of states [ / cm^3]
+        N_v_i (float | np.array): effective intrinsic valance band density of states [ / cm^3]
+        E_c_i (float | np.array): effective intrinsic conduction band energy relative to intrinsic Fermi level [eV]
+        E_v_i (float | np.array): effective intrinsic valance band energy relative to intrinsic Fermi level [eV]
+        n_i (float | np.array): effective intrinsic carrier density [ / cm^3]
     '''
 
     # calculate effective conduction, valance band density of states [ / cm^3]
@@ -110,78 +113,162 @@ def calc_wafer_equilibrium(_T, _N_D, _N_A, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n_i)
         Calculate equilibrium parameters dependent on doping density and excess carrier densities; effective
         electron, hole carrier concentrations; iterate for convergence of effective intrinsic carrier density
 
+        Temperature dependent parameters may be passed as arrays (temperature axis), each element is iterated together
+        and masked from further iteration once converged; scalar inputs return scalar results
+
     Args:
-        _T (float): temperature [K]
+        _T (float | np.array): temperature [K]
         _N_D (float): donor doping concentration [ / cm^-3]
         _N_A (float): acceptor doping concentration [ / cm^-3]
-        _N_c_i (float): intrinsic conduction band density of states [ / cm^3]
-        _N_v_i (float): intrinsic valance band density of states [ / cm^3]
-        _E_c_i (float): intrinsic conduction band energy relative to intrinsic Fermi level [eV]
-        _E_v_i (float): intrinsic valance band energy relative to intrinsic Fermi level [eV]
-        _n_i (float): effective intrinsic carrier concentration [ / cm^-3]
+        _N_c_i (float | np.array): intrinsic conduction band density of states [ / cm^3]
+        _N_v_i (float | np.array): intrinsic valance band density of states [ / cm^3]
+        _E_c_i (float | np.array): intrinsic conduction band energy relative to intrinsic Fermi level [eV]
+        _E_v_i (float | np.array): intrinsic valance band energy relative to intrinsic Fermi level [eV]
+        _n_i (float | np.array): effective intrinsic carrier concentration [ / cm^-3]
 
     Returns:
-        n_0 (float): equilibrium electron concentration [ / cm^-3]
-        p_0 (float): equilibrium hole concentration [ / cm^-3]
-        n_i_0 (float): effective intrinsic carrier concentration at equilibrium [ / cm^-3]
+        n_0 (float | np.array): equilibrium electron concentration [ / cm^-3]
+        p_0 (float | np.array): equilibrium hole concentration [ / cm^-3]
+        n_i_0 (float | np.array): effective intrinsic carrier concentration at equilibrium [ / cm^-3]
     '''
 
-    # initial guess (intrinsic/equilibrium values), calculate electron/hole conc.
-    n_i_0 = _n_i
+    # flag scalar input to return scalar results
+    scalar = all( np.ndim(v) == 0 for v in [_T, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n_i] )
+
+    # broadcast temperature dependent parameters to common flat arrays
+    T, E_c_i, E_v_i, N_c_i, N_v_i, n_i = [ np.ravel(v).astype(np.float64) for v in
+        np.broadcast_arrays(_T, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n_i) ]
+    shape = np.broadcast(_T, _E_c_i, _E_v_i, _N_c_i, _N_v_i, _n_i).shape
 
 
-    # default initial reference to ensure initial iteration
-    n_i_ref = 2 * n_i_0
+    # initial guess (intrinsic/equilibrium values), calculate electron/hole conc.
+    n_i_0 = n_i.copy()
+
+    # mask of elements not yet converged, all elements require initial iteration
+    active = np.ones(n_i_0.shape, dtype = bool)
 
     # set iteration params
     _iter = 0
     max_iter = 20
 
 
-    # iterate for convergence of n_i to within 0.01% variation
-    while (_iter <= max_iter) and ( abs((n_i_0 - n_i_ref) / n_i_ref) > 1e-4 ):
+    # iterate for convergence of n_i to within 0.01% variation, only over unconverged elements
+    while (_iter <= max_iter) and active.any():
 
         # incriment iterator
         _iter += 1
 
+        # get indicies of unconverged elements
+        j = np.flatnonzero(active)
+
         # update reference value for intrinsic carrier concentration convergence
-        n_i_ref = n_i_0
+        n_i_ref = n_i_0[j]
 
 
         # calculate equilibrium electron, hole concentration [ / cm^-3], zero excess charge density
-        n_0, p_0 = models.calc_np(_N_D = _N_D, _N_A = _N_A, _dn = 0, _dp = 0, _n_i = n_i_0)
+        n_0, p_0 = models.calc_np(_N_D = _N_D, _N_A = _N_A, _dn = 0, _dp = 0, _n_i = n_i_ref)
 
 
         # calculate shift in conduction, valance band energy due to bandgap narrowing [eV]
-        dE_g_0, dE_c_0, dE_v_0 = models.calc_dE_bgn(_N_D = _N_D, _N_A = _N_A, _n = n_0, _p = p_0, _T = _T)
+        dE_g_0, dE_c_0, dE_v_0 = models.calc_dE_bgn(_N_D = _N_D, _N_A = _N_A, _n = n_0, _p = p_0, _T = T[j])
 
 
         # calculate equilibrium bandgap narrowing correction factor [ ]
-        gamma_bgn_0 = models.calc_gamma_bgn_0(_N_c_i = _N_c_i, _N_v_i = _N_v_i, _n_0 = n_0, _p_0 = p_0, _T = _T,
-            _dE_c_0 = dE_c_0, _dE_v_0 = dE_v_0)
+        gamma_bgn_0 = models.calc_gamma_bgn_0(_N_c_i = N_c_i[j], _N_v_i = N_v_i[j], _n_0 = n_0, _p_0 = p_0,
+            _T = T[j], _dE_c_0 = dE_c_0, _dE_v_0 = dE_v_0)
 
 
         # adjust intrinsic conduction, valance band energy due to bandgap narrowing
-        E_c_0 = _E_c_i - dE_c_0
-        E_v_0 = _E_v_i + dE_v_0
+        E_c_0 = E_c_i[j] - dE_c_0
+        E_v_0 = E_v_i[j] + dE_v_0
 
 
         # calculate equilibrium fermi level energy [eV]
-        E_f_0 = models.calc_E_f_0(_E_c_0 = E_c_0, _E_v_0 = E_v_0, _n_0 = n_0, _p_0 = p_0, _T = _T, _N_c_i = _N_c_i,
-            _N_v_i = _N_v_i)
+        E_f_0 = models.calc_E_f_0(_E_c_0 = E_c_0, _E_v_0 = E_v_0, _n_0 = n_0, _p_0 = p_0, _T = T[j],
+            _N_c_i = N_c_i[j], _N_v_i = N_v_i[j])
 
 
         # using equivalent electron/hole fermi level, calculate equilibrium degeneracy factor [ ]
-        gamma_degen_0 = models.calc_gamma_degen(_E_c = E_c_0, _E_v = E_v_0, _E_f_n = E_f_0, _E_f_p = E_f_0, _T = _T)
+        gamma_degen_0 = models.calc_gamma_degen(_E_c = E_c_0, _E_v = E_v_0, _E_f_n = E_f_0, _E_f_p = E_f_0,
+            _T = T[j])
 
 
         # update effective intrinsic carrier concentration
-        n_i_0 = ((_n_i**2) * gamma_bgn_0 * gamma_degen_0)**(0.5)
+        n_i_0[j] = ((n_i[j]**2) * gamma_bgn_0 * gamma_degen_0)**(0.5)
+
+        # mask converged elements from further iteration
+        active[j] = abs((n_i_0[j] - n_i_ref) / n_i_ref) > 1e-4
 
 
     # calculate equilibrium electron, hole concentration [ / cm^-3], zero excess charge density
     n_0, p_0 = models.calc_np(_N_D = _N_D, _N_A = _N_A, _dn = 0, _dp = 0, _n_i = n_i_0)
 
 
+    # return scalar results for scalar input
+    if scalar:
+        return n_0[0], p_0[0], n_i_0[0]
+
+
     # return calculated parameters
-    return n_0, p_0, n_i_0
+    return n_0.reshape(shape), p_0.reshape(shape), n_i_0.reshape(shape)
+
+
+
+''' Wafer State Memoisation Functions '''
+
+@lru_cache(maxsize = 256)
+def calc_wafer_state(_T, _N_D, _N_A):
+
+    ''' Calculate Wafer State
+
+        Calculate intrinsic and equilibrium wafer parameters; memoised process-wide (each worker process holds its own
+        bounded cache) with least recently used eviction, hit/miss counters available from cache_info()
+
+    Args:
+        _T (float): temperature [K]
+        _N_D (float): donor doping concentration [ / cm^-3]
+        _N_A (float): acceptor doping concentration [ / cm^-3]
+
+    Returns:
+        N_c_i (float): effective intrinsic conduction band density of states [ / cm^3]
+        N_v_i (float): effective intrinsic valance band density of states [ / cm^3]
+        E_c_i (float): effective intrinsic conduction band energy relative to intrinsic Fermi level [eV]
+        E_v_i (float): effective intrinsic valance band energy relative to intrinsic Fermi level [eV]
+        n_i (float): effective intrinsic carrier density [ / cm^3]
+        n_0 (float): equilibrium electron concentration [ / cm^-3]
+        p_0 (float): equilibrium hole concentration [ / cm^-3]
+        n_i_0 (float): effective intrinsic carrier concentration at equilibrium [ / cm^-3]
+    '''
+
+    # calculate effective intrinsic parameters
+    N_c_i, N_v_i, E_c_i, E_v_i, n_i = calc_wafer_intrinsic(_T = _T)
+
+    # calculate effective equilibrium parameters
+    n_0, p_0, n_i_0 = calc_wafer_equilibrium(_T = _T, _N_D = _N_D, _N_A = _N_A, _E_c_i = E_c_i, _E_v_i = E_v_i,
+                                             _N_c_i = N_c_i, _N_v_i = N_v_i, _n_i = n_i)
+
+
+    # return calculated parameters
+    return N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0
+
+
+
+def get_wafer_state(_T, _N_D, _N_A):
+
+    ''' Get Wafer State
+
+        Get memoised intrinsic and equilibrium wafer parameters, key inputs rounded to merge equivalent floating point
+        values from repeat measurements of wafers with shared temperature, doping type and resistivity
+
+    Args:
+        _T (float): temperature [K]
+        _N_D (float): donor doping concentration [ / cm^-3]
+        _N_A (float): acceptor doping concentration [ / cm^-3]
+
+    Returns:
+        tuple: N_c_i, N_v_i, E_c_i, E_v_i, n_i, n_0, p_0, n_i_0 (see calc_wafer_state)
+    '''
+
+    # return memoised wafer state by rounded inputs
+    return calc_wafer_state(_T = float('{:.6g}'.format(_T)), _N_D = float('{:.6g}'.format(_N_D)),
+                            _N_A = float('{:.6g}'.format(_N_A)))
@@ -0,0 +1,323 @@
+
+''' Watch Folder Streaming Protocols
+
+Summary:
+    This file contains functions to watch an instrument output directory for new sinton lifetime measurement files;
+    each new file is imported, processed, optionally fit with lifetime model, and appended to a running summary
+
+Example:
+    Usage of
+
+        state = init_watch(base_path = './data', props = {...}, param_sep = '_', params = ['device_id', ...],
+            mlt = True, summary_path = './results-summary.csv')
+        run_watch(state)
+
+Todo:
+    *
+'''
+
+
+
+''' Imports '''
+
+# filesystem navigation, csv export, timing
+import os, csv, time
+
+
+# data import module
+from . import data_import
+
+# data processing module
+from . import process_data
+
+# general functions module
+from . import general
+
+
+
+''' Watch State Functions '''
+
+def init_watch(base_path, props, param_sep = None, params = None, mlt = False, values = None, summary_path = None,
+               exts = ['ltr', 'xlsm'], skip_existing = False):
+
+    ''' Initialise Watch Folder State
+
+        Initialise incremental state for watched directory; files already listed in existing summary file are marked
+        seen and never reprocessed, optionally mark all files present at start as seen
+
+    Args:
+        base_path (str): full directory path to watch
+        props (dict): measurement properties to store in each measurement node (wafer, illumination parameters)
+        param_sep (str): file name parameter separator character
+        params (list): ordered list of parameters to parse from file name
+        mlt (bool): fit lifetime model to each processed measurement
+        values (list): node parameters to store in summary, default by processing
+        summary_path (str): full path of summary csv file, appended with each processed measurement
+        exts (list): watched file extensions, also used as file type
+        skip_existing (bool): mark files present at start as seen
+
+    Returns:
+        dict: watch folder state
+    '''
+
+    # build file name parse string from ordered parameter list and separator
+    parse_string = None
+    if params is not None:
+        parse_string = '^{}\..+$'.format( param_sep.join( [ '(?P<{}>.+)'.format(p) for p in params ] ) )
+
+    # default summary values by processing
+    if values is None:
+        values = ['N_D', 'N_A', 'ivoc', 'pFF']
+        if mlt:
+            values += ['J_0', 't_blk', 't_eff', 'k_val', 'R2']
+
+
+    # initialise state; seen files, pending files (size, modified time) awaiting complete write
+    state = {'base_path': base_path, 'props': props, 'params': params or [], 'parse_string': parse_string,
+        'mlt': mlt, 'values': values, 'summary_path': summary_path, 'exts': [ '.' + e for e in exts ],
+        'dir_mtime': None, 'listed': 0., 'seen': set(), 'pending': {}, 'db': [], 'summary': [], 'failures': {}}
+
+
+    # mark files in existing summary as seen
+    if summary_path is not None and os.path.isfile(summary_path):
+        with open(summary_path, 'r', newline = '') as f:
+            state['seen'].update( row['file_name'] for row in csv.DictReader(f) )
+
+    # mark files present at start as seen
+    if skip_existing:
+        state['seen'].update( e.name for e in os.scandir(base_path) if e.is_file() )
+
+
+    # return watch folder state
+    return state
+
+
+
+def list_new_files(state):
+
+    ''' List New Files
+
+        List watched directory only where directory modified since last listing, add new files of watched extension
+        to pending
+
+    Args:
+        state (dict): watch folder state
+
+    Returns:
+        (none): new files added to state pending
+    '''
+
+    # skip listing where directory unchanged since last listing, relist within 1 s for coarse timestamps
+    mtime = os.stat(state['base_path']).st_mtime
+    if mtime == state['dir_mtime'] and state['listed'] - mtime > 1.:
+        return
+
+    state['dir_mtime'] = mtime
+    state['listed'] = time.time()
+
+
+    # add new files of watched extension to pending, not yet stat
+    for entry in os.scandir(state['base_path']):
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in state['exts']:
+            if entry.name not in state['seen'] and entry.name not in state['pending']:
+                state['pending'][entry.name] = None
+
+
+
+def get_ready_files(state):
+
+    ''' Get Ready Files
+
+        Get pending files with non-zero size unchanged since previous poll (write complete)
+
+    Args:
+        state (dict): watch folder state
+
+    Returns:
+        list: file names ready for processing
+    '''
+
+    ready = []
+
+    # iterate pending files, compare size and modified time with previous poll
+    for file_name, last in list(state['pending'].items()):
+
+        try:
+            st = os.stat(os.path.join(state['base_path'], file_name))
+
+        # file removed before processing
+        except FileNotFoundError:
+            del state['pending'][file_name]
+            continue
+
+        stat = (st.st_size, st.st_mtime_ns)
+        if st.st_size > 0 and stat == last:
+            ready.append(file_name)
+            del state['pending'][file_name]
+        else:
+            state['pending'][file_name] = stat
+
+
+    # return file names ready for processing
+    return ready
+
+
+
+''' Watch Processing Functions '''
+
+def process_file(state, file_name):
+
+    ''' Process Watched File
+
+        Import, process and optionally fit lifetime model to single measurement file; store node and append summary
+
+    Args:
+        state (dict): watch folder state
+        file_name (str): measurement file name inc. ext.
+
+    Returns:
+        dict: processed measurement node, None on failure
+    '''
+
+    # mark seen, never reprocess on failure
+    state['seen'].add(file_name)
+
+    # define new measurement node
+    file_type = os.path.splitext(file_name)[1][1:].lower()
+    node = {**state['props'], 'meas_type': 'slt', 'file_type': file_type, 'file_name': file_name,
+        'file_path': state['base_path']}
+
+    try:
+
+        # parse file name parameters
+        if state['parse_string'] is not None:
+            filename_params = general.str_parse_params(_string = file_name, _parse_string = state['parse_string'])
+            if filename_params is None:
+                raise ValueError('parsing parameters failed for file: {}'.format(file_name))
+            node.update(filename_params)
+
+        # import data from file
+        node.update( data_import.core.import_data_file(meas_type = 'slt', file_type = file_type,
+            file_path = state['base_path'], file_name = file_name) )
+
+        # process sinton lifetime measurement
+        node.update( process_data.slt.slt(data = node) )
+
+        # optionally fit lifetime model
+        if state['mlt']:
+            node.update( process_data.mlt.mlt(data = node) )
+
+
+    # on error, store error message
+    except Exception as e:
+        state['failures'][file_name] = '{}: {}'.format(type(e).__name__, e)
+        print('failed to process measurement: {} ({})'.format(file_name, state['failures'][file_name]))
+        return None
+
+
+    # store node, append summary row
+    state['db'].append(node)
+    append_summary(state, node)
+
+    print('processed measurement: {}'.format(file_name))
+
+
+    # return processed node
+    return node
+
+
+
+def append_summary(state, node):
+
+    ''' Append Summary
+
+        Append summary row of file name, file name parameters and values to running summary and summary file
+
+    Args:
+        state (dict): watch folder state
+        node (dict): processed measurement node
+
+    Returns:
+        (none): summary row appended
+    '''
+
+    # build summary row
+    keys = ['file_name'] + state['params'] + state['values']
+    row = { k: node[k] if k in node.keys() else None for k in keys }
+
+    state['summary'].append(row)
+
+
+    # append row to summary file, header for new file
+    if state['summary_path'] is not None:
+        new = not os.path.isfile(state['summary_path'])
+
+        with open(state['summary_path'], 'a', newline = '') as f:
+            writer = csv.DictWriter(f, fieldnames = keys)
+            if new:
+                writer.writeheader()
+            writer.writerow(row)
+
+
+
+def poll_watch(state):
+
+    ''' Poll Watch Folder
+
+        Single incremental watch step; list new files, process files with complete write
+
+    Args:
+        state (dict): watch folder state
+
+    Returns:
+        list: processed measurement nodes
+    '''
+
+    # list new files, get pending files ready for processing
+    list_new_files(state)
+    ready = get_ready_files(state)
+
+
+    # process each ready file in name order
+    nodes = [ process_file(state, file_name) for file_name in sorted(ready) ]
+
+
+    # return processed nodes
+    return [ node for node in nodes if node is not None ]
+
+
+
+def run_watch(state, interval = 0.2, duration = None):
+
+    ''' Run Watch Folder
+
+        Poll watch folder at interval until duration elapsed or interrupted; file landing to result latency within two
+        poll intervals plus processing time
+
+    Args:
+        state (dict): watch folder state
+        interval (float): poll interval [s]
+        duration (float): run duration [s], default until interrupted
+
+    Returns:
+        dict: watch folder state
+    '''
+
+    print('begin watching: {}'.format(state['base_path']))
+
+    start = time.time()
+
+    try:
+        while duration is None or time.time() - start < duration:
+            poll_watch(state)
+            time.sleep(interval)
+
+    # stop on interrupt
+    except KeyboardInterrupt:
+        pass
+
+    print('\nwatch stopped, {} measurements processed'.format(len(state['db'])))
+
+
+    # return watch folder state
+    return state